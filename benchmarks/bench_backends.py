@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark: the same SRT corpus through each translation backend.
+Reports cues/sec and API calls (model invocations for the offline engine) per backend.
+HTTP backends run against the local mock server unless --live is given, in which
+case they use the configuration from the environment/.env (GEMINI_API_KEY,
+OPENAI_API_BASE_URL, OPENAI_MODEL_NAME, ...). The offline backend always runs
+for real and is reported as unavailable when Argos Translate or its en->pl
+package is not installed.
+
+Usage: python benchmarks/bench_backends.py [--backends gemini openai offline] [--srt FILE ...] [--cues 300] [--latency 0.5] [--live]
+"""
+
+import io
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from mock_gemini_server import MockGeminiState, start_server
+from bench_translation import write_srt
+from source.batch_sizer import BatchSizer
+from source.srt_parser import parse_srt
+from source.translation_manager import SubtitleTranslator, SOURCE_LANGUAGE_CODE, TARGET_LANGUAGE_CODE
+from source.translation_backends import GeminiBackend, OpenAICompatibleBackend, OfflineBackend
+from source.translation_memory import TranslationMemory
+
+
+def make_backend(name, base_url, live):
+    if name == 'offline': return OfflineBackend()
+    if live: return GeminiBackend() if name == 'gemini' else OpenAICompatibleBackend()
+    if name == 'gemini': return GeminiBackend(api_key="mock", base_url=base_url)
+    return OpenAICompatibleBackend(base_url=f"{base_url.rsplit('/', 1)[0]}/v1", model="mock")
+
+
+def run_backend(backend, corpus, work_dir):
+    """ Translates a private copy of the corpus; returns (cues, seconds, api calls) or an error string. """
+    error = backend.check(SOURCE_LANGUAGE_CODE, [TARGET_LANGUAGE_CODE])
+    if error: return error
+    os.makedirs(work_dir); srt_paths = []
+    for path in corpus: srt_paths.append(shutil.copy(path, work_dir))
+    translator = SubtitleTranslator(backend)
+    # Throwaway memory and tuning, so every backend starts cold and measures real traffic
+    translator.translation_memory = TranslationMemory(os.path.join(work_dir, "tm.sqlite3"))
+    translator.batch_sizer = BatchSizer(backend.model_id, os.path.join(work_dir, "tuning.json"))
+    errors = []; translator.translation_error.connect(lambda src, err: errors.append(err))
+    start = time.perf_counter()
+    for srt_path in srt_paths: translator._run_translation(srt_path)
+    elapsed = time.perf_counter() - start
+    if errors: return errors[0]
+    return sum(len(parse_srt(path)) for path in srt_paths), elapsed, translator.api_calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backends', nargs='+', default=['gemini', 'openai', 'offline'], choices=['gemini', 'openai', 'offline'])
+    parser.add_argument('--srt', nargs='+', help="Corpus files (default: one synthetic file of --cues cues)")
+    parser.add_argument('--cues', type=int, default=300); parser.add_argument('--latency', type=float, default=0.5)
+    parser.add_argument('--live', action='store_true', help="Use the configured HTTP endpoints instead of the mock server")
+    args = parser.parse_args()
+    server, base_url = start_server(MockGeminiState(args.latency, jitter=args.latency / 5))
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = args.srt
+        if not corpus: corpus = [os.path.join(tmp, "corpus.en.srt")]; write_srt(corpus[0], args.cues)
+        print(f"Corpus: {len(corpus)} file(s); HTTP backends {'live' if args.live else f'on mock server ({args.latency}s latency)'}")
+        print(f"{'backend':>10}{'model':>28}{'cues':>8}{'time (s)':>10}{'cues/s':>10}{'API calls':>11}{'calls/cue':>11}")
+        for name in args.backends:
+            backend = make_backend(name, base_url, args.live)
+            with contextlib.redirect_stdout(io.StringIO()): result = run_backend(backend, corpus, os.path.join(tmp, name)) # Keep the table readable
+            if isinstance(result, str): print(f"{name:>10}{backend.model_id:>28}  unavailable: {result}"); continue
+            cues, elapsed, api_calls = result
+            print(f"{name:>10}{backend.model_id:>28}{cues:>8}{elapsed:>10.2f}{cues / elapsed:>10.1f}{api_calls:>11}{api_calls / cues:>11.3f}")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
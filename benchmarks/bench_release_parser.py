@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Benchmark: release name parsing, previous movie_player regex path vs. the memoized release_parser.
+Reports names/sec for the legacy parser, the new parser on a cold cache and on a warm cache
+(the re-index/regroup case), how many distinct shows each groups the corpus into, how many
+titles still carry release tags (codec, source, group), and where the two disagree on season/episode.
+The default corpus is release_names.tsv: real film and series release names with the expected
+title/season/episode, checked on every run. Any other .tsv in that format, a text file with one
+name per line or a library directory (walked for video files) can be given instead; --synthetic N
+builds N scene-style names from a few real patterns, for timing at library scale.
+
+Usage: python benchmarks/bench_release_parser.py [CORPUS] [--synthetic 50000] [--repeat 3]
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from source.release_parser import parse_release_name, show_key, PARSE_CACHE_SIZE, RELEASE_TAG_REGEX, SEPARATORS_REGEX
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "release_names.tsv")
+
+LEGACY_SEASON_EPISODE_REGEX = re.compile(
+    r'[._ \-](?:s|season)?(\d{1,3})[._ \-]?(?:e|ep|episode|x)(\d{1,3})[._ \-]|'
+    r'[._ \-](\d{1,3})x(\d{1,3})[._ \-]',
+    re.IGNORECASE
+)
+LEGACY_CLEAN_QUERY_REGEX = re.compile(
+    r'(\b(?:19|20)\d{2}\b)|' r'(\b(?:720p|1080p|2160p|4k)\b)|'
+    r'(\b(?:bluray|web.?dl|hdtv|dvd.?rip)\b)|' r'(\[.*?\])|' r'(\(.*?\))',
+    re.IGNORECASE
+)
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm')
+SHOWS = ["Breaking Bad", "The Office US", "Game of Thrones", "Better Call Saul", "The Expanse", "Dark", "Chernobyl",
+         "Stranger Things", "The Wire", "Mr Robot", "True Detective", "Fargo", "The Crown", "Peaky Blinders", "Succession",
+         "House of the Dragon", "The Mandalorian", "Severance", "Ted Lasso", "The Bear", "Shogun", "Slow Horses", "1883"]
+EPISODE_TITLES = ["Pilot", "The Long Night", "Winter Is Coming", "Ozymandias", "Gone", "Rebirth", "Homecoming", ""]
+MOVIES = ["Blade Runner 2049", "Dune Part Two", "Oppenheimer", "The Matrix", "Arrival", "Sicario", "Heat", "Alien"]
+TAGS = ["720p.HDTV.x264-KILLERS", "1080p.WEB-DL.DD5.1.H264-NTb", "1080p.BluRay.x264-ROVERS", "2160p.WEB.H265-GGEZ",
+        "1080p.AMZN.WEB-DL.DDP5.1.H.264-NTb", "WEBRip.x264-ION10", "720p.WEB.h264-TBS", "DVDRip.XviD-SAiNTS", "1080p.BluRay.DTS.5.1.x264-CtrlHD"]
+PATTERNS = ["{show}.S{s:02d}E{e:02d}.{title}.{tags}", "{show}.S{s:02d}E{e:02d}.{tags}", "{show} - {s}x{e:02d} - {title} [{tags}]",
+            "{show}_S{s:02d}E{e:02d}_{tags}", "{show} Season {s} Episode {e} {title}", "[Group] {show} - S{s:02d}E{e:02d} ({tags})", "S{s:02d}E{e:02d}.{title}.{tags}"]
+
+
+def generate_names(count):
+    """ Scene-style names with repeats, as in a real library (episodes share shows, re-index sees the same names). """
+    random.seed(45); names = []
+    for _ in range(count):
+        ext = random.choice(VIDEO_EXTENSIONS)
+        if random.random() < 0.15:
+            name = f"{random.choice(MOVIES)}.{random.randint(1979, 2024)}.{random.choice(TAGS)}"
+        else:
+            show = random.choice(SHOWS); separator = random.choice(['.', ' ', '.'])
+            name = random.choice(PATTERNS).format(show=show.replace(' ', separator), s=random.randint(1, 8), e=random.randint(1, 24),
+                                                  title=random.choice(EPISODE_TITLES).replace(' ', separator), tags=random.choice(TAGS))
+        names.append(name.replace('..', '.').strip('. ') + ext)
+    return names
+
+
+def load_corpus(path):
+    """ Returns (names, expected) where expected is a list of (title, season, episode), or None for an unlabelled corpus. """
+    if os.path.isdir(path):
+        return [name for _, _, files in os.walk(path) for name in files if name.lower().endswith(VIDEO_EXTENSIONS)], None
+    with open(path, encoding='utf-8', errors='replace') as f: lines = [line.rstrip('\n') for line in f if line.strip() and not line.startswith('#')]
+    if not path.endswith('.tsv'): return [line.strip() for line in lines], None
+    names = []; expected = []
+    for line in lines:
+        name, title, season, episode = (line.split('\t') + ['', '', ''])[:4]
+        names.append(name); expected.append((title, int(season) if season else None, int(episode) if episode else None))
+    return names, expected
+
+
+def title_key(title):
+    return show_key(SEPARATORS_REGEX.sub(' ', title))
+
+
+def has_release_tag(title):
+    """ Whether a parsed title still carries a release tag ('x264', 'BluRay', '1080p', ...). """
+    return any(RELEASE_TAG_REGEX.finditer(title.replace(' ', '.')))
+
+
+def disagreement(legacy, new):
+    """ Why the parsers disagree on season/episode (None if they agree). """
+    if legacy[1:] == tuple(new[1:]): return None
+    if legacy[1] is None: return "only release_parser found a marker" # 'Season 1 Episode 2', a marker at the start of the name
+    if new[1] is None: return "only legacy found a marker" # 'DTS.5.1.x264' read as S01E264
+    return "different numbers" # Both of the above in one name
+
+
+def legacy_parse(filename):
+    """ The previous MoviePlayerApp._parse_video_filename, unmemoized. """
+    base_query = os.path.splitext(filename)[0]; season = None; episode = None
+    test_name = filename.replace('.', ' ').replace('_', ' ')
+    match = LEGACY_SEASON_EPISODE_REGEX.search(test_name)
+    if match:
+        groups = match.groups()
+        if groups[0] is not None and groups[1] is not None: season = int(groups[0]); episode = int(groups[1])
+        elif groups[2] is not None and groups[3] is not None: season = int(groups[2]); episode = int(groups[3])
+        if season is not None and episode is not None:
+             pattern_str = match.group(0).strip('._ -'); cleaned_query = base_query.replace(pattern_str, '', 1).strip('._ -')
+             cleaned_query = LEGACY_CLEAN_QUERY_REGEX.sub('', cleaned_query).strip('._ -'); cleaned_query = re.sub(r'[._\-]+', ' ', cleaned_query).strip()
+             return cleaned_query, season, episode
+    cleaned_query = LEGACY_CLEAN_QUERY_REGEX.sub('', base_query).strip('._ -'); cleaned_query = re.sub(r'[._\-]+', ' ', cleaned_query).strip()
+    return cleaned_query, None, None
+
+
+def measure(func, names, repeat):
+    """ Best of `repeat` passes over the corpus. Returns (seconds, results of the last pass). """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter(); results = [func(name) for name in names]; elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, results
+
+
+def cold_parse(names, repeat):
+    best = None
+    for _ in range(repeat):
+        parse_release_name.cache_clear()
+        start = time.perf_counter(); results = [parse_release_name(name) for name in names]; elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('corpus', nargs='?', default=DEFAULT_CORPUS, help="Labelled .tsv, text file of release names or a library directory (default: release_names.tsv)")
+    parser.add_argument('--synthetic', type=int, metavar='N', help="Time N generated scene-style names instead of a corpus")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    names, expected = (generate_names(args.synthetic), None) if args.synthetic else load_corpus(args.corpus)
+    print(f"Corpus: {'synthetic' if args.synthetic else args.corpus}, {len(names)} names, {len(set(names))} distinct; parse cache holds {PARSE_CACHE_SIZE}")
+    legacy_time, legacy_results = measure(legacy_parse, names, args.repeat)
+    cold_time, results = cold_parse(names, args.repeat)
+    warm_time, _ = measure(parse_release_name, names, args.repeat) # Cache already filled by the cold pass
+    print(f"{'parser':<24}{'time (s)':>10}{'names/s':>12}{'shows':>8}{'tagged':>8}")
+    for label, elapsed, parsed in (("legacy regex", legacy_time, legacy_results), ("release_parser (cold)", cold_time, results), ("release_parser (warm)", warm_time, results)):
+        shows = len({show_key(title) for title, season, _ in parsed if season is not None})
+        tagged = sum(1 for title, _, _ in parsed if has_release_tag(title))
+        print(f"{label:<24}{elapsed:>10.3f}{len(names) / elapsed:>12.0f}{shows:>8}{tagged:>8}")
+    episodes = sum(1 for info in results if info.season is not None)
+    print(f"Episodes: {episodes}, movies/other: {len(names) - episodes}")
+    # The legacy parser kept the episode title and release tags in the show title, so every distinct
+    # 'Show.SxxEyy.Episode.Title.tags' name became a show of its own; that is where its show count comes from.
+    # Names like 'S01E02.Pilot.mkv' count as one show with an empty title here; in the library they take the folder's.
+    reasons = {}
+    for name, legacy, new in zip(names, legacy_results, results):
+        reason = disagreement(legacy, new)
+        if reason: reasons.setdefault(reason, []).append((name, legacy, new))
+    print(f"Season/episode differ from legacy for {sum(len(cases) for cases in reasons.values())} names:")
+    for reason, cases in sorted(reasons.items(), key=lambda item: -len(item[1])):
+        print(f"  {len(cases):>6}  {reason}, e.g. {cases[0][0]!r}: legacy {cases[0][1][1:]}, release_parser {tuple(cases[0][2][1:])}")
+    if expected is None: return
+    for label, parsed in (("legacy regex", legacy_results), ("release_parser", results)):
+        titles = sum(1 for got, want in zip(parsed, expected) if title_key(got[0]) == title_key(want[0]))
+        markers = sum(1 for got, want in zip(parsed, expected) if tuple(got[1:]) == want[1:])
+        print(f"{label:<24}titles {titles}/{len(names)} as expected, season/episode {markers}/{len(names)}")
+    wrong = [(name, tuple(got), want) for name, got, want in zip(names, results, expected) if title_key(got[0]) != title_key(want[0]) or tuple(got[1:]) != want[1:]]
+    for name, got, want in wrong: print(f"  MISMATCH {name!r}: got {got}, expected {want}")
+    if wrong: sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
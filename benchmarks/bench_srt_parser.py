@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark: streaming SRT parser vs. the previous pysrt/regex parsing path.
+Reports parse time and peak Python memory (tracemalloc) per parser over a corpus
+of SRT files. Without a corpus directory, a synthetic corpus of large UTF-8 and
+windows-1250 files is generated in a temp directory.
+
+Usage: python benchmarks/bench_srt_parser.py [CORPUS_DIR] [--cues N] [--files N]
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from source.srt_parser import parse_srt, format_timestamp
+
+try:
+    import pysrt
+    import chardet
+except ImportError:
+    pysrt = None
+
+LEGACY_SRT_REGEX = re.compile(r"(\d+)\s*?\r?\n(\d{2}:\d{2}:\d{2},\d{3}) --> (\d{2}:\d{2}:\d{2},\d{3})\s*?\r?\n(.*?)(?=\r?\n\r?\n\d+|\Z)", re.DOTALL | re.MULTILINE)
+WORDS = "the a you I to what is it no not that know we this in my of do have are was me here go right ok zażółć gęślą jaźń".split()
+
+
+def generate_corpus(directory, files, cues):
+    random.seed(1234); paths = []
+    for n in range(files):
+        encoding = 'utf-8' if n % 2 == 0 else 'cp1250'
+        blocks = []; t = 1000
+        for i in range(cues):
+            lines = [" ".join(random.choices(WORDS, k=random.randint(2, 9))) for _ in range(random.randint(1, 2))]
+            if i % 7 == 0: lines[0] = f"<i>{lines[0]}</i>"
+            blocks.append(f"{i + 1}\n{format_timestamp(t)} --> {format_timestamp(t + 2000)}\n" + "\n".join(lines) + "\n")
+            t += random.randint(2100, 5000)
+        path = os.path.join(directory, f"corpus_{n:02d}.{encoding}.srt")
+        with open(path, 'w', encoding=encoding, newline='\r\n') as f: f.write("\n".join(blocks))
+        paths.append(path)
+    return paths
+
+
+def legacy_pysrt(path):
+    with open(path, 'rb') as fp: raw = fp.read()
+    detected = chardet.detect(raw); encoding = detected.get('encoding') or 'utf-8'
+    subs = pysrt.open(path, encoding=encoding)
+    return [sub.text_without_tags for sub in subs]
+
+
+def legacy_regex(path):
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f: content = f.read()
+    return [text.strip().replace('\r', '') for _, _, _, text in LEGACY_SRT_REGEX.findall(content)]
+
+
+def streaming(path):
+    cues = parse_srt(path)
+    return cues.plain_texts()
+
+
+def measure(func, paths):
+    """ Times a clean run, then repeats it under tracemalloc (which distorts timings) for the peak. """
+    start = time.perf_counter(); total = 0
+    for path in paths: total += len(func(path))
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    for path in paths: func(path)
+    _, peak = tracemalloc.get_traced_memory(); tracemalloc.stop()
+    return elapsed, peak, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('corpus', nargs='?', help="Directory of .srt files (default: generate a synthetic corpus)")
+    parser.add_argument('--files', type=int, default=6); parser.add_argument('--cues', type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.corpus: paths = sorted(os.path.join(args.corpus, f) for f in os.listdir(args.corpus) if f.lower().endswith('.srt'))
+        else: paths = generate_corpus(tmp, args.files, args.cues)
+        size_mb = sum(os.path.getsize(p) for p in paths) / 1e6
+        print(f"Corpus: {len(paths)} files, {size_mb:.1f} MB")
+        candidates = [("streaming", streaming), ("legacy regex", legacy_regex)]
+        if pysrt: candidates.insert(1, ("legacy pysrt+chardet", legacy_pysrt))
+        else: print("pysrt/chardet not installed; skipping legacy pysrt path.")
+        print(f"{'parser':<24}{'time (s)':>10}{'cues':>10}{'peak MB':>10}")
+        for name, func in candidates:
+            elapsed, peak, total = measure(func, paths)
+            print(f"{name:<24}{elapsed:>10.2f}{total:>10}{peak / 1e6:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
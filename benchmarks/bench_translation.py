@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark: SubtitleTranslator against a local mock Gemini server.
+Translates a synthetic SRT with different numbers of batches in flight, with
+blocking and streaming batch responses, and reports time to the first committed
+cue, wall time, API requests (per cue) and 429 responses.
+
+Usage: python benchmarks/bench_translation.py [--cues 300] [--latency 0.5] [--concurrency 1 2 4 8] [--modes blocking streaming]
+                                              [--max-concurrent 0] [--drop-rate 0.0] [--truncate-rate 0.0]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from mock_gemini_server import MockGeminiState, start_server
+from source.srt_parser import format_timestamp, parse_srt
+from source.translation_manager import SubtitleTranslator
+from source.translation_backends import GeminiBackend
+from source.translation_memory import TranslationMemory
+
+
+def write_srt(path, cues):
+    blocks = [f"{i + 1}\n{format_timestamp(i * 3000)} --> {format_timestamp(i * 3000 + 2500)}\nLine number {i} of the test film.\n" for i in range(cues)]
+    with open(path, 'w', encoding='utf-8') as f: f.write("\n".join(blocks))
+
+
+def run_once(state, base_url, srt_path, concurrency, streaming):
+    translator = SubtitleTranslator(GeminiBackend(api_key="mock", base_url=base_url, streaming=streaming))
+    # Fresh, throwaway translation memory so every run measures API traffic
+    translator.translation_memory = TranslationMemory(os.path.join(os.path.dirname(srt_path), f"tm-{time.monotonic_ns()}.sqlite3"))
+    translator.max_concurrent_batches = concurrency
+    outcome = {}; progress = []
+    translator.translation_complete.connect(lambda src, dst: outcome.update(path=dst))
+    translator.translation_error.connect(lambda src, err: outcome.update(error=err))
+    translator.translation_progress.connect(lambda path, done, total: progress.append((done, total, time.perf_counter())))
+    requests_before, limited_before = state.requests, state.rate_limited
+    start = time.perf_counter(); translator._run_translation(srt_path); elapsed = time.perf_counter() - start
+    if 'error' in outcome: raise RuntimeError(outcome['error'])
+    translated = parse_srt(outcome['path'])
+    assert all(text.startswith("[PL] Line number") for text in translated.texts), "order/content check failed"
+    assert progress and progress[-1][0] == progress[-1][1], "progress did not reach 100%"
+    return progress[0][2] - start, elapsed, state.requests - requests_before, state.rate_limited - limited_before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cues', type=int, default=300); parser.add_argument('--latency', type=float, default=0.5)
+    parser.add_argument('--jitter', type=float, default=0.1); parser.add_argument('--max-concurrent', type=int, default=0)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--modes', nargs='+', default=['blocking', 'streaming'], choices=['blocking', 'streaming'])
+    parser.add_argument('--drop-rate', type=float, default=0.0, help="Fraction of JSON records the mock drops from each response")
+    parser.add_argument('--truncate-rate', type=float, default=0.0, help="Fraction of streamed responses the mock cuts off halfway")
+    args = parser.parse_args()
+    state = MockGeminiState(args.latency, args.jitter, args.max_concurrent, drop_rate=args.drop_rate, truncate_rate=args.truncate_rate)
+    server, base_url = start_server(state)
+    with tempfile.TemporaryDirectory() as tmp:
+        srt_path = os.path.join(tmp, "bench.en.srt"); write_srt(srt_path, args.cues)
+        print(f"{args.cues} cues, mock latency {args.latency}s, server 429 above {args.max_concurrent or 'unlimited'} concurrent, drop rate {args.drop_rate}")
+        print(f"{'mode':>10}{'in flight':>10}{'1st cue (s)':>12}{'time (s)':>10}{'requests':>10}{'calls/cue':>10}{'429s':>8}{'cues/s':>10}")
+        for mode in args.modes:
+            for concurrency in args.concurrency:
+                first_cue, elapsed, requests_made, limited = run_once(state, base_url, srt_path, concurrency, mode == 'streaming')
+                print(f"{mode:>10}{concurrency:>10}{first_cue:>12.2f}{elapsed:>10.2f}{requests_made:>10}{requests_made / args.cues:>10.3f}{limited:>8}{args.cues / elapsed:>10.1f}")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Local mock of the Gemini generateContent endpoint (and of OpenAI-compatible
+/chat/completions, under any prefix) for translation benchmarks.
+"Translates" each prompt entry by prefixing it with the target marker ("[PL] ",
+one key per requested language code in JSON mode), after a configurable latency. Optionally answers 429 when more than --max-concurrent
+requests are in flight, to exercise client backpressure, and drops a fraction
+of JSON records (--drop-rate) to exercise partial-response handling.
+streamGenerateContent (?alt=sse) sends the answer in STREAM_CHUNKS events spread
+over the latency, like a model generating tokens; --truncate-rate cuts that
+fraction of streams off halfway.
+
+Usage: python benchmarks/mock_gemini_server.py [--port 8765] [--latency 2.0] [--jitter 0.5] [--max-concurrent 0] [--drop-rate 0.0] [--truncate-rate 0.0]
+Point the app at it with GEMINI_API_BASE_URL=http://127.0.0.1:8765/v1beta
+(or TRANSLATION_BACKEND=openai OPENAI_API_BASE_URL=http://127.0.0.1:8765/v1)
+"""
+
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ENTRY_BLOCK_REGEX = re.compile(r">>>\n(.*?)\n>>>", re.DOTALL)
+TARGET_KEYS_REGEX = re.compile(r"target language code (\[[^\]]*\])")
+STREAM_CHUNKS = 8
+STREAM_FIRST_CHUNK_SHARE = 0.2 # Share of the latency before the first event (prompt processing)
+
+
+class MockGeminiState:
+    def __init__(self, latency=2.0, jitter=0.0, max_concurrent=0, retry_after=1, drop_rate=0.0, truncate_rate=0.0):
+        self.latency = latency; self.jitter = jitter; self.max_concurrent = max_concurrent; self.retry_after = retry_after
+        self.drop_rate = drop_rate; self.truncate_rate = truncate_rate
+        self.lock = threading.Lock(); self.in_flight = 0
+        self.requests = 0; self.rate_limited = 0
+
+    def translate(self, prompt, json_mode=False):
+        """ Echo-translates the entries found between the >>> markers of a prompt. """
+        match = ENTRY_BLOCK_REGEX.search(prompt)
+        body = match.group(1) if match else prompt
+        if json_mode or body.lstrip().startswith('['):
+            keys_match = TARGET_KEYS_REGEX.search(prompt); target_keys = json.loads(keys_match.group(1)) if keys_match else ["text"]
+            records = [{"id": r["id"], **{key: f"[{'PL' if key == 'text' else key.upper()}] {r['text']}" for key in target_keys}}
+                       for r in json.loads(body) if random.random() >= self.drop_rate]
+            return json.dumps(records, ensure_ascii=False)
+        if "|||" in body: return " ||| ".join(f"[PL] {entry.strip()}" for entry in body.split("|||"))
+        return f"[PL] {body.strip()}"
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args): pass
+
+        def _send_json(self, status, payload, headers=None):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status); self.send_header('Content-Type', 'application/json'); self.send_header('Content-Length', str(len(body)))
+            for key, value in (headers or {}).items(): self.send_header(key, value)
+            self.end_headers(); self.wfile.write(body)
+
+        def _send_stream(self, text, latency):
+            """ Server-sent events, one partial candidate per chunk; the connection close ends the stream. """
+            self.send_response(200); self.send_header('Content-Type', 'text/event-stream'); self.end_headers()
+            size = max(1, -(-len(text) // STREAM_CHUNKS)); chunks = [text[i:i + size] for i in range(0, len(text), size)]
+            if random.random() < state.truncate_rate: chunks = chunks[:len(chunks) // 2]
+            time.sleep(latency * STREAM_FIRST_CHUNK_SHARE)
+            for chunk in chunks:
+                self.wfile.write(f"data: {json.dumps({'candidates': [{'content': {'parts': [{'text': chunk}]}}]})}\r\n\r\n".encode('utf-8')); self.wfile.flush()
+                time.sleep(latency * (1 - STREAM_FIRST_CHUNK_SHARE) / STREAM_CHUNKS)
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            with state.lock:
+                state.requests += 1
+                if state.max_concurrent and state.in_flight >= state.max_concurrent:
+                    state.rate_limited += 1; limited = True
+                else: state.in_flight += 1; limited = False
+            if limited:
+                self._send_json(429, {"error": {"code": 429, "message": "Resource exhausted"}}, {'Retry-After': str(state.retry_after)}); return
+            try:
+                latency = max(0.0, state.latency + random.uniform(-state.jitter, state.jitter))
+                if ':streamGenerateContent' in self.path:
+                    json_mode = request.get('generationConfig', {}).get('responseMimeType') == 'application/json'
+                    self._send_stream(state.translate(request['contents'][0]['parts'][0]['text'], json_mode), latency); return
+                time.sleep(latency)
+                if self.path.endswith('/chat/completions'):
+                    text = state.translate(request['messages'][-1]['content'])
+                    self._send_json(200, {"choices": [{"index": 0, "message": {"role": "assistant", "content": text}}]}); return
+                prompt = request['contents'][0]['parts'][0]['text']
+                json_mode = request.get('generationConfig', {}).get('responseMimeType') == 'application/json'
+                self._send_json(200, {"candidates": [{"content": {"parts": [{"text": state.translate(prompt, json_mode)}]}}]})
+            finally:
+                with state.lock: state.in_flight -= 1
+    return Handler
+
+
+def start_server(state, host='127.0.0.1', port=0):
+    """ Starts the mock server in a daemon thread. Returns (server, base_url). """
+    server = ThreadingHTTPServer((host, port), make_handler(state)); server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1beta"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8765); parser.add_argument('--latency', type=float, default=2.0)
+    parser.add_argument('--jitter', type=float, default=0.5); parser.add_argument('--max-concurrent', type=int, default=0)
+    parser.add_argument('--drop-rate', type=float, default=0.0); parser.add_argument('--truncate-rate', type=float, default=0.0)
+    args = parser.parse_args()
+    state = MockGeminiState(args.latency, args.jitter, args.max_concurrent, drop_rate=args.drop_rate, truncate_rate=args.truncate_rate)
+    server, base_url = start_server(state, port=args.port)
+    print(f"Mock Gemini listening on {base_url} (latency {args.latency}s +/- {args.jitter}s)")
+    try:
+        while True: time.sleep(3600)
+    except KeyboardInterrupt: server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
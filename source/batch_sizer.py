@@ -0,0 +1,74 @@
+# --- START OF FILE source/batch_sizer.py ---
+
+"""
+Adaptive, token-budgeted batch sizing for subtitle translation.
+Batches are filled up to an estimated input-token budget instead of a fixed
+entry count. The budget adapts at runtime to observed latency, missing-record
+rate and 429 responses (within bounds) and is persisted per model.
+"""
+
+import time
+import threading
+
+from source.storage import config_path, load_json, save_json
+
+# --- Configuration ---
+TOKEN_BUDGET_DEFAULT = 600 # Estimated input tokens per batch for a model with no history
+TOKEN_BUDGET_MIN = 120
+TOKEN_BUDGET_MAX = 4000
+MAX_ENTRIES_PER_BATCH = 80 # Hard cap, keeps id bookkeeping and retries cheap
+ENTRY_OVERHEAD_TOKENS = 10 # JSON record framing: {"id": n, "text": "..."}
+CHARS_PER_TOKEN = 4 # Rough estimate for Latin-script subtitles
+TARGET_BATCH_LATENCY = 8.0 # Seconds; slower batches shrink the budget
+GROW_FACTOR = 1.25
+SHRINK_FACTOR = 0.7
+MISSING_RATE_THRESHOLD = 0.1 # Fraction of ids missing from the first response that counts as a bad batch
+TUNING_FILENAME = "batch_tuning.json"
+# --- End Configuration ---
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + ENTRY_OVERHEAD_TOKENS
+
+
+class BatchSizer:
+    """ Thread-safe holder of the current token budget for one model. """
+
+    def __init__(self, model, tuning_path=None):
+        self.model = model; self.tuning_path = tuning_path or config_path(TUNING_FILENAME)
+        self.lock = threading.Lock()
+        saved = (load_json(self.tuning_path, default={}) or {}).get(model, {})
+        self.token_budget = self._clamp(saved.get('token_budget', TOKEN_BUDGET_DEFAULT))
+
+    @staticmethod
+    def _clamp(budget):
+        return max(TOKEN_BUDGET_MIN, min(TOKEN_BUDGET_MAX, float(budget)))
+
+    def take_batch(self, texts, start):
+        """ Returns the end index of the next batch starting at start (always at least one entry). """
+        with self.lock: budget = self.token_budget
+        end = start; used = 0
+        while end < len(texts) and end - start < MAX_ENTRIES_PER_BATCH:
+            cost = estimate_tokens(texts[end])
+            if end > start and used + cost > budget: break
+            used += cost; end += 1
+        return end
+
+    def record_result(self, latency, requested, missing, rate_limited):
+        """ Adapts the budget after a batch's first round trip. """
+        with self.lock:
+            old_budget = self.token_budget
+            if rate_limited or (requested and missing / requested > MISSING_RATE_THRESHOLD): self.token_budget *= SHRINK_FACTOR
+            elif latency > TARGET_BATCH_LATENCY: self.token_budget *= max(SHRINK_FACTOR, TARGET_BATCH_LATENCY / latency)
+            elif not missing and latency < TARGET_BATCH_LATENCY * 0.6: self.token_budget *= GROW_FACTOR
+            self.token_budget = self._clamp(self.token_budget)
+            if int(old_budget) != int(self.token_budget): print(f"    Batch token budget {old_budget:.0f} -> {self.token_budget:.0f} (latency {latency:.1f}s, missing {missing}/{requested}, 429: {rate_limited})") # Debug print
+
+    def save(self):
+        """ Persists the tuned budget for this model. """
+        with self.lock: budget = self.token_budget
+        tuning = load_json(self.tuning_path, default={}) or {}
+        tuning[self.model] = {'token_budget': round(budget, 1), 'updated_at': time.time()}
+        save_json(self.tuning_path, tuning)
+
+# --- END OF FILE source/batch_sizer.py ---
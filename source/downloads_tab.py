@@ -12,7 +12,7 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
                            QLineEdit, QTableWidget, QTableWidgetItem, QLabel,
                            QProgressBar, QHeaderView, QMessageBox, QComboBox,
                            QTabWidget, QSplitter, QFileDialog, QAbstractItemView)
-from PyQt5.QtCore import Qt, pyqtSlot, QTimer
+from PyQt5.QtCore import Qt, pyqtSlot, pyqtSignal, QTimer
 from PyQt5.QtGui import QPixmap, QIcon
 import traceback # Added for better error printing if needed
 
@@ -22,6 +22,7 @@ class DownloadsTab(QWidget):
     """
     Tab for searching, downloading, and managing torrents.
     """
+    download_finished = pyqtSignal(str) # Path of the finished download's file or folder
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -344,6 +345,8 @@ class DownloadsTab(QWidget):
     @pyqtSlot(dict)
     def on_torrent_completed(self, torrent):
         """Handle torrent download completion"""
+        download_path = os.path.join(self.download_dir, torrent['title']) # The torrent's name is its top-level file or folder
+        self.download_finished.emit(download_path)
         # Use tr() for message box
         QMessageBox.information(
             self,
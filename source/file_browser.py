@@ -3,15 +3,53 @@
 """
 File browser module for the Raspberry Pi Movie Player App.
 Provides functionality for browsing and managing video files recursively.
+The file list comes from a persistent LibraryIndex: startup shows the indexed
+list at once and refreshes only re-list directories that changed. Refreshes run
+on a LibraryScanner worker thread and stream into the list in chunks. Between
+refreshes a LibraryWatcher (inotify) applies changes on disk as they happen.
+The list is a QListView over a LibraryListModel (lazy fetchMore), filtered by a
+search box through the model's title search index. "Group by show" swaps in a
+QTreeView over a LibraryTreeModel (Show -> Season -> Episode, built on expand).
+A MediaProber fills in runtime, resolution and hardware-decode support per file,
+and a Thumbnailer supplies poster frames for the rows the view actually paints.
 """
 
 import os
+from collections import OrderedDict
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout,
-                           QPushButton, QListWidget, QListWidgetItem, QLabel,
-                           QFileDialog, QMessageBox, QApplication)
-from PyQt5.QtCore import Qt, pyqtSignal
+                           QPushButton, QListView, QTreeView, QLabel, QLineEdit, QCheckBox,
+                           QFileDialog, QMessageBox, QAbstractItemView, QProgressBar)
+from PyQt5.QtCore import Qt, pyqtSignal, pyqtSlot, QSize
+from PyQt5.QtGui import QIcon, QPixmap
 import traceback
 
+from source.subtitle_extractor import EmbeddedSubtitleExtractor
+from source.library_index import LibraryIndex, sidecar_bases
+from source.library_scanner import LibraryScanner
+from source.library_watcher import LibraryWatcher
+from source.library_model import LibraryListModel, LibraryTreeModel
+from source.media_prober import MediaProber, needs_software_decode, format_runtime
+from source.thumbnailer import Thumbnailer
+from source.transcoder import TranscodeQueue
+
+# --- Configuration ---
+THUMBNAIL_ICON_SIZE = QSize(96, 54) # Poster size in the library list
+THUMBNAIL_MEMORY_ITEMS = 300 # Decoded posters kept in memory
+# --- End Configuration ---
+
+def find_associated_srt(video_full_path, lang_codes=None):
+    """ Returns the first existing sidecar SRT for a video (given language codes, or the generic English/plain ones). """
+    directory, video_name = os.path.split(video_full_path)
+    search_patterns = []
+    if isinstance(lang_codes, str): lang_codes = [lang_codes]
+    for base in (os.path.join(directory, name) for name in sidecar_bases(video_name)): # A converted video also uses its source's subtitles
+        if lang_codes:
+            for code in lang_codes: search_patterns.append(f"{base}.{code}.srt")
+        else: search_patterns.extend([f"{base}.en.srt", f"{base}.eng.srt", f"{base}.srt"])
+    for srt_path in search_patterns:
+        if os.path.exists(srt_path): return srt_path
+    return None
+
 class FileBrowser(QWidget):
     """
     A file browser component for managing video files in a directory and its subdirectories.
@@ -54,10 +92,32 @@ class FileBrowser(QWidget):
         self.path_label = QLabel(f"{self.tr('Scanning')}: {self._shorten_path(self.current_directory)}")
         self.path_label.setToolTip(f"{self.tr('Base Directory')}: {self.current_directory}")
         dir_layout.addWidget(self.dir_button); dir_layout.addWidget(self.path_label, 1)
-
-        self.file_list = QListWidget(); self.file_list.itemDoubleClicked.connect(self.on_file_double_clicked)
-        self.file_list.currentItemChanged.connect(self.on_selection_changed)
-        self.file_list.setAlternatingRowColors(True); self.file_list.setSortingEnabled(True)
+        self.scan_progress_bar = QProgressBar(); self.scan_progress_bar.setRange(0, 0); self.scan_progress_bar.setMaximumWidth(120) # Busy indicator: total is unknown
+        self.scan_status_label = QLabel(); self.cancel_scan_button = QPushButton(self.tr("Cancel Scan"))
+        dir_layout.addWidget(self.scan_progress_bar); dir_layout.addWidget(self.scan_status_label); dir_layout.addWidget(self.cancel_scan_button)
+
+        self.search_edit = QLineEdit(); self.search_edit.setPlaceholderText(self.tr("Search library...")); self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self.on_search_text_changed)
+        self.group_check = QCheckBox(self.tr("Group by show")); self.group_check.toggled.connect(self.on_group_toggled); self.grouped = False
+        search_layout = QHBoxLayout(); search_layout.addWidget(self.search_edit, 1); search_layout.addWidget(self.group_check)
+
+        self.thumbnailer = Thumbnailer(self); self.thumbnailer.poster_ready.connect(self.on_poster_ready)
+        self.thumbnail_icons = OrderedDict(); self.placeholder_icon = None
+        if self.thumbnailer.available: placeholder = QPixmap(THUMBNAIL_ICON_SIZE); placeholder.fill(Qt.transparent); self.placeholder_icon = QIcon(placeholder) # Keeps row heights uniform
+        decoration = self._thumbnail_icon if self.thumbnailer.available else None
+
+        self.file_model = LibraryListModel(self._display_text, self, decoration) # Sorted; rows are fetched lazily as the view scrolls
+        self.file_list = QListView(); self.file_list.setModel(self.file_model); self.file_list.setUniformItemSizes(True)
+        self.file_list.doubleClicked.connect(self.on_file_double_clicked)
+        self.file_list.selectionModel().currentChanged.connect(self.on_selection_changed)
+        self.file_list.setAlternatingRowColors(True); self.file_list.setIconSize(THUMBNAIL_ICON_SIZE)
+        self.file_list.setSelectionMode(QAbstractItemView.ExtendedSelection) # Several episodes can be queued for translation at once
+        self.tree_model = LibraryTreeModel(self.file_model, self._tree_display_text, self, decoration) # Follows the list model's entries and filter
+        self.file_tree = QTreeView(); self.file_tree.setModel(self.tree_model); self.file_tree.setHeaderHidden(True); self.file_tree.setIconSize(THUMBNAIL_ICON_SIZE)
+        self.file_tree.doubleClicked.connect(self.on_file_double_clicked)
+        self.file_tree.selectionModel().currentChanged.connect(self.on_selection_changed)
+        self.file_tree.setSelectionMode(QAbstractItemView.ExtendedSelection); self.file_tree.hide()
+        self.empty_label = QLabel(); self.empty_label.setAlignment(Qt.AlignCenter); self.empty_label.hide()
 
         button_layout = QHBoxLayout()
         self.refresh_button = QPushButton(self.tr("Refresh"))
@@ -73,7 +133,7 @@ class FileBrowser(QWidget):
         button_layout.addWidget(self.find_subs_button); button_layout.addWidget(self.translate_subs_button)
         button_layout.addStretch(); button_layout.addWidget(self.delete_button)
 
-        self.layout.addLayout(dir_layout); self.layout.addWidget(self.file_list); self.layout.addLayout(button_layout)
+        self.layout.addLayout(dir_layout); self.layout.addLayout(search_layout); self.layout.addWidget(self.file_list); self.layout.addWidget(self.file_tree); self.layout.addWidget(self.empty_label); self.layout.addLayout(button_layout)
         self.setLayout(self.layout)
         # --- End UI Layout ---
 
@@ -84,7 +144,26 @@ class FileBrowser(QWidget):
         self.translate_subs_button.clicked.connect(self.translate_selected_subtitle)
         self.delete_button.clicked.connect(self.delete_selected)
 
-        self.refresh_files()
+        self.subtitle_extractor = EmbeddedSubtitleExtractor(self)
+        self.subtitle_extractor.extraction_finished.connect(self.on_embedded_subtitles_extracted)
+
+        self.library_index = LibraryIndex()
+        self.media_prober = MediaProber(self.library_index, self); self.media_prober.media_probed.connect(self.on_media_probed)
+        self.library_scanner = LibraryScanner(self.library_index, self)
+        self.transcoder = TranscodeQueue(self); self.transcode_progress = {} # video_path -> percent of a running conversion
+        self.transcoder.job_progress.connect(self.on_transcode_progress); self.transcoder.job_finished.connect(self.on_transcode_finished); self.transcoder.job_failed.connect(self.on_transcode_failed)
+        self.library_scanner.files_found.connect(self.on_scan_files_found); self.library_scanner.scan_progress.connect(self.on_scan_progress)
+        self.library_scanner.scan_finished.connect(self.on_scan_finished); self.library_scanner.scan_error.connect(self.on_scan_error)
+        self.library_scanner.directories_refreshed.connect(self.on_directories_refreshed)
+        self.cancel_scan_button.clicked.connect(self.library_scanner.cancel)
+        self.scan_id = None; self.scan_seen = set(); self.scan_extract = []; self.scan_selection_path = None
+        self.library_watcher = LibraryWatcher(self.video_extensions, self)
+        self.library_watcher.directories_changed.connect(self.on_library_changed)
+        self.deferred_changes = set() # Reported while a full scan was running
+        self._set_scanning(False)
+
+        # Show the last indexed list immediately, then reconcile it with the disk in the background
+        self.load_from_index(); self.refresh_files()
 
     def _shorten_path(self, path, max_len=60):
         if len(path) <= max_len: return path; parts = path.split(os.sep);
@@ -94,94 +173,263 @@ class FileBrowser(QWidget):
     def select_directory(self):
         dir_path = QFileDialog.getExistingDirectory(self, self.tr("Select Base Directory to Scan"), self.current_directory)
         if dir_path and dir_path != self.current_directory:
-            self.current_directory = dir_path
+            self.current_directory = dir_path; self.media_prober.cancel_pending()
             self.path_label.setText(f"{self.tr('Scanning')}: {self._shorten_path(self.current_directory)}")
             self.path_label.setToolTip(f"{self.tr('Base Directory')}: {self.current_directory}")
+            if not self.load_from_index(): self._populate_files([], None) # Entries of the previous directory must not linger during the scan
             self.refresh_files()
 
+    def _sub_marker(self, file_data):
+        if file_data.get('translated_srt'): return self.tr(" [Translated Sub]")
+        if file_data.get('source_srt'): return self.tr(" [Sub]")
+        return ""
+
+    def _media_marker(self, file_data):
+        """ '  (1:42:10, 1080p)', plus a note when the Pi has to decode the video in software. """
+        media = file_data.get('media')
+        if not media or media.get('error'): return ""
+        parts = []
+        if media.get('duration'): parts.append(format_runtime(media['duration']))
+        if media.get('height'): parts.append(f"{media['height']}p")
+        if needs_software_decode(media):
+            codec = media['video_codec'] if (media.get('bit_depth') or 8) <= 8 else f"{media['video_codec']} {media['bit_depth']}-bit"
+            parts.append(self.tr("{0}: no HW decode").format(codec))
+        return f"  ({', '.join(parts)})" if parts else ""
+
+    def _transcode_marker(self, file_data):
+        percent = self.transcode_progress.get(file_data['video_path'])
+        return self.tr(" [Converting for Pi {0}%]").format(percent) if percent is not None else ""
+
+    def _thumbnail_icon(self, file_data):
+        """ Poster of a row being painted. Missing posters are queued here, so only rows scrolled into view are generated. """
+        key = (file_data['video_path'], file_data['size'], file_data['mtime']); icon = self.thumbnail_icons.get(key)
+        if icon is not None: self.thumbnail_icons.move_to_end(key); return icon
+        path = self.thumbnailer.poster(*key, (file_data.get('media') or {}).get('duration'))
+        pixmap = QPixmap(path) if path else QPixmap()
+        if pixmap.isNull(): return self.placeholder_icon
+        icon = self.thumbnail_icons[key] = QIcon(pixmap.scaled(THUMBNAIL_ICON_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+        while len(self.thumbnail_icons) > THUMBNAIL_MEMORY_ITEMS: self.thumbnail_icons.popitem(last=False)
+        return icon
+
+    def load_from_index(self):
+        """ Fills the list from the library index only (no disk access). Returns False if nothing is indexed for the directory. """
+        try: files_data = self.library_index.load(self.current_directory)
+        except Exception as e: print(f"Library index error: {e}"); return False
+        if not files_data: return False
+        print(f"Loaded {len(files_data)} video files from the library index.")
+        self._populate_files(files_data, self.get_selected_file_path()); return True
+
     def refresh_files(self):
-        def find_associated_srt(video_full_path, lang_codes=None):
-            base, _ = os.path.splitext(video_full_path)
-            search_patterns = []
-            if lang_codes:
-                if isinstance(lang_codes, str): lang_codes = [lang_codes]
-                for code in lang_codes: search_patterns.append(f"{base}.{code}.srt")
-            else: search_patterns.extend([f"{base}.en.srt", f"{base}.eng.srt", f"{base}.srt"])
-            for srt_path in search_patterns:
-                if os.path.exists(srt_path): return srt_path
-            return None
-
-        current_selection_path = self.get_selected_file_path()
-        self.file_list.clear()
-        self.play_button.setEnabled(False); self.find_subs_button.setEnabled(False)
-        self.translate_subs_button.setEnabled(False); self.delete_button.setEnabled(False)
-        QApplication.processEvents()
+        """ Starts a background scan (replacing a running one); items are updated in place as chunks arrive. """
         print(f"Refreshing file list for: {self.current_directory}")
-        if not os.path.isdir(self.current_directory): QMessageBox.warning(self, self.tr("Directory Not Found"), self.tr("Base directory not found.")); return
-
-        found_files = []
-        try:
-            for dirpath, dirnames, filenames in os.walk(self.current_directory, topdown=True):
-                for filename in filenames:
-                    if self.is_video_file(filename):
-                        full_path = os.path.join(dirpath, filename)
-                        try:
-                            if os.path.isfile(full_path):
-                                display_path = os.path.relpath(full_path, self.current_directory)
-                                source_srt_path = find_associated_srt(full_path, lang_codes=None) # Find any source
-                                translated_srt_path = find_associated_srt(full_path, lang_codes=['pl']) # Find specific target
-                                sub_marker = ""
-                                if translated_srt_path: sub_marker = self.tr(" [Translated Sub]")
-                                elif source_srt_path: sub_marker = self.tr(" [Sub]")
-                                display_text = f"{display_path}{sub_marker}"
-                                # Store necessary data for later checks
-                                file_data = {'video_path': full_path, 'source_srt': source_srt_path, 'translated_srt': translated_srt_path}
-                                found_files.append((display_text, file_data))
-                        except OSError as os_err: print(f"Skipping file OS error: {full_path} - {os_err}"); continue
-        except PermissionError as pe: print(f"Permission error: {pe}"); QMessageBox.warning(self, self.tr("Partial Scan Error"), self.tr("Permission error during scan."))
-        except Exception as e: print(f"Scan Error: {e}\n{traceback.format_exc()}"); QMessageBox.critical(self, self.tr("Scan Error"), self.tr("Scan failed: {0}").format(e)); return
-
-        found_files.sort()
-        restored_selection_item = None
-        if not found_files:
-             item = QListWidgetItem(self.tr("No video files found.")); item.setFlags(item.flags() & ~Qt.ItemIsSelectable); self.file_list.addItem(item)
+        if not os.path.isdir(self.current_directory):
+            self.library_scanner.cancel(); self.scan_id = None; self._set_scanning(False)
+            self._populate_files([], None)
+            QMessageBox.warning(self, self.tr("Directory Not Found"), self.tr("Base directory not found.")); return
+        self.scan_selection_path = self.get_selected_file_path(); self.scan_seen = set(); self.scan_extract = []
+        self.scan_id = self.library_scanner.start(self.current_directory, self.video_extensions) # Only changed directories are re-listed
+        self._set_scanning(True)
+
+    def _set_scanning(self, scanning, status=""):
+        self.scan_progress_bar.setVisible(scanning); self.cancel_scan_button.setVisible(scanning)
+        self.scan_status_label.setText(status); self.scan_status_label.setVisible(scanning or bool(status))
+
+    def _update_empty_label(self):
+        if self.file_model.visible_count(): self.empty_label.hide(); return
+        self.empty_label.setText(self.tr("No matches.") if self.file_model.total_count() else self.tr("No video files found.")); self.empty_label.show()
+
+    def _view(self):
+        return self.file_tree if self.grouped else self.file_list
+
+    def _select_path(self, video_path):
+        """ Makes video_path the current row (fetching rows, or building its show and season, up to it). Returns False if it is not visible. """
+        if not video_path: return False
+        if self.grouped: index = self.tree_model.index_of_path(video_path)
         else:
-             for display_text, file_data in found_files:
-                  item = QListWidgetItem(display_text); item.setData(Qt.UserRole, file_data); item.setToolTip(file_data['video_path']); self.file_list.addItem(item)
-                  if file_data['video_path'] == current_selection_path: restored_selection_item = item
+            row = self.file_model.row_of(video_path); index = self.file_model.index(row) if row is not None else None
+        if index is None or not index.isValid(): return False
+        self._view().setCurrentIndex(index); self._view().scrollTo(index); return True # scrollTo expands collapsed parents
+
+    def _select_first_if_none(self):
+        view = self._view()
+        if not view.currentIndex().isValid() and view.model().rowCount() > 0: view.setCurrentIndex(view.model().index(0, 0)); print("Selected first item.")
+
+    def _display_text(self, file_data):
+        return f"{os.path.relpath(file_data['video_path'], self.current_directory)}{self._sub_marker(file_data)}{self._media_marker(file_data)}{self._transcode_marker(file_data)}"
+
+    def _tree_display_text(self, file_data):
+        return f"{os.path.basename(file_data['video_path'])}{self._sub_marker(file_data)}{self._media_marker(file_data)}{self._transcode_marker(file_data)}" # Show and season are the parent nodes
+
+    @pyqtSlot(int, list)
+    def on_scan_files_found(self, scan_id, files_data):
+        """ Adds or updates the entries of one chunk; the model keeps them sorted. """
+        if scan_id != self.scan_id: return # Superseded scan
+        self.file_model.upsert(files_data)
+        for file_data in files_data:
+            video_path = file_data['video_path']; self.scan_seen.add(video_path)
+            if not file_data['source_srt'] and not file_data['translated_srt']: self.scan_extract.append(video_path)
+        if self.scan_selection_path in self.scan_seen and not self._view().currentIndex().isValid(): self._select_path(self.scan_selection_path)
+        self._update_empty_label()
+
+    @pyqtSlot(int, int, int)
+    def on_scan_progress(self, scan_id, directories, videos):
+        if scan_id != self.scan_id: return
+        self.scan_status_label.setText(self.tr("Scanning... {0} folders, {1} videos").format(directories, videos))
+
+    @pyqtSlot(int, bool)
+    def on_scan_finished(self, scan_id, cancelled):
+        if scan_id != self.scan_id: return
+        self.scan_id = None
+        if not cancelled: self.file_model.remove_paths(self.file_model.paths() - self.scan_seen) # Gone from disk; a cancelled scan leaves the rest as it was
+        print(f"Found {len(self.scan_seen)} video files{' (scan cancelled)' if cancelled else ''}.")
+        if not cancelled: self.library_watcher.watch([self.current_directory], self.library_index.directories(self.current_directory))
+        if self.deferred_changes: self.on_library_changed(sorted(self.deferred_changes)); self.deferred_changes = set()
+        self._set_scanning(False, self.tr("Scan cancelled.") if cancelled else "")
+        # Videos without sidecars may carry text subtitle tracks; extract them in the background
+        for video_path in self.scan_extract: self.subtitle_extractor.submit(video_path)
+        self.scan_extract = []; self.media_prober.submit(self.file_model.files_data()) # Only files without a result for their size/mtime
+        self._update_empty_label(); self._select_first_if_none()
+        self.on_selection_changed()
 
-        print(f"Found {len(found_files)} video files.")
+    @pyqtSlot(int, str)
+    def on_scan_error(self, scan_id, error_msg):
+        if scan_id != self.scan_id: return
+        self.scan_id = None; self._set_scanning(False)
+        QMessageBox.critical(self, self.tr("Scan Error"), self.tr("Scan failed: {0}").format(error_msg))
+
+    @pyqtSlot(list)
+    def on_library_changed(self, directories):
+        """ Directories changed on disk (watcher): re-read just those, or everything if events were lost. """
+        root = os.path.normpath(self.current_directory)
+        directories = [directory for directory in directories if directory == root or directory.startswith(root + os.sep)]
+        if not directories: return
+        if self.scan_id is not None: self.deferred_changes.update(directories); return # The running scan may already have passed them
+        if root in directories: self.refresh_files(); return
+        self.library_scanner.refresh_directories(directories, self.video_extensions)
+
+    @pyqtSlot(dict)
+    def on_directories_refreshed(self, result):
+        """ Replaces the entries below each refreshed directory with its new contents, leaving the rest of the list alone. """
+        if self.scan_id is not None: self.deferred_changes.update(result); return
+        root = os.path.normpath(self.current_directory); added = removed = 0
+        for directory, files_data in result.items():
+            if directory != root and not directory.startswith(root + os.sep): continue # Base directory changed meanwhile
+            prefix = directory + os.sep; old_paths = {path for path in self.file_model.paths() if path.startswith(prefix)}
+            new_paths = {file_data['video_path'] for file_data in files_data}
+            self.file_model.remove_paths(old_paths - new_paths); self.file_model.upsert(files_data)
+            removed += len(old_paths - new_paths); added += len(new_paths - old_paths)
+            for file_data in files_data: # New videos
+                if file_data['video_path'] not in old_paths and not file_data['source_srt'] and not file_data['translated_srt']: self.subtitle_extractor.submit(file_data['video_path'])
+            self.media_prober.submit(files_data)
+        print(f"Library updated live: {added} added, {removed} removed.")
+        self.library_watcher.watch([self.current_directory], self.library_index.directories(self.current_directory))
+        self._update_empty_label(); self._select_first_if_none()
+        self.on_selection_changed()
+
+    def on_group_toggled(self, checked):
+        """ Swaps the flat list and the show tree, keeping the selected video. """
+        selected_path = self.get_selected_file_path()
+        self.grouped = checked; self.file_list.setVisible(not checked); self.file_tree.setVisible(checked)
+        if not self._select_path(selected_path): self._select_first_if_none()
+        self.on_selection_changed()
 
-        if restored_selection_item: self.file_list.setCurrentItem(restored_selection_item); print(f"Restored selection: {restored_selection_item.text()}")
-        elif self.file_list.count() > 0: self.file_list.setCurrentRow(0); print("Selected first item.")
+    @pyqtSlot(str, dict)
+    def on_media_probed(self, video_path, media):
+        self.file_model.update(video_path, media=media)
+        self.transcoder.submit(video_path, media) # Only videos of finished downloads the Pi cannot decode in hardware
+
+    @pyqtSlot(str)
+    def on_download_finished(self, download_path):
+        """ Checks the videos of a finished download (which may lie outside the library) for conversion; unprobed ones are probed first. """
+        self.transcoder.add_download(download_path); to_probe = []
+        if os.path.isdir(download_path): candidates = [os.path.join(dirpath, name) for dirpath, _, names in os.walk(download_path) for name in names if self.is_video_file(name)]
+        else: candidates = [download_path] if self.is_video_file(os.path.basename(download_path)) else []
+        for video_path in candidates:
+            try: stat = os.stat(video_path)
+            except OSError: continue
+            media = self.library_index.media(video_path, stat.st_size, stat.st_mtime)
+            if media is None: to_probe.append({'video_path': video_path, 'size': stat.st_size, 'mtime': stat.st_mtime, 'media': None})
+            else: self.transcoder.submit(video_path, media)
+        self.media_prober.submit(to_probe) # Results come back through on_media_probed
+
+    @pyqtSlot(str, int)
+    def on_transcode_progress(self, video_path, percent):
+        self.transcode_progress[video_path] = percent; self.file_model.update(video_path) # Re-renders the row's text
+
+    @pyqtSlot(str, str, dict)
+    def on_transcode_finished(self, video_path, output_path, report):
+        """ The converted file is next to its source; re-list the directory so the entry swaps to it in one update. """
+        self.transcode_progress.pop(video_path, None); self.file_model.update(video_path)
+        self.on_library_changed([os.path.dirname(output_path)])
+        if self.scan_id is None:
+            speed = self.tr(", {0}x realtime").format(report['speed']) if report.get('speed') else ""
+            self._set_scanning(False, self.tr("Converted '{0}' for the Pi{1}.").format(os.path.basename(output_path), speed))
+
+    @pyqtSlot(str, str)
+    def on_transcode_failed(self, video_path, error_msg):
+        self.transcode_progress.pop(video_path, None); self.file_model.update(video_path)
+
+    @pyqtSlot(str, str)
+    def on_poster_ready(self, video_path, image_path):
+        self.file_model.refresh(video_path); self.tree_model.refresh(video_path)
+
+    def on_search_text_changed(self, text):
+        """ Filters on every keystroke; only the model's visible list changes. """
+        selected_path = self.get_selected_file_path()
+        self.file_model.set_filter(text)
+        if not self._select_path(selected_path): self._select_first_if_none()
+        self._update_empty_label(); self.on_selection_changed()
+
+    def _populate_files(self, files_data, current_selection_path):
+        """ Replaces the model contents with file_data dicts and restores the selection. """
+        self.file_model.reset(files_data, self.current_directory)
+        if self._select_path(current_selection_path): print(f"Restored selection: {current_selection_path}")
+        else: self._select_first_if_none()
+        self._update_empty_label()
         # Explicitly call on_selection_changed after potentially setting selection
         self.on_selection_changed()
 
 
+    @pyqtSlot(str, list)
+    def on_embedded_subtitles_extracted(self, video_path, srt_paths):
+        """ Updates the list entry of a video after its embedded subtitles were written out as sidecars. """
+        if not srt_paths: return
+        self.file_model.update(video_path, source_srt=find_associated_srt(video_path), translated_srt=find_associated_srt(video_path, lang_codes=['pl']))
+        if video_path == self.get_selected_file_path(): self.on_selection_changed()
+
     def is_video_file(self, filename):
         name, ext = os.path.splitext(filename);
         if not ext: return False
         if filename.startswith('.'): return False
         return ext.lower() in self.video_extensions
 
-    def on_file_double_clicked(self, item):
-        file_data = item.data(Qt.UserRole)
+    def on_file_double_clicked(self, index):
+        file_data = index.data(Qt.UserRole)
         if file_data and isinstance(file_data, dict) and os.path.isfile(file_data.get('video_path')): self.file_selected.emit(file_data['video_path'])
-        else: print(f"Invalid data for double-click: {item.text()}")
+        else: print(f"Invalid data for double-click: {index.data()}")
 
     def get_selected_file_data(self):
-        selected_items = self.file_list.selectedItems()
+        selected_rows = self._view().selectionModel().selectedRows()
         file_data = None
-        if selected_items: file_data = selected_items[0].data(Qt.UserRole)
+        if selected_rows: file_data = selected_rows[0].data(Qt.UserRole)
         if file_data and isinstance(file_data, dict): return file_data
         return None
 
+    def get_selected_files_data(self):
+        if self.grouped: # A selected show or season stands for all of its episodes
+            files_data = {}
+            for index in self.file_tree.selectionModel().selectedRows():
+                for file_data in self.tree_model.files_under(index): files_data.setdefault(file_data['video_path'], file_data)
+            return list(files_data.values())
+        selected_rows = sorted(self.file_list.selectionModel().selectedRows(), key=lambda index: index.row()) # Display order, not click order
+        return [data for data in (index.data(Qt.UserRole) for index in selected_rows) if isinstance(data, dict)]
+
     def get_selected_file_path(self):
         file_data = self.get_selected_file_data()
         if file_data and os.path.isfile(file_data.get('video_path')): return file_data.get('video_path')
         return None
 
-    # This slot is connected to currentItemChanged
+    # This slot is connected to the selection model's currentChanged
     def on_selection_changed(self, current=None, previous=None):
         """Update button states based on current selection."""
         file_data = self.get_selected_file_data()
@@ -190,7 +438,7 @@ class FileBrowser(QWidget):
         can_play = file_data is not None
         can_find_subs = file_data is not None
         # --- Change: Enable translate button simply if a video is selected ---
-        can_translate = file_data is not None
+        can_translate = file_data is not None or len(self.get_selected_files_data()) > 1 # Includes a selected season or show
         # --- End Change ---
         can_delete = file_data is not None
 
@@ -212,7 +460,16 @@ class FileBrowser(QWidget):
         else: QMessageBox.information(self, self.tr("No Selection"), self.tr("Please select video to find subtitles for."))
 
     def translate_selected_subtitle(self):
-        """Emit signal to translate the found source subtitle for the selected video."""
+        """Emit signal to translate the found source subtitle for the selected video(s)."""
+        selected = self.get_selected_files_data()
+        if len(selected) > 1:
+            # Several videos (e.g. a season): queue every one with a source subtitle, no per-file prompts
+            source_srt_paths = [data['source_srt'] for data in selected if data.get('source_srt') and os.path.exists(data['source_srt'])]
+            print(f"Requesting translation for {len(source_srt_paths)} of {len(selected)} selected videos.")
+            for source_srt_path in source_srt_paths: self.translate_subtitle_requested.emit(source_srt_path)
+            if len(source_srt_paths) < len(selected):
+                QMessageBox.information(self, self.tr("Select Source Subtitle"), self.tr("{0} of the selected videos have no English (.en.srt) or generic (.srt) subtitle and were skipped.").format(len(selected) - len(source_srt_paths)))
+            return
         file_data = self.get_selected_file_data()
         if file_data:
             source_srt_path = file_data.get('source_srt') # Get the automatically identified source srt path
@@ -251,8 +508,7 @@ class FileBrowser(QWidget):
         if not file_data: QMessageBox.information(self, self.tr("No Selection"), self.tr("Select video to delete.")); return
         file_path = file_data.get('video_path')
         if not file_path or not os.path.exists(file_path): QMessageBox.warning(self, self.tr("Error"), self.tr("Selected video file path is invalid.")); return
-        display_text = "selected file"; selected_items = self.file_list.selectedItems()
-        if selected_items: display_text = selected_items[0].text().replace(self.tr(" [Sub]"), "").replace(self.tr(" [Translated Sub]"), "")
+        display_text = os.path.relpath(file_path, self.current_directory)
         reply = QMessageBox.question(self, self.tr("Confirm Deletion"), self.tr("Delete '{0}'\n(and ALL .srt files with the same name)?").format(display_text), QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
             try:
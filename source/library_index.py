@@ -0,0 +1,214 @@
+# --- START OF FILE source/library_index.py ---
+
+"""
+Persistent library index for the Raspberry Pi Movie Player App.
+Keeps the video files under the library roots (size, mtime and the subtitle
+sidecars found next to each video) and every directory's mtime in SQLite.
+A refresh stats each known directory and re-lists only those whose mtime
+changed (a file was added, removed or renamed in it), so an unchanged
+multi-TB library is refreshed without reading any directory listing, and
+startup can show the last known list without touching the disk at all.
+Each video's release name is parsed (show title, season, episode) when it is
+indexed, so the library can be grouped by show without re-parsing. Media probe
+results (duration, codecs, resolution) are kept per (path, size, mtime) and
+attached to the entries as 'media', so a file is only probed again once it changes.
+A video converted by the transcoder is listed as its converted file only; the
+source stays on disk but is left out of the index, and its subtitles carry over.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+
+from source.storage import cache_path
+from source.release_parser import parse_release_path, PARSER_VERSION
+
+# --- Configuration ---
+INDEX_DB_FILENAME = "library_index.sqlite3"
+SOURCE_SRT_SUFFIXES = [".en.srt", ".eng.srt", ".srt"] # Same preference order as find_associated_srt
+TRANSLATED_SRT_SUFFIXES = [".pl.srt"]
+CONVERTED_SUFFIX = ".h264.mkv" # The transcoder's output next to its source
+RACY_MTIME_WINDOW = 2.0 # Seconds; a directory modified this recently is re-listed next time (FAT/exFAT mtimes have 2 s resolution)
+# --- End Configuration ---
+
+
+def converted_name(video_name):
+    """ File name of a video's conversion for hardware decoding. """
+    return os.path.splitext(video_name)[0] + CONVERTED_SUFFIX
+
+
+def sidecar_bases(video_name):
+    """ Base names whose .srt sidecars belong to a video, own first; a conversion also uses its source's. """
+    base = os.path.splitext(video_name)[0]
+    return [base, video_name[:-len(CONVERTED_SUFFIX)]] if video_name.lower().endswith(CONVERTED_SUFFIX) else [base]
+
+
+def find_sidecars(video_path, names):
+    """
+    Resolves the subtitle sidecars of a video from its directory listing (a set of file names),
+    without any filesystem calls. Returns (source_srt, translated_srt, all sidecar names).
+    """
+    directory, video_name = os.path.split(video_path); bases = sidecar_bases(video_name)
+    source_srt = next((os.path.join(directory, base + suffix) for base in bases for suffix in SOURCE_SRT_SUFFIXES if base + suffix in names), None)
+    translated_srt = next((os.path.join(directory, base + suffix) for base in bases for suffix in TRANSLATED_SRT_SUFFIXES if base + suffix in names), None)
+    sidecars = sorted(name for name in names if any(name.startswith(base + ".") for base in bases) and name.lower().endswith(".srt"))
+    return source_srt, translated_srt, sidecars
+
+
+def is_video_name(name, video_extensions):
+    """ Same rule as FileBrowser.is_video_file: a known extension and no hidden files. """
+    if name.startswith('.'): return False
+    ext = os.path.splitext(name)[1]
+    return bool(ext) and ext.lower() in video_extensions
+
+
+def _subtree_bounds(root):
+    """ (low, high) such that low <= path < high selects every path strictly below root. """
+    prefix = root.rstrip(os.sep) + os.sep
+    return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+
+class LibraryIndex:
+    """ Thread-safe SQLite index of directories and video files under the library roots. """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or cache_path(INDEX_DB_FILENAME)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""CREATE TABLE IF NOT EXISTS directories (
+                path TEXT PRIMARY KEY, mtime REAL, subdirs TEXT NOT NULL) WITHOUT ROWID""")
+            self.conn.execute("""CREATE TABLE IF NOT EXISTS videos (
+                path TEXT PRIMARY KEY, directory TEXT NOT NULL, size INTEGER NOT NULL, mtime REAL NOT NULL,
+                source_srt TEXT, translated_srt TEXT, sidecars TEXT NOT NULL, title TEXT, season INTEGER, episode INTEGER)""")
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(videos)")}
+            for column, column_type in (('title', 'TEXT'), ('season', 'INTEGER'), ('episode', 'INTEGER')): # Index from before release parsing; old rows are parsed on load
+                if column not in columns: self.conn.execute(f"ALTER TABLE videos ADD COLUMN {column} {column_type}")
+            if self.conn.execute("PRAGMA user_version").fetchone()[0] != PARSER_VERSION: # Titles from another parser version are parsed again on load
+                self.conn.execute("UPDATE videos SET title = NULL, season = NULL, episode = NULL"); self.conn.execute(f"PRAGMA user_version = {PARSER_VERSION}")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS videos_directory ON videos (directory)")
+            self.conn.execute("""CREATE TABLE IF NOT EXISTS media_info (
+                path TEXT PRIMARY KEY, directory TEXT NOT NULL, size INTEGER NOT NULL, mtime REAL NOT NULL, info TEXT NOT NULL)""")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS media_info_directory ON media_info (directory)")
+
+    @staticmethod
+    def _file_data(row, media=None):
+        """ file_data dict of a videos row; media is the probe result (None: not probed for this size/mtime). """
+        path, _, size, mtime, source_srt, translated_srt, sidecars, title, season, episode = row
+        if title is None: title, season, episode = parse_release_path(path)
+        return {'video_path': path, 'size': size, 'mtime': mtime, 'source_srt': source_srt, 'translated_srt': translated_srt, 'sidecars': json.loads(sidecars),
+                'title': title, 'season': season, 'episode': episode, 'media': media}
+
+    def _load_rows(self, root):
+        low, high = _subtree_bounds(os.path.normpath(root))
+        with self.lock:
+            return self.conn.execute("SELECT path, directory, size, mtime, source_srt, translated_srt, sidecars, title, season, episode FROM videos WHERE path >= ? AND path < ?", (low, high)).fetchall()
+
+    def _load_media(self, root):
+        """ path -> (size, mtime, probe result) for everything probed below root. """
+        low, high = _subtree_bounds(os.path.normpath(root))
+        with self.lock:
+            return {path: (size, mtime, json.loads(info)) for path, size, mtime, info in
+                    self.conn.execute("SELECT path, size, mtime, info FROM media_info WHERE path >= ? AND path < ?", (low, high))}
+
+    @staticmethod
+    def _media_for(row, media):
+        """ The probe result of a videos row, if it was taken from the same size and mtime. """
+        stored = media.get(row[0])
+        return stored[2] if stored and stored[0] == row[2] and stored[1] == row[3] else None
+
+    def load(self, root):
+        """ Returns the indexed videos below root as file_data dicts, without touching the disk. """
+        media = self._load_media(root)
+        return [self._file_data(row, self._media_for(row, media)) for row in self._load_rows(root)]
+
+    def media(self, video_path, size, mtime):
+        """ The cached probe result of one file as it is at (size, mtime), or None. """
+        with self.lock: row = self.conn.execute("SELECT size, mtime, info FROM media_info WHERE path = ?", (video_path,)).fetchone()
+        return json.loads(row[2]) if row and row[0] == size and row[1] == mtime else None
+
+    def store_media(self, video_path, size, mtime, info):
+        """ Caches a probe result for the file as it was at (size, mtime). """
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO media_info (path, directory, size, mtime, info) VALUES (?, ?, ?, ?, ?)",
+                              (video_path, os.path.dirname(video_path), size, mtime, json.dumps(info, ensure_ascii=False)))
+
+    def scan_directory(self, directory, video_extensions):
+        """ Lists one directory once. Returns (subdirectory paths, video rows) with sidecars resolved from the same listing. """
+        subdirs = []; files = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False): subdirs.append(entry.path)
+                    elif entry.is_file(): files.append(entry)
+                except OSError: continue
+        names = {entry.name for entry in files}; videos = []
+        for entry in files:
+            if not is_video_name(entry.name, video_extensions) or converted_name(entry.name) in names: continue # A converted source is listed as its conversion
+            try: stat = entry.stat()
+            except OSError as e: print(f"Skipping file OS error: {entry.path} - {e}"); continue
+            source_srt, translated_srt, sidecars = find_sidecars(entry.path, names)
+            videos.append((entry.path, directory, stat.st_size, stat.st_mtime, source_srt, translated_srt, json.dumps(sidecars, ensure_ascii=False), *parse_release_path(entry.path)))
+        return subdirs, videos
+
+    def directories(self, root):
+        """ Indexed directories at and below root. """
+        root = os.path.normpath(root); low, high = _subtree_bounds(root)
+        with self.lock: return [path for (path,) in self.conn.execute("SELECT path FROM directories WHERE path = ? OR (path >= ? AND path < ?)", (root, low, high))]
+
+    def iter_refresh(self, root, video_extensions, cancel_event=None, force_root=False):
+        """
+        Brings the index for root up to date, yielding (directory, file_data list, re-listed) for every
+        directory as it is reached. Unchanged directories cost one stat and yield their indexed videos;
+        changed ones are re-listed; vanished ones are dropped. The index is written when the walk ends;
+        a cancelled walk (cancel_event set) keeps what it re-listed but drops nothing. force_root re-lists
+        root even if its mtime is unchanged (a file in it was rewritten, which does not touch the directory).
+        """
+        root = os.path.normpath(root); extensions = {ext.lower() for ext in video_extensions}; low, high = _subtree_bounds(root)
+        with self.lock:
+            known = {path: (mtime, json.loads(subdirs)) for path, mtime, subdirs in
+                     self.conn.execute("SELECT path, mtime, subdirs FROM directories WHERE path = ? OR (path >= ? AND path < ?)", (root, low, high))}
+        indexed = {}; media = self._load_media(root)
+        for row in self._load_rows(root): indexed.setdefault(row[1], []).append(row)
+        pending = [root]; visited = set(); changed = []; now = time.time(); cancelled = False
+        while pending:
+            if cancel_event is not None and cancel_event.is_set(): cancelled = True; break
+            directory = pending.pop()
+            try: mtime = os.stat(directory).st_mtime
+            except OSError: continue
+            visited.add(directory); stored = known.get(directory)
+            if stored and stored[0] == mtime and not (force_root and directory == root): # Unchanged: reuse its listing
+                pending.extend(stored[1]); yield directory, [self._file_data(row, self._media_for(row, media)) for row in indexed.get(directory, [])], False; continue
+            try: subdirs, videos = self.scan_directory(directory, extensions)
+            except OSError as e: print(f"Permission error: {e}"); continue
+            if now - mtime < RACY_MTIME_WINDOW: mtime = None # Could still change within the same mtime tick
+            changed.append((directory, mtime, subdirs, videos)); pending.extend(subdirs)
+            yield directory, [self._file_data(row, self._media_for(row, media)) for row in videos], True
+        vanished = [] if cancelled else [path for path in known if path not in visited]
+        self._apply(changed, vanished)
+        print(f"Library index: {len(visited)} directories checked, {len(changed)} re-listed, {len(vanished)} removed{' (cancelled)' if cancelled else ''}.")
+
+    def refresh(self, root, video_extensions):
+        """ Blocking iter_refresh. Returns (file_data list, directories re-listed). """
+        files_data = []; relisted = 0
+        for _, directory_files, changed in self.iter_refresh(root, video_extensions): files_data.extend(directory_files); relisted += changed
+        return files_data, relisted
+
+    def _apply(self, changed, vanished):
+        with self.lock, self.conn:
+            for directory in vanished:
+                self.conn.execute("DELETE FROM directories WHERE path = ?", (directory,)); self.conn.execute("DELETE FROM videos WHERE directory = ?", (directory,))
+                self.conn.execute("DELETE FROM media_info WHERE directory = ?", (directory,))
+            for directory, mtime, subdirs, videos in changed:
+                self.conn.execute("INSERT OR REPLACE INTO directories (path, mtime, subdirs) VALUES (?, ?, ?)", (directory, mtime, json.dumps(subdirs, ensure_ascii=False)))
+                self.conn.execute("DELETE FROM videos WHERE directory = ?", (directory,))
+                self.conn.executemany("INSERT OR REPLACE INTO videos (path, directory, size, mtime, source_srt, translated_srt, sidecars, title, season, episode) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", videos)
+                self.conn.execute("DELETE FROM media_info WHERE directory = ? AND path NOT IN (SELECT path FROM videos WHERE directory = ?)", (directory, directory)) # Videos gone from it
+
+    def close(self):
+        with self.lock: self.conn.close()
+
+# --- END OF FILE source/library_index.py ---
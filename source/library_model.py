@@ -0,0 +1,452 @@
+# --- START OF FILE source/library_model.py ---
+
+"""
+Model/View library list for the Raspberry Pi Movie Player App.
+LibraryListModel keeps the videos as plain data (no widget items), sorted by
+their path relative to the library root, and hands rows to the view in pages
+through fetchMore(). A TitleSearchIndex (word tokens and trigrams over
+normalized titles) answers search-as-you-type queries without scanning every
+title, so filtering thousands of entries keeps up with each keystroke.
+LibraryTreeModel shows the same entries grouped Show -> Season -> Episode by
+the release title parsed at index time; nodes below a show are only built
+when the view expands it.
+"""
+
+import os
+import re
+import unicodedata
+from bisect import bisect_left
+
+from PyQt5.QtCore import Qt, QAbstractListModel, QAbstractItemModel, QModelIndex, pyqtSignal
+
+from source.release_parser import parse_release_path, show_key
+
+# --- Configuration ---
+FETCH_BATCH_SIZE = 200 # Rows handed to the view per fetchMore()
+# --- End Configuration ---
+
+NON_ALNUM_REGEX = re.compile(r'[\W_]+')
+
+
+def normalize_title(text):
+    """ Lowercase, accents stripped, every run of punctuation/separators ('.', '_', '-', brackets) becomes one space. """
+    text = unicodedata.normalize('NFKD', text.casefold())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return NON_ALNUM_REGEX.sub(' ', text).strip()
+
+
+def _trigrams(word):
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+class TitleSearchIndex:
+    """
+    Inverted index over normalized titles: trigram -> keys for words of 3+ characters and
+    1-2 character word prefixes -> keys for short query words. A query matches a title when every
+    query word is a substring (1-2 characters: a prefix) of one of the title's words. Updates are incremental.
+    """
+
+    def __init__(self):
+        self.titles = {} # key -> normalized title
+        self.trigrams = {} # trigram -> set of keys
+        self.prefixes = {} # 1-2 character word prefix -> set of keys
+
+    def _terms(self, title):
+        words = title.split(); trigrams = set(); prefixes = set()
+        for word in words: trigrams |= _trigrams(word); prefixes.update((word[:1], word[:2]))
+        return trigrams, prefixes
+
+    def add(self, key, title):
+        if key in self.titles: self.remove(key)
+        title = normalize_title(title); self.titles[key] = title
+        trigrams, prefixes = self._terms(title)
+        for trigram in trigrams: self.trigrams.setdefault(trigram, set()).add(key)
+        for prefix in prefixes: self.prefixes.setdefault(prefix, set()).add(key)
+
+    def remove(self, key):
+        title = self.titles.pop(key, None)
+        if title is None: return
+        trigrams, prefixes = self._terms(title)
+        for postings, terms in ((self.trigrams, trigrams), (self.prefixes, prefixes)):
+            for term in terms:
+                keys = postings.get(term)
+                if keys is None: continue
+                keys.discard(key)
+                if not keys: del postings[term]
+
+    def search(self, query):
+        """ Returns the set of matching keys, or None for an empty query (everything matches). """
+        words = normalize_title(query).split()
+        if not words: return None
+        candidates = None
+        for word in sorted(words, key=len, reverse=True): # Longest (most selective) words first
+            if len(word) >= 3:
+                postings = [self.trigrams.get(trigram, ()) for trigram in _trigrams(word)]
+                keys = set(min(postings, key=len)).intersection(*postings) if postings else set()
+            else: keys = set(self.prefixes.get(word, ()))
+            candidates = keys if candidates is None else candidates & keys
+            if not candidates: return set()
+        # Trigram hits can come from different words of the title; confirm each word is really there
+        return {key for key in candidates if self._title_matches(self.titles[key], words)}
+
+    @staticmethod
+    def _title_matches(title, words):
+        title_words = title.split()
+        return all(any(word in title_word if len(word) >= 3 else title_word.startswith(word) for title_word in title_words) for word in words)
+
+    def matches(self, key, query):
+        """ Whether one indexed title matches query (no index lookups). """
+        words = normalize_title(query).split()
+        return not words or (key in self.titles and self._title_matches(self.titles[key], words))
+
+
+class LibraryListModel(QAbstractListModel):
+    """
+    Sorted list of file_data dicts (keyed by video_path). Qt.DisplayRole is built by display_func(file_data),
+    Qt.UserRole returns the file_data dict, Qt.DecorationRole decoration_func(file_data) (asked for painted rows only).
+    Rows are exposed to the view lazily with fetchMore().
+    entries_reset() and entries_changed([upserted file_data], [removed paths]) let other views follow the entries.
+    """
+    entries_reset = pyqtSignal()
+    entries_changed = pyqtSignal(list, list)
+
+    def __init__(self, display_func, parent=None, decoration_func=None):
+        super().__init__(parent)
+        self.display_func = display_func; self.decoration_func = decoration_func; self.root = ""
+        self.files = {} # video_path -> file_data
+        self.sort_keys = []; self.sorted_paths = [] # All entries, in display order
+        self.visible = []; self.visible_keys = []; self.loaded = 0 # Filtered entries; the first `loaded` are rows
+        self.display_cache = {}; self.search_index = TitleSearchIndex(); self.query = ""; self.matches = None
+
+    # --- Qt model interface ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.loaded
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= self.loaded: return None
+        video_path = self.visible[index.row()]
+        if role == Qt.DisplayRole:
+            text = self.display_cache.get(video_path)
+            if text is None: text = self.display_cache[video_path] = self.display_func(self.files[video_path])
+            return text
+        if role == Qt.ToolTipRole: return video_path
+        if role == Qt.UserRole: return self.files[video_path]
+        if role == Qt.DecorationRole and self.decoration_func: return self.decoration_func(self.files[video_path])
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.loaded < len(self.visible)
+
+    def fetchMore(self, parent=QModelIndex()):
+        count = min(FETCH_BATCH_SIZE, len(self.visible) - self.loaded)
+        if count <= 0: return
+        self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + count - 1); self.loaded += count; self.endInsertRows()
+
+    # --- Library operations ---
+    def _sort_key(self, video_path):
+        return os.path.relpath(video_path, self.root).casefold() if self.root else video_path.casefold()
+
+    def total_count(self):
+        return len(self.files)
+
+    def visible_count(self):
+        return len(self.visible)
+
+    def paths(self):
+        return set(self.files)
+
+    def files_data(self):
+        return list(self.files.values())
+
+    def file_data(self, video_path):
+        return self.files.get(video_path)
+
+    def reset(self, files_data, root):
+        """ Replaces everything (new base directory or index load). """
+        self.beginResetModel()
+        self.root = root; self.files = {file_data['video_path']: file_data for file_data in files_data}; self.display_cache = {}
+        self.search_index = TitleSearchIndex()
+        for video_path in self.files: self.search_index.add(video_path, os.path.relpath(video_path, root))
+        pairs = sorted((self._sort_key(video_path), video_path) for video_path in self.files)
+        self.sort_keys = [key for key, _ in pairs]; self.sorted_paths = [path for _, path in pairs]
+        self.matches = self.search_index.search(self.query); self._rebuild_visible()
+        self.endResetModel(); self.entries_reset.emit()
+
+    def set_filter(self, query):
+        """ Search-as-you-type: only the visible list is rebuilt; file data, display strings and the index are kept. """
+        self.query = query; self.matches = self.search_index.search(query)
+        self.beginResetModel(); self._rebuild_visible(); self.endResetModel(); self.entries_reset.emit()
+
+    def _rebuild_visible(self):
+        if self.matches is None: self.visible = list(self.sorted_paths); self.visible_keys = list(self.sort_keys)
+        else:
+            pairs = [(key, path) for key, path in zip(self.sort_keys, self.sorted_paths) if path in self.matches]
+            self.visible = [path for _, path in pairs]; self.visible_keys = [key for key, _ in pairs]
+        self.loaded = min(FETCH_BATCH_SIZE, len(self.visible))
+
+    def upsert(self, files_data):
+        """ Adds new entries at their sorted position and refreshes changed ones in place. """
+        self._upsert(files_data)
+        if files_data: self.entries_changed.emit(list(files_data), [])
+
+    def _upsert(self, files_data):
+        for file_data in files_data:
+            video_path = file_data['video_path']
+            if video_path in self.files:
+                self.files[video_path] = file_data; self.display_cache.pop(video_path, None)
+                row = self.row_of(video_path, fetch=False)
+                if row is not None: index = self.index(row); self.dataChanged.emit(index, index)
+                continue
+            self.files[video_path] = file_data; key = self._sort_key(video_path)
+            self.search_index.add(video_path, os.path.relpath(video_path, self.root) if self.root else video_path)
+            position = bisect_left(self.sort_keys, key); self.sort_keys.insert(position, key); self.sorted_paths.insert(position, video_path)
+            if self.matches is not None:
+                if not self.search_index.matches(video_path, self.query): continue
+                self.matches.add(video_path)
+            row = bisect_left(self.visible_keys, key)
+            if row < self.loaded or (self.loaded == len(self.visible) and self.loaded < FETCH_BATCH_SIZE): # Inside the rows the view has, or the first page is not full yet
+                self.beginInsertRows(QModelIndex(), row, row); self._insert_visible(row, key, video_path); self.loaded += 1; self.endInsertRows()
+            else: self._insert_visible(row, key, video_path) # Exposed by a later fetchMore()
+
+    def _insert_visible(self, row, key, video_path):
+        self.visible.insert(row, video_path); self.visible_keys.insert(row, key)
+
+    def update(self, video_path, **changes):
+        """ Changes fields of one entry (e.g. sidecars found later). """
+        if video_path not in self.files: return
+        self.upsert([{**self.files[video_path], **changes}])
+
+    def refresh(self, video_path):
+        """ Repaints an entry whose decoration became available. """
+        row = self.row_of(video_path, fetch=False)
+        if row is not None: index = self.index(row); self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+    def remove_paths(self, video_paths):
+        removed = []
+        for video_path in video_paths:
+            if video_path not in self.files: continue
+            removed.append(video_path)
+            row = self.row_of(video_path, fetch=False, loaded_only=False) # Before the entry is dropped
+            del self.files[video_path]; self.display_cache.pop(video_path, None); self.search_index.remove(video_path)
+            if self.matches is not None: self.matches.discard(video_path)
+            position = bisect_left(self.sort_keys, self._sort_key(video_path))
+            while self.sorted_paths[position] != video_path: position += 1
+            del self.sort_keys[position]; del self.sorted_paths[position]
+            if row is None: continue
+            if row < self.loaded:
+                self.beginRemoveRows(QModelIndex(), row, row); del self.visible[row]; del self.visible_keys[row]; self.loaded -= 1; self.endRemoveRows()
+            else: del self.visible[row]; del self.visible_keys[row]
+        if removed: self.entries_changed.emit([], removed)
+
+    def row_of(self, video_path, fetch=True, loaded_only=True):
+        """ Row of a visible entry; with fetch, rows are fetched up to it so the view can select it. """
+        if video_path not in self.files: return None
+        row = bisect_left(self.visible_keys, self._sort_key(video_path))
+        while row < len(self.visible) and self.visible[row] != video_path and self.visible_keys[row] == self._sort_key(video_path): row += 1
+        if row >= len(self.visible) or self.visible[row] != video_path: return None
+        while fetch and row >= self.loaded: self.fetchMore()
+        return row if row < self.loaded or not loaded_only else None
+
+
+def release_info(file_data):
+    """ (title, season, episode) of an entry; parsed at index time, or here for entries from elsewhere. """
+    if 'title' in file_data: return file_data['title'], file_data['season'], file_data['episode']
+    return parse_release_path(file_data['video_path'])
+
+
+class _TreeNode:
+    __slots__ = ('parent', 'kind', 'key', 'row', 'children', 'populated')
+
+    def __init__(self, parent, kind, key, row):
+        self.parent = parent; self.kind = kind; self.key = key; self.row = row # kind: 'show', 'season' or 'episode'
+        self.children = []; self.populated = kind == 'episode'
+
+
+class LibraryTreeModel(QAbstractItemModel):
+    """
+    Show -> Season -> Episode view over the visible entries of a LibraryListModel (same search filter).
+    Files without a season (movies) sit directly under their title. Only the show nodes are built up front;
+    a node's children are built by fetchMore() when the view expands it, and live updates only touch built nodes.
+    """
+
+    def __init__(self, list_model, display_func, parent=None, decoration_func=None):
+        super().__init__(parent)
+        self.list_model = list_model; self.display_func = display_func; self.decoration_func = decoration_func
+        self.groups = {} # show key -> {season or None: {video_path: file_data}}
+        self.titles = {} # show key -> title as parsed from the first file seen
+        self.placement = {} # video_path -> (show key, season)
+        self.root = _TreeNode(None, 'root', None, 0); self.root.populated = True
+        self.nodes = {} # (kind, key) -> built node
+        list_model.entries_reset.connect(self.rebuild); list_model.entries_changed.connect(self.on_entries_changed)
+        self.rebuild()
+
+    # --- Grouping ---
+    def _place(self, file_data):
+        """ Files the entry under its show/season. Returns the groups it left and joined. """
+        video_path = file_data['video_path']; title, season, episode = release_info(file_data)
+        key = show_key(title); old = self.placement.get(video_path); touched = {old, (key, season)} - {None}
+        if old is not None and old != (key, season): self._unplace(video_path)
+        self.groups.setdefault(key, {}).setdefault(season, {})[video_path] = file_data
+        self.titles.setdefault(key, title); self.placement[video_path] = (key, season)
+        return touched
+
+    def _unplace(self, video_path):
+        placement = self.placement.pop(video_path, None)
+        if placement is None: return set()
+        key, season = placement; seasons = self.groups[key]; seasons[season].pop(video_path, None)
+        if not seasons[season]: del seasons[season]
+        if not seasons: del self.groups[key]; self.titles.pop(key, None)
+        return {placement}
+
+    def _episode_sort_key(self, file_data):
+        episode = release_info(file_data)[2]
+        return (episode is None, episode or 0, file_data['video_path'].casefold())
+
+    def _child_specs(self, node):
+        """ (kind, key) of the children a node should have, in display order. """
+        if node.kind == 'root': return [('show', key) for key in sorted(self.groups)]
+        if node.kind == 'show':
+            seasons = self.groups.get(node.key, {})
+            specs = [('season', (node.key, season)) for season in sorted(season for season in seasons if season is not None)]
+            return specs + [('episode', file_data['video_path']) for file_data in sorted(seasons.get(None, {}).values(), key=self._episode_sort_key)]
+        if node.kind == 'season':
+            key, season = node.key
+            return [('episode', file_data['video_path']) for file_data in sorted(self.groups.get(key, {}).get(season, {}).values(), key=self._episode_sort_key)]
+        return []
+
+    def _file_data(self, video_path):
+        key, season = self.placement[video_path]
+        return self.groups[key][season][video_path]
+
+    def files_under(self, index):
+        """ file_data of every episode below a node (built or not), in display order. """
+        node = self._node(index)
+        if node.kind == 'episode': return [self._file_data(node.key)]
+        files = []
+        for kind, key in self._child_specs(node):
+            if kind == 'episode': files.append(self._file_data(key)); continue
+            show, season = key; files.extend(sorted(self.groups[show][season].values(), key=self._episode_sort_key))
+        return files
+
+    # --- Qt model interface ---
+    def _node(self, index):
+        return index.internalPointer() if index.isValid() else self.root
+
+    def _index_of_node(self, node):
+        return QModelIndex() if node is self.root else self.createIndex(node.row, 0, node)
+
+    def index(self, row, column, parent=QModelIndex()):
+        node = self._node(parent)
+        if column != 0 or not 0 <= row < len(node.children): return QModelIndex()
+        return self.createIndex(row, 0, node.children[row])
+
+    def parent(self, index):
+        if not index.isValid(): return QModelIndex()
+        return self._index_of_node(index.internalPointer().parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        return len(self._node(parent).children)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self._node(parent)
+        return node.kind != 'episode' and (not node.populated or bool(node.children))
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not self._node(parent).populated
+
+    def fetchMore(self, parent=QModelIndex()):
+        node = self._node(parent)
+        if node.populated: return
+        specs = self._child_specs(node); node.populated = True
+        if not specs: return
+        self.beginInsertRows(parent, 0, len(specs) - 1)
+        node.children = [self._new_node(node, kind, key, row) for row, (kind, key) in enumerate(specs)]
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid(): return None
+        node = index.internalPointer()
+        if node.kind == 'episode':
+            file_data = self._file_data(node.key)
+            if role == Qt.DisplayRole: return self.display_func(file_data)
+            if role == Qt.ToolTipRole: return node.key
+            if role == Qt.UserRole: return file_data
+            if role == Qt.DecorationRole and self.decoration_func: return self.decoration_func(file_data)
+            return None
+        if role != Qt.DisplayRole: return None
+        if node.kind == 'show':
+            count = sum(len(files) for files in self.groups.get(node.key, {}).values())
+            return f"{self.titles.get(node.key) or self.tr('Unknown')} ({count})"
+        key, season = node.key
+        return f"{self.tr('Season {0}').format(season)} ({len(self.groups.get(key, {}).get(season, {}))})"
+
+    # --- Updates ---
+    def _new_node(self, parent, kind, key, row):
+        node = _TreeNode(parent, kind, key, row); self.nodes[(kind, key)] = node
+        return node
+
+    def _forget(self, node):
+        self.nodes.pop((node.kind, node.key), None)
+        for child in node.children: self._forget(child)
+
+    def rebuild(self):
+        """ Regroups the visible entries (new library or new search); expanded nodes collapse. """
+        self.beginResetModel()
+        self.groups = {}; self.titles = {}; self.placement = {}; self.nodes = {}
+        for video_path in self.list_model.visible: self._place(self.list_model.files[video_path])
+        self.root.children = [self._new_node(self.root, kind, key, row) for row, (kind, key) in enumerate(self._child_specs(self.root))]
+        self.endResetModel()
+
+    def _sync(self, node):
+        """ Brings a built node's children in line with the groups (both lists are in display order). """
+        desired = self._child_specs(node); wanted = set(desired); parent_index = self._index_of_node(node)
+        for row in reversed(range(len(node.children))):
+            child = node.children[row]
+            if (child.kind, child.key) in wanted: continue
+            self.beginRemoveRows(parent_index, row, row); del node.children[row]; self._forget(child)
+            for later in node.children[row:]: later.row -= 1
+            self.endRemoveRows()
+        for row, (kind, key) in enumerate(desired):
+            if row < len(node.children) and (node.children[row].kind, node.children[row].key) == (kind, key): continue
+            self.beginInsertRows(parent_index, row, row); node.children.insert(row, self._new_node(node, kind, key, row))
+            for later in node.children[row + 1:]: later.row += 1
+            self.endInsertRows()
+
+    def on_entries_changed(self, upserted, removed):
+        touched = set(); matches = self.list_model.matches
+        for video_path in removed: touched |= self._unplace(video_path)
+        for file_data in upserted:
+            if matches is None or file_data['video_path'] in matches: touched |= self._place(file_data)
+            else: touched |= self._unplace(file_data['video_path'])
+        self._sync(self.root)
+        for key in {key for key, _ in touched}:
+            node = self.nodes.get(('show', key))
+            if node is not None and node.populated: self._sync(node)
+        for key, season in touched:
+            node = self.nodes.get(('season', (key, season)))
+            if node is not None and node.populated: self._sync(node)
+        changed = [self.nodes.get(spec) for spec in [*(('show', key) for key, _ in touched), *(('season', group) for group in touched),
+                                                      *(('episode', file_data['video_path']) for file_data in upserted)]]
+        for node in changed:
+            if node is not None: index = self._index_of_node(node); self.dataChanged.emit(index, index) # Counts and subtitle markers
+
+    def refresh(self, video_path):
+        node = self.nodes.get(('episode', video_path))
+        if node is not None: index = self._index_of_node(node); self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+    def index_of_path(self, video_path):
+        """ Index of an entry's node, building its show and season first. Invalid if the entry is not shown. """
+        placement = self.placement.get(video_path)
+        if placement is None: return QModelIndex()
+        key, season = placement
+        for spec in [('show', key)] + ([('season', (key, season))] if season is not None else []):
+            node = self.nodes.get(spec)
+            if node is None: return QModelIndex()
+            self.fetchMore(self._index_of_node(node))
+        node = self.nodes.get(('episode', video_path))
+        return self._index_of_node(node) if node is not None else QModelIndex()
+
+# --- END OF FILE source/library_model.py ---
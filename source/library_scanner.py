@@ -0,0 +1,96 @@
+# --- START OF FILE source/library_scanner.py ---
+
+"""
+Background library scanner for the Raspberry Pi Movie Player App.
+Walks a library root on a worker thread through LibraryIndex.iter_refresh
+(os.scandir, one listing per changed directory, sidecars resolved from that
+listing) and streams the videos found to the GUI in chunks, so the list fills
+progressively while the disk is read. A scan can be cancelled at any time.
+refresh_directories() re-reads only the directories a LibraryWatcher reported.
+"""
+
+import os
+import time
+import threading
+import traceback
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+# --- Configuration ---
+SCAN_CHUNK_SIZE = 200 # Videos per files_found signal
+SCAN_CHUNK_INTERVAL = 0.25 # Seconds; a smaller chunk is sent after this long
+# --- End Configuration ---
+
+
+class LibraryScanner(QObject):
+    """
+    Runs one library scan at a time. Every signal carries the scan id returned by start(),
+    so results of a superseded scan that are still queued can be ignored.
+    files_found(scan_id, [file_data]), scan_progress(scan_id, directories, videos),
+    scan_finished(scan_id, cancelled), scan_error(scan_id, message).
+    directories_refreshed({directory: [file_data of the directory and below]}) answers refresh_directories().
+    """
+    files_found = pyqtSignal(int, list)
+    scan_progress = pyqtSignal(int, int, int)
+    scan_finished = pyqtSignal(int, bool)
+    scan_error = pyqtSignal(int, str)
+    directories_refreshed = pyqtSignal(dict)
+
+    def __init__(self, library_index, parent=None):
+        super().__init__(parent)
+        self.library_index = library_index
+        self.lock = threading.Lock(); self.scan_id = 0; self.cancel_event = None
+
+    def start(self, root, video_extensions):
+        """ Cancels a running scan and starts a new one. Returns its scan id. """
+        with self.lock:
+            if self.cancel_event: self.cancel_event.set()
+            self.scan_id += 1; self.cancel_event = threading.Event(); scan_id = self.scan_id; cancel_event = self.cancel_event
+        threading.Thread(target=self._scan_worker, args=(scan_id, root, list(video_extensions), cancel_event), daemon=True).start()
+        return scan_id
+
+    def refresh_directories(self, directories, video_extensions):
+        """ Re-lists the given directories (and picks up or drops their subdirectories) on a worker thread. """
+        directories = sorted(set(directories)); roots = []
+        for directory in directories: # A directory below another one in the list is covered by it
+            if not any(directory.startswith(root + os.sep) for root in roots): roots.append(directory)
+        threading.Thread(target=self._refresh_worker, args=(roots, list(video_extensions)), daemon=True).start()
+
+    def _refresh_worker(self, roots, video_extensions):
+        try:
+            result = {}
+            for root in roots:
+                result[root] = [file_data for _, directory_files, _ in self.library_index.iter_refresh(root, video_extensions, force_root=True) for file_data in directory_files]
+            self.directories_refreshed.emit(result)
+        except RuntimeError: pass # Scanner deleted while the app was closing
+        except Exception as e: print(f"Library update error: {e}\n{traceback.format_exc()}")
+
+    def cancel(self):
+        with self.lock:
+            if self.cancel_event: self.cancel_event.set()
+
+    def is_scanning(self):
+        with self.lock: return self.cancel_event is not None and not self.cancel_event.is_set()
+
+    def _scan_worker(self, scan_id, root, video_extensions, cancel_event):
+        chunk = []; directories = 0; videos = 0; last_emit = time.monotonic()
+        try:
+            for _, directory_files, _ in self.library_index.iter_refresh(root, video_extensions, cancel_event):
+                directories += 1; videos += len(directory_files); chunk.extend(directory_files)
+                if len(chunk) >= SCAN_CHUNK_SIZE or (chunk and time.monotonic() - last_emit >= SCAN_CHUNK_INTERVAL):
+                    self.files_found.emit(scan_id, chunk); chunk = []; last_emit = time.monotonic()
+                    self.scan_progress.emit(scan_id, directories, videos)
+            if chunk: self.files_found.emit(scan_id, chunk)
+            self.scan_progress.emit(scan_id, directories, videos)
+            self.scan_finished.emit(scan_id, cancel_event.is_set())
+        except RuntimeError as e:
+            if cancel_event.is_set(): return # The scanner was deleted while the app was closing
+            print(f"Scan Error: {e}\n{traceback.format_exc()}"); self.scan_error.emit(scan_id, str(e))
+        except Exception as e:
+            print(f"Scan Error: {e}\n{traceback.format_exc()}")
+            self.scan_error.emit(scan_id, str(e))
+        finally:
+            with self.lock:
+                if self.cancel_event is cancel_event: self.cancel_event = None
+
+# --- END OF FILE source/library_scanner.py ---
@@ -0,0 +1,197 @@
+# --- START OF FILE source/library_watcher.py ---
+
+"""
+Live library watcher for the Raspberry Pi Movie Player App.
+Watches the library directories with Linux inotify (through ctypes, no extra
+dependency) and reports which directories gained, lost or rewrote a video,
+subtitle or subdirectory. Bursts of events (a torrent finishing, a season
+being copied) are debounced into one report. Directories that cannot get an
+inotify watch (max_user_watches exhausted, or no inotify on this system) are
+polled by mtime instead.
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+import traceback
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from source.library_index import is_video_name
+
+# --- Configuration ---
+DEBOUNCE_SECONDS = 2.0 # Quiet time after the last event before changes are reported
+MAX_DEBOUNCE_SECONDS = 15.0 # Report anyway after this long, even if events keep coming
+POLL_INTERVAL = 30.0 # Seconds between mtime polls of directories without an inotify watch
+IGNORED_SUFFIXES = ('.partial.srt',) # Rewritten every few seconds during progressive translation
+# --- End Configuration ---
+
+# inotify constants (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+EVENT_HEADER = struct.Struct('iIII') # wd, mask, cookie, len
+
+_libc = None
+if sys.platform.startswith('linux'):
+    try:
+        _libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        _libc.inotify_init1; _libc.inotify_add_watch; _libc.inotify_rm_watch
+    except (OSError, AttributeError): _libc = None
+
+
+class LibraryWatcher(QObject):
+    """
+    Emits directories_changed([directory, ...]) on the GUI thread after a debounced burst of changes.
+    A root in the list means events were lost (inotify queue overflow): rescan the whole root.
+    """
+    directories_changed = pyqtSignal(list)
+
+    def __init__(self, video_extensions, parent=None):
+        super().__init__(parent)
+        self.video_extensions = {ext.lower() for ext in video_extensions}
+        self.lock = threading.Lock(); self.roots = []
+        self.watches = {} # wd -> directory
+        self.watched = {} # directory -> wd
+        self.polled = {} # directory -> last mtime, for directories without a watch
+        self.pending = {}; self.first_pending = None; self.last_event = None # Debounce state
+        self.inotify_fd = None; self.wake_r, self.wake_w = os.pipe(); self.thread = None; self.stopping = False
+        if _libc is not None:
+            fd = _libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd >= 0: self.inotify_fd = fd
+            else: print(f"WARNING: inotify unavailable ({os.strerror(ctypes.get_errno())}). Library changes will be polled.")
+        else: print("WARNING: inotify not supported here. Library changes will be polled.")
+
+    def watch(self, roots, directories):
+        """ Watches roots and the given (indexed) directories; switching roots drops the old watches. """
+        roots = [os.path.normpath(root) for root in roots]
+        with self.lock:
+            if roots != self.roots:
+                for wd in list(self.watches): self._remove_watch(wd)
+                self.polled.clear(); self.pending.clear(); self.roots = roots
+            for directory in [*roots, *directories]: self._add_watch(os.path.normpath(directory))
+            watched, polled = len(self.watched), len(self.polled)
+        print(f"Library watcher: {watched} directories watched, {polled} polled.")
+        if self.thread is None: self.thread = threading.Thread(target=self._watch_worker, daemon=True); self.thread.start()
+
+    def stop(self):
+        self.stopping = True
+        try: os.write(self.wake_w, b'x')
+        except OSError: pass
+
+    def _add_watch(self, directory):
+        """ Lock must be held. Falls back to polling when no watch can be added. """
+        if directory in self.watched or directory in self.polled: return
+        if self.inotify_fd is not None:
+            wd = _libc.inotify_add_watch(self.inotify_fd, os.fsencode(directory), WATCH_MASK)
+            if wd >= 0: self.watches[wd] = directory; self.watched[directory] = wd; return
+            error = ctypes.get_errno()
+            if error in (errno.ENOENT, errno.ENOTDIR, errno.EACCES): return
+            if error == errno.ENOSPC and not self.polled: print("WARNING: inotify watch limit reached (fs.inotify.max_user_watches). Polling the remaining directories.")
+        try: self.polled[directory] = os.stat(directory).st_mtime
+        except OSError: pass
+
+    def _remove_watch(self, wd):
+        """ Lock must be held. """
+        directory = self.watches.pop(wd, None)
+        if directory is not None: self.watched.pop(directory, None)
+        if self.inotify_fd is not None: _libc.inotify_rm_watch(self.inotify_fd, wd)
+
+    def _add_tree(self, directory):
+        """ Watches a directory that appeared (created or moved in) and everything below it. Lock must be held. """
+        pending = [directory]
+        while pending:
+            current = pending.pop(); self._add_watch(current)
+            try:
+                with os.scandir(current) as entries: pending.extend(entry.path for entry in entries if entry.is_dir(follow_symlinks=False))
+            except OSError: continue
+
+    def _drop_tree(self, directory):
+        """ Forgets a directory that went away (deleted or moved out) and everything below it. Lock must be held. """
+        prefix = directory + os.sep
+        for path, wd in list(self.watched.items()):
+            if path == directory or path.startswith(prefix): self._remove_watch(wd)
+        for path in list(self.polled):
+            if path == directory or path.startswith(prefix): del self.polled[path]
+
+    def _is_relevant(self, name, is_dir):
+        if is_dir: return True
+        if name.endswith(IGNORED_SUFFIXES): return False
+        return name.lower().endswith('.srt') or is_video_name(name, self.video_extensions)
+
+    def _mark(self, directory):
+        """ Lock must be held. """
+        now = time.monotonic(); self.pending[directory] = True; self.last_event = now
+        if self.first_pending is None: self.first_pending = now
+
+    def _read_events(self):
+        try: data = os.read(self.inotify_fd, 64 * 1024)
+        except BlockingIOError: return
+        offset = 0
+        with self.lock:
+            while offset + EVENT_HEADER.size <= len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset); offset += EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b'\0')); offset += length
+                if mask & IN_Q_OVERFLOW:
+                    print("Library watcher: event queue overflow, rescanning.")
+                    for root in self.roots: self._mark(root)
+                    continue
+                directory = self.watches.get(wd)
+                if directory is None: continue
+                if mask & IN_IGNORED: self.watches.pop(wd, None); self.watched.pop(directory, None); continue
+                if mask & (IN_DELETE_SELF | IN_MOVE_SELF): self._mark(directory if directory in self.roots else os.path.dirname(directory)); continue
+                is_dir = bool(mask & IN_ISDIR); path = os.path.join(directory, name)
+                if not self._is_relevant(name, is_dir): continue
+                if is_dir and mask & (IN_CREATE | IN_MOVED_TO): self._add_tree(path)
+                elif is_dir and mask & (IN_DELETE | IN_MOVED_FROM): self._drop_tree(path)
+                self._mark(directory)
+
+    def _poll(self):
+        with self.lock:
+            for directory, mtime in list(self.polled.items()):
+                try: current = os.stat(directory).st_mtime
+                except OSError: del self.polled[directory]; self._mark(os.path.dirname(directory)); continue
+                if current != mtime: self.polled[directory] = current; self._mark(directory)
+
+    def _flush(self):
+        """ Emits the pending directories once the burst is over (or has gone on too long). """
+        with self.lock:
+            if not self.pending: return
+            now = time.monotonic()
+            if now - self.last_event < DEBOUNCE_SECONDS and now - self.first_pending < MAX_DEBOUNCE_SECONDS: return
+            directories = sorted(self.pending); self.pending = {}; self.first_pending = None
+        print(f"Library watcher: changes in {len(directories)} director{'y' if len(directories) == 1 else 'ies'}.")
+        self.directories_changed.emit(directories)
+
+    def _watch_worker(self):
+        next_poll = time.monotonic() + POLL_INTERVAL
+        try:
+            while not self.stopping:
+                with self.lock: waiting = bool(self.pending)
+                timeout = max(0.0, next_poll - time.monotonic())
+                if waiting: timeout = min(timeout, DEBOUNCE_SECONDS / 4)
+                fds = [self.wake_r] + ([self.inotify_fd] if self.inotify_fd is not None else [])
+                readable, _, _ = select.select(fds, [], [], timeout)
+                if self.stopping: break
+                if self.inotify_fd in readable: self._read_events()
+                if time.monotonic() >= next_poll: self._poll(); next_poll = time.monotonic() + POLL_INTERVAL
+                self._flush()
+        except RuntimeError: pass # Watcher deleted while the app was closing
+        except Exception as e: print(f"Library watcher error: {e}\n{traceback.format_exc()}")
+
+# --- END OF FILE source/library_watcher.py ---
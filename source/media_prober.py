@@ -0,0 +1,120 @@
+# --- START OF FILE source/media_prober.py ---
+
+"""
+Background media prober for the Raspberry Pi Movie Player App.
+Reads duration, resolution and codecs of library videos with ffprobe, a bounded
+number of ffprobe processes at a time, and caches the results in the library
+index keyed by (path, size, mtime). The library view can then show runtime and
+resolution and flag files the Pi cannot hardware-decode without opening them in VLC.
+"""
+
+import os
+import re
+import json
+import shutil
+import threading
+import subprocess
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+# --- Configuration ---
+MAX_PROBE_WORKERS = 2 # ffprobe processes running at once; headers only, so this is mostly disk-bound
+PROBE_TIMEOUT = 20 # Seconds
+# Codecs the Pi decodes in hardware -> (tallest frame, deepest bit depth) it handles, as "codec:height[:bits]".
+# HEVC is left out by default: the Pi 4's HEVC block is not reachable through the VLC build the app plays with.
+HW_DECODE_LIMITS = {}
+for _entry in os.getenv("PI_HW_DECODE", "h264:1080:8").split(','):
+    _codec, _height, _bits = (_entry.strip().split(':') + ['', ''])[:3]
+    if _codec: HW_DECODE_LIMITS[_codec.lower()] = (int(_height) if _height.isdigit() else None, int(_bits) if _bits.isdigit() else None)
+# --- End Configuration ---
+
+PIX_FMT_DEPTH_REGEX = re.compile(r'p(\d{1,2})(?:le|be)$') # 'yuv420p10le' -> 10; plain 'yuv420p' is 8-bit
+
+
+def needs_software_decode(media):
+    """ True if the probed video stream is a codec (or size) the Pi's hardware decoder does not take. """
+    if not media or not media.get('video_codec'): return False
+    codec = media['video_codec'].lower()
+    if codec not in HW_DECODE_LIMITS: return True
+    max_height, max_bits = HW_DECODE_LIMITS[codec]
+    if max_bits and (media.get('bit_depth') or 8) > max_bits: return True
+    return bool(max_height and media.get('height') and media['height'] > max_height)
+
+
+def format_runtime(seconds):
+    seconds = int(round(seconds)); hours, rest = divmod(seconds, 3600); minutes, seconds = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+class MediaProber(QObject):
+    """
+    Probes library videos in the background. Emits media_probed(video_path, media) for every file probed,
+    where media is {'duration', 'width', 'height', 'video_codec', 'bit_depth', 'audio_codec'} or {'error': message}.
+    A failed probe is cached as well; it is retried once the file's size or mtime changes (e.g. a download finished).
+    """
+    media_probed = pyqtSignal(str, dict)
+
+    def __init__(self, library_index, parent=None):
+        super().__init__(parent)
+        self.library_index = library_index
+        self.ffprobe_path = shutil.which('ffprobe')
+        if not self.ffprobe_path: print("WARNING: ffprobe not found. Runtime/resolution of library files will not be shown.")
+        self.executor = ThreadPoolExecutor(max_workers=MAX_PROBE_WORKERS, thread_name_prefix="media-probe")
+        self.lock = threading.Lock(); self.queued = set(); self.generation = 0
+
+    def submit(self, files_data):
+        """ Queues every entry that has no probe result for its current size/mtime. Returns how many were queued. """
+        if not self.ffprobe_path: return 0
+        queued = 0
+        with self.lock:
+            generation = self.generation
+            for file_data in files_data:
+                video_path = file_data['video_path']
+                if file_data.get('media') is not None or video_path in self.queued: continue
+                self.queued.add(video_path); queued += 1
+                self.executor.submit(self._probe_worker, generation, video_path, file_data['size'], file_data['mtime'])
+        if queued: print(f"Media prober: {queued} files queued.")
+        return queued
+
+    def cancel_pending(self):
+        """ Drops queued probes (e.g. the base directory changed); running ones still finish. """
+        with self.lock: self.generation += 1; self.queued.clear()
+
+    def _probe(self, video_path):
+        cmd = [self.ffprobe_path, '-v', 'error', '-show_entries', 'format=duration:stream=codec_type,codec_name,width,height,pix_fmt:stream_disposition=attached_pic',
+               '-of', 'json', video_path]
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=PROBE_TIMEOUT)
+        if result.returncode != 0: raise RuntimeError(result.stderr.strip() or f"ffprobe exited with {result.returncode}")
+        data = json.loads(result.stdout or '{}'); streams = data.get('streams', [])
+        # Cover art is stored as a video stream; the real video is the first one that is not an attached picture
+        video = next((stream for stream in streams if stream.get('codec_type') == 'video' and not stream.get('disposition', {}).get('attached_pic')), {})
+        audio = next((stream for stream in streams if stream.get('codec_type') == 'audio'), {})
+        try: duration = float(data.get('format', {}).get('duration'))
+        except (TypeError, ValueError): duration = None
+        depth = PIX_FMT_DEPTH_REGEX.search(video.get('pix_fmt') or '')
+        return {'duration': duration, 'width': video.get('width'), 'height': video.get('height'), 'video_codec': video.get('codec_name'),
+                'bit_depth': int(depth.group(1)) if depth else (8 if video.get('pix_fmt') else None), 'audio_codec': audio.get('codec_name')}
+
+    def _probe_worker(self, generation, video_path, size, mtime):
+        try:
+            with self.lock:
+                if generation != self.generation: return # Cancelled while queued
+            try: stat = os.stat(video_path)
+            except OSError: return # Gone; the library watcher drops it
+            if stat.st_size != size or stat.st_mtime != mtime: return # Still being written; re-queued after the next refresh
+            try: media = self._probe(video_path)
+            except (RuntimeError, subprocess.TimeoutExpired, ValueError) as e: media = {'error': str(e)[:200]}; print(f"Media probe failed for {video_path}: {e}")
+            self.library_index.store_media(video_path, size, mtime, media)
+            self.media_probed.emit(video_path, media)
+        except RuntimeError: pass # Prober deleted while the app was closing
+        except Exception as e: print(f"Media probe error for {video_path}: {e}\n{traceback.format_exc()}")
+        finally:
+            with self.lock:
+                if generation == self.generation: self.queued.discard(video_path)
+
+    def shutdown(self):
+        self.cancel_pending(); self.executor.shutdown(wait=False, cancel_futures=True)
+
+# --- END OF FILE source/media_prober.py ---
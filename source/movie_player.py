@@ -11,43 +11,47 @@ import vlc
 import threading
 import traceback
 import re # Import regular expression module
+import pathlib
+from bisect import bisect_left
 
 from PyQt5.QtGui import QCursor
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout,
                            QHBoxLayout, QPushButton, QLabel,
-                           QSlider, QStyle, QStackedWidget,
+                           QStyle, QStackedWidget,
                            QTabWidget, QMessageBox, QApplication, QDesktopWidget,
-                           QProgressDialog)
+                           QProgressDialog, QToolButton, QMenu, QActionGroup)
 from PyQt5.QtCore import Qt, QTimer, pyqtSlot, QMetaObject, Q_ARG, pyqtSignal, QPoint, QEvent
 
 # Import local modules
 from source.video_frame import VideoFrame
-from source.file_browser import FileBrowser
+from source.file_browser import FileBrowser, find_associated_srt
 from source.downloads_tab import DownloadsTab
 from source.subtitle_manager import SubtitleManager
 from source.subtitle_dialog import SubtitleResultsDialog
 from source.web_browser_tab import WebBrowserTab
 from source.translation_manager import SubtitleTranslator
+from source.translation_jobs import TranslationJobManager, PRIORITY_NORMAL, PRIORITY_PLAYBACK
+from source.release_parser import parse_release_path
+from source.seek_slider import SeekPreviewSlider
+from source.playback_profiles import PlaybackProfiles
+from source.srt_parser import parse_srt
 
 # Constants
 CURSOR_HIDE_TIMEOUT_MS = 3000
-
-# Regex for Season/Episode Extraction
-SEASON_EPISODE_REGEX = re.compile(
-    r'[._ \-](?:s|season)?(\d{1,3})[._ \-]?(?:e|ep|episode|x)(\d{1,3})[._ \-]|'
-    r'[._ \-](\d{1,3})x(\d{1,3})[._ \-]',
-    re.IGNORECASE
-)
-# Regex to clean up movie/series name before query
-CLEAN_QUERY_REGEX = re.compile(
-    r'(\b(?:19|20)\d{2}\b)|' r'(\b(?:720p|1080p|2160p|4k)\b)|'
-    r'(\b(?:bluray|web.?dl|hdtv|dvd.?rip)\b)|' r'(\[.*?\])|' r'(\(.*?\))',
-    re.IGNORECASE
-)
+PARTIAL_RELOAD_BEHIND_MS = 5000 # A partial translation is reloaded only if it adds cues between these bounds around the playhead
+PARTIAL_RELOAD_AHEAD_MS = 120000
+SUBTITLE_TRACK_SELECT_DELAY_MS = 500 # VLC creates the track of an added subtitle file asynchronously
 
 
 class MoviePlayerApp(QMainWindow):
     """ Main application window """
+    # libvlc events arrive on libvlc's own thread; these signals queue them to the GUI thread
+    vlc_time_changed = pyqtSignal(int, int) # (playback time in ms, event session), emitted once per displayed second
+    vlc_position_changed = pyqtSignal(int, int) # (slider value 0-1000, event session), emitted only when it changes
+    vlc_length_changed = pyqtSignal(int)
+    vlc_end_reached = pyqtSignal()
+    vlc_error = pyqtSignal(int) # Generation of the media player that failed
+    vlc_playing = pyqtSignal(int) # Generation of the media player that started playing
     # ... ( __init__, _setup_ui_views_and_layouts, _connect_signals remain the same) ...
     def __init__(self):
         super().__init__()
@@ -55,23 +59,71 @@ class MoviePlayerApp(QMainWindow):
         self.is_video_layout_fullscreen = False; self.original_window_flags = self.windowFlags()
         self.mouse_pos_before_hide = None; self.original_geometry_before_fs = None
         self.screen_geometry = QApplication.desktop().screenGeometry(); self.is_cursor_hidden = False
-        self.is_translating = False; self.translation_progress_dialog = None
+        self.translation_progress_dialog = None
+        self.library_translations = {}; self.library_translation_results = [] # srt_path -> (lines done, lines total) of library jobs shown in the progress dialog
+        self.season_subtitle_cache = {}; self.pending_season_search = None
+        self.current_video_path = None; self.progressive_translation = None # (video_path, srt_path) of a translation started from the player bar
+        self.partial_cue_starts = None; self.subtitle_spu = None # Cue starts of the partial translation loaded in VLC, and the SPU track id selected for it
         self.setWindowTitle(self.tr("Raspberry Pi Movie Player")); self.setGeometry(100, 100, 1024, 768); self.setFocusPolicy(Qt.StrongFocus)
-        self.instance = vlc.Instance(); self.mediaplayer = self.instance.media_player_new()
-        self.subtitle_manager = SubtitleManager(); self.translator = SubtitleTranslator()
-        if self.subtitle_manager.username and self.subtitle_manager.password: print("Attempting OpenSubtitles login..."); self.subtitle_manager.login()
+        self.playback_profiles = PlaybackProfiles(); self.vlc_instances = {}; self.profile_name = None; self.player_generation = 0 # One libvlc instance per profile used, built on first use
+        self.instance = None; self.mediaplayer = None; self.profile_chain = []; self.pending_profile_chain = None; self.pending_resume_ms = 0
+        self.subtitle_manager = SubtitleManager(); self.translator = SubtitleTranslator(); self.translation_jobs = TranslationJobManager(self.translator, parent=self)
         self.cursor_hide_timer = QTimer(self); self.cursor_hide_timer.setInterval(CURSOR_HIDE_TIMEOUT_MS); self.cursor_hide_timer.setSingleShot(True); self.cursor_hide_timer.timeout.connect(self.hide_cursor_on_inactivity)
-        self.timer = QTimer(self); self.timer.setInterval(100); self.timer.timeout.connect(self.update_ui)
+        self.tracking_playback = False; self.media_length = 0; self.last_time_second = -1; self.last_slider_pixel = -1 # GUI thread only
+        self.vlc_filter_lock = threading.Lock(); self.event_session = 0; self.filter_second = -1; self.filter_slider = -1 # libvlc-side filter; reset from the GUI thread under the lock
+        self._switch_profile(self.playback_profiles.chain(None)) # The time label and slider follow libvlc events instead of polling it
         self.central_widget = QWidget(self); self.setCentralWidget(self.central_widget); self.main_layout = QVBoxLayout(self.central_widget)
         self.stacked_widget = QStackedWidget(); self._setup_ui_views_and_layouts(); self.main_layout.addWidget(self.stacked_widget); self.stacked_widget.setCurrentIndex(1)
         self.is_playing = False; self.media = None
         self._connect_signals()
+        # Login after signals are connected; a cached session is restored without a network round trip
+        if self.subtitle_manager.username and self.subtitle_manager.password: print("Attempting OpenSubtitles login..."); self.subtitle_manager.login()
+    def _switch_profile(self, chain):
+        """ Makes the first usable profile of chain current, replacing the media player if the profile changes. Returns the rest of the chain. """
+        for position, name in enumerate(chain):
+            if name == self.profile_name and self.mediaplayer is not None: return chain[position + 1:]
+            instance = self.vlc_instances.get(name)
+            if instance is None:
+                try: instance = vlc.Instance(self.playback_profiles.options(name))
+                except Exception as e: print(f"VLC instance for profile '{name}' failed: {e}"); instance = None
+                if instance is None: print(f"Skipping playback profile '{name}' (libvlc rejected its options)."); continue # libvlc_new() returns NULL for unknown options
+                self.vlc_instances[name] = instance
+            if self.mediaplayer is not None: self.mediaplayer.stop(); self.mediaplayer.release()
+            self.instance = instance; self.mediaplayer = instance.media_player_new(); self.profile_name = name; self.player_generation += 1
+            self._attach_vlc_events(); print(f"Playback profile: {self.playback_profiles.label(name)}")
+            if hasattr(self, 'video_frame') and self.video_frame.winId(): self._set_vlc_window(self.video_frame.winId())
+            return chain[position + 1:]
+        raise RuntimeError(self.tr("No playback profile could be started."))
+    def _attach_vlc_events(self):
+        """ Callbacks run on libvlc's event thread and must not call back into libvlc; they only filter and emit. """
+        events = self.mediaplayer.event_manager(); generation = self.player_generation
+        events.event_attach(vlc.EventType.MediaPlayerTimeChanged, self._on_vlc_time_changed)
+        events.event_attach(vlc.EventType.MediaPlayerPositionChanged, self._on_vlc_position_changed)
+        events.event_attach(vlc.EventType.MediaPlayerLengthChanged, lambda event: self.vlc_length_changed.emit(event.u.new_length))
+        events.event_attach(vlc.EventType.MediaPlayerEndReached, lambda event: self.vlc_end_reached.emit())
+        events.event_attach(vlc.EventType.MediaPlayerEncounteredError, lambda event: self.vlc_error.emit(generation))
+        events.event_attach(vlc.EventType.MediaPlayerPlaying, lambda event: self.vlc_playing.emit(generation))
+    def _on_vlc_time_changed(self, event):
+        second = event.u.new_time // 1000
+        with self.vlc_filter_lock:
+            if second == self.filter_second: return
+            self.filter_second = second; session = self.event_session
+        self.vlc_time_changed.emit(event.u.new_time, session)
+    def _on_vlc_position_changed(self, event):
+        value = min(1000, max(0, int(event.u.new_position * 1000)))
+        with self.vlc_filter_lock:
+            if value == self.filter_slider: return
+            self.filter_slider = value; session = self.event_session
+        self.vlc_position_changed.emit(value, session)
     def _setup_ui_views_and_layouts(self):
         self.player_widget = QWidget(); self.player_layout = QVBoxLayout(self.player_widget); self.player_layout.setContentsMargins(0,0,0,0); self.player_layout.setSpacing(0)
         self.video_frame = VideoFrame(); self.control_widget = QWidget(); self.control_layout = QHBoxLayout(self.control_widget); self.control_layout.setContentsMargins(5,5,5,5)
         self.play_button = QPushButton(); self.play_button.setIcon(self.style().standardIcon(QStyle.SP_MediaPlay)); self.stop_button = QPushButton(); self.stop_button.setIcon(self.style().standardIcon(QStyle.SP_MediaStop))
-        self.position_slider = QSlider(Qt.Horizontal); self.position_slider.setMaximum(1000); self.time_label = QLabel("00:00 / 00:00"); self.time_label.setStyleSheet("margin-left: 5px; margin-right: 5px;"); self.back_button = QPushButton(self.tr("Back to Library"))
-        self.control_layout.addWidget(self.play_button); self.control_layout.addWidget(self.stop_button); self.control_layout.addWidget(self.position_slider); self.control_layout.addWidget(self.time_label); self.control_layout.addStretch(); self.control_layout.addWidget(self.back_button)
+        self.position_slider = SeekPreviewSlider(Qt.Horizontal); self.position_slider.setMaximum(1000); self.time_label = QLabel("00:00 / 00:00"); self.time_label.setStyleSheet("margin-left: 5px; margin-right: 5px;"); self.back_button = QPushButton(self.tr("Back to Library"))
+        self.translate_button = QPushButton(self.tr("Translate")); self.translate_button.setToolTip(self.tr("Translate subtitles, starting at the current position")); self.translate_button.setEnabled(False)
+        self.profile_button = QToolButton(); self.profile_button.setText(self.tr("Profile")); self.profile_button.setToolTip(self.tr("Playback profile (decoding, caching, video output)"))
+        self.profile_menu = QMenu(self.profile_button); self.profile_button.setMenu(self.profile_menu); self.profile_button.setPopupMode(QToolButton.InstantPopup)
+        self.control_layout.addWidget(self.play_button); self.control_layout.addWidget(self.stop_button); self.control_layout.addWidget(self.position_slider); self.control_layout.addWidget(self.time_label); self.control_layout.addStretch(); self.control_layout.addWidget(self.profile_button); self.control_layout.addWidget(self.translate_button); self.control_layout.addWidget(self.back_button)
         self.player_layout.addWidget(self.video_frame, 1); self.player_layout.addWidget(self.control_widget)
         self.browser_widget = QWidget(); self.browser_layout = QVBoxLayout(self.browser_widget); self.tab_widget = QTabWidget(); self.library_tab = FileBrowser(); self.downloads_tab = DownloadsTab(); self.filmweb_tab = WebBrowserTab()
         self.tab_widget.addTab(self.library_tab, self.tr("Library")); self.tab_widget.addTab(self.downloads_tab, self.tr("Downloads")); self.tab_widget.addTab(self.filmweb_tab, self.tr("Filmweb")); self.browser_layout.addWidget(self.tab_widget)
@@ -80,26 +132,30 @@ class MoviePlayerApp(QMainWindow):
     def _connect_signals(self):
         self.library_tab.file_selected.connect(self.play_file); self.library_tab.find_subtitles_requested.connect(self.on_find_subtitles_requested); self.library_tab.translate_subtitle_requested.connect(self.on_translate_subtitle_requested)
         self.video_frame.doubleClicked.connect(self.toggle_video_fullscreen); self.video_frame.mouseMoved.connect(self.on_mouse_moved_over_video)
-        self.play_button.clicked.connect(self.play_pause); self.stop_button.clicked.connect(self.stop); self.position_slider.sliderMoved.connect(self.set_position); self.back_button.clicked.connect(self.show_browser)
-        self.filmweb_tab.search_requested.connect(self.on_web_search_requested)
-        self.subtitle_manager.search_results.connect(self.on_subtitle_search_results); self.subtitle_manager.search_error.connect(self.on_subtitle_search_error); self.subtitle_manager.download_ready.connect(self.on_subtitle_download_ready); self.subtitle_manager.download_error.connect(self.on_subtitle_download_error); self.subtitle_manager.login_status.connect(self.on_subtitle_login_status); self.subtitle_manager.quota_info.connect(self.on_subtitle_quota_info)
-        self.translator.translation_progress.connect(self.on_translation_progress); self.translator.translation_complete.connect(self.on_translation_complete); self.translator.translation_error.connect(self.on_translation_error)
+        self.play_button.clicked.connect(self.play_pause); self.stop_button.clicked.connect(self.stop); self.position_slider.sliderMoved.connect(self.set_position); self.back_button.clicked.connect(self.show_browser); self.translate_button.clicked.connect(self.on_translate_playing_requested)
+        self.vlc_time_changed.connect(self.on_vlc_time_changed); self.vlc_position_changed.connect(self.on_vlc_position_changed); self.vlc_length_changed.connect(self.on_vlc_length_changed)
+        self.vlc_end_reached.connect(self.on_vlc_end_reached); self.vlc_error.connect(self.on_vlc_error); self.vlc_playing.connect(self.on_vlc_playing); self.profile_menu.aboutToShow.connect(self._build_profile_menu)
+        self.filmweb_tab.search_requested.connect(self.on_web_search_requested); self.library_tab.thumbnailer.sprite_ready.connect(self.on_seek_preview_ready)
+        self.downloads_tab.download_finished.connect(self.library_tab.on_download_finished) # Finished downloads are converted for hardware decoding
+        self.subtitle_manager.search_results.connect(self.on_subtitle_search_results); self.subtitle_manager.season_search_results.connect(self.on_season_search_results); self.subtitle_manager.search_error.connect(self.on_subtitle_search_error); self.subtitle_manager.download_ready.connect(self.on_subtitle_download_ready); self.subtitle_manager.download_error.connect(self.on_subtitle_download_error); self.subtitle_manager.login_status.connect(self.on_subtitle_login_status); self.subtitle_manager.quota_info.connect(self.on_subtitle_quota_info)
+        self.translator.translation_progress.connect(self.on_translation_progress); self.translator.translation_complete.connect(self.on_translation_complete); self.translator.translation_error.connect(self.on_translation_error); self.translator.partial_translation_ready.connect(self.on_partial_translation_ready); self.translator.translation_cancelled.connect(self.on_translation_cancelled)
 
     # --- Helper to remove other SRTs ---
     def _remove_other_srt_files(self, video_filepath, keep_srt_filepath):
-        """ Removes all .srt files matching the video base name except the keep_srt_filepath """
+        """ Removes all .srt files matching the video base name except keep_srt_filepath (a path or a list of paths) """
         if not video_filepath or not keep_srt_filepath: return
         try:
             video_dir = os.path.dirname(video_filepath)
             video_base = os.path.splitext(os.path.basename(video_filepath))[0]
-            keep_filename_lower = os.path.basename(keep_srt_filepath).lower()
-            print(f"Checking for other SRTs for base '{video_base}' in '{video_dir}', keeping '{keep_filename_lower}'") # Debug
+            keep_paths = [keep_srt_filepath] if isinstance(keep_srt_filepath, str) else list(keep_srt_filepath)
+            keep_filenames_lower = {os.path.basename(path).lower() for path in keep_paths}
+            print(f"Checking for other SRTs for base '{video_base}' in '{video_dir}', keeping {sorted(keep_filenames_lower)}") # Debug
             for item in os.listdir(video_dir):
                 item_lower = item.lower()
                 # Check if it starts with video base name and ends with .srt
                 if item_lower.startswith(video_base.lower()) and item_lower.endswith('.srt'):
                     # Check if it's NOT the file we want to keep
-                    if item_lower != keep_filename_lower:
+                    if item_lower not in keep_filenames_lower:
                         other_srt_path = os.path.join(video_dir, item)
                         try:
                             print(f"  Deleting other subtitle file: {other_srt_path}") # Debug
@@ -198,7 +254,7 @@ class MoviePlayerApp(QMainWindow):
         self.show()
 
     # --- Playback Methods ---
-    # ... (show_browser, play_file, _play_file_continue, _set_vlc_window_and_play, _post_play_start_actions, _update_play_button_icon, play_pause, stop, update_ui, set_position unchanged) ...
+    # ... (show_browser, play_file, _play_file_continue, _set_vlc_window_and_play, _post_play_start_actions, _update_play_button_icon, play_pause, stop, set_position unchanged) ...
     def show_browser(self):
         if self.is_video_layout_fullscreen: print("show_browser: Exiting video layout."); self.exit_video_fullscreen_layout()
         self.stop(); self.stacked_widget.setCurrentWidget(self.browser_widget); self.setWindowTitle(self.tr("Raspberry Pi Movie Player"))
@@ -217,8 +273,11 @@ class MoviePlayerApp(QMainWindow):
     def _play_file_continue(self, filepath):
          try:
               print(f"_play_file_continue: Loading media: {filepath}")
+              chain = self.pending_profile_chain or self.playback_profiles.chain(filepath, self._media_info(filepath)); self.pending_profile_chain = None
+              self.profile_chain = self._switch_profile(chain) # Media objects belong to the instance that plays them
               self.media = self.instance.media_new(filepath); assert self.media, "Failed to create VLC media object."
-              self.mediaplayer.set_media(self.media)
+              self._reset_playback_ui()
+              self.mediaplayer.set_media(self.media); self.current_video_path = filepath; self._update_translate_button(); self._load_seek_preview(filepath)
               win_id = self.video_frame.winId()
               if not win_id: print("Window ID not immediate, delaying."); QTimer.singleShot(200, lambda: self._set_vlc_window_and_play(win_id))
               else: self._set_vlc_window_and_play(win_id)
@@ -229,53 +288,105 @@ class MoviePlayerApp(QMainWindow):
               traceback.print_exc(); self.show_browser()
 
     def _set_vlc_window_and_play(self, win_id_obj):
-         try: current_win_id = win_id_obj or self.video_frame.winId(); assert current_win_id; print("_set_vlc: Setting window, playing."); self._set_vlc_window(current_win_id); self.stacked_widget.setCurrentWidget(self.player_widget); self.control_widget.show(); play_result = self.mediaplayer.play(); assert play_result != -1; print(" play() called."); QTimer.singleShot(150, self._post_play_start_actions)
+         try: current_win_id = win_id_obj or self.video_frame.winId(); assert current_win_id; print("_set_vlc: Setting window, playing."); self._set_vlc_window(current_win_id); self.stacked_widget.setCurrentWidget(self.player_widget); self.control_widget.show(); self.tracking_playback = True; play_result = self.mediaplayer.play(); assert play_result != -1; print(" play() called."); QTimer.singleShot(150, self._post_play_start_actions)
          except Exception as e: self.show_cursor(); filepath = self.media.get_mrl() if self.media else "?"; QMessageBox.critical(self, self.tr("Playback Error"), self.tr("Start playback failed: {0}").format(e)); traceback.print_exc(); self.show_browser()
     def _post_play_start_actions(self):
          current_state = self.mediaplayer.get_state(); print(f"_post_play: State={current_state}"); self._update_play_button_icon();
+         if self.pending_resume_ms and current_state in [vlc.State.Playing, vlc.State.Paused]: self.mediaplayer.set_time(self.pending_resume_ms) # Restarted with another profile
+         self.pending_resume_ms = 0
          if current_state in [vlc.State.Playing, vlc.State.Paused]: self.is_playing = self.mediaplayer.is_playing();
-         if not self.timer.isActive(): self.timer.start();
          if not self.is_video_layout_fullscreen and self.is_playing: print("  Starting cursor timer."); self.cursor_hide_timer.start()
          elif not self.is_playing: self.show_cursor()
          else: print(f"Warn: Unexpected state {current_state}. Stopping."); self.stop()
+    def _load_seek_preview(self, video_path):
+        """ Shows the cached seek-preview sprite, or queues it (niced, in the background) for when it is ready. """
+        self.position_slider.clear_preview()
+        file_data = self.library_tab.file_model.file_data(video_path); media = (file_data or {}).get('media') or {}
+        sprite_path = self.library_tab.thumbnailer.sprite(video_path, media.get('duration'))
+        if sprite_path: self.position_slider.set_sprite(sprite_path)
+    @pyqtSlot(str, str)
+    def on_seek_preview_ready(self, video_path, sprite_path):
+        if video_path == self.current_video_path: self.position_slider.set_sprite(sprite_path)
     def _update_play_button_icon(self): is_playing = self.mediaplayer.is_playing(); self.play_button.setIcon(self.style().standardIcon(QStyle.SP_MediaPause if is_playing else QStyle.SP_MediaPlay))
     def play_pause(self):
         if self.mediaplayer.is_playing(): print("Pausing."); self.mediaplayer.pause(); self.is_playing = False; self.show_cursor()
         else:
             if self.mediaplayer.get_media(): print("Resuming/Playing."); play_result = self.mediaplayer.play();
             if play_result == -1: QMessageBox.warning(self, self.tr("Playback Error"), self.tr("Failed resume.")); return
-            self.is_playing = True;
-            if not self.timer.isActive(): self.timer.start()
+            self.is_playing = True; self.tracking_playback = True
             if not self.is_video_layout_fullscreen: self.cursor_hide_timer.start()
             else: print("Play/Pause: No media.");
         self._update_play_button_icon()
     def stop(self):
         print("Stop called."); media_exists = self.mediaplayer.get_media() is not None;
         if media_exists: self.mediaplayer.stop();
-        self._update_play_button_icon(); self.is_playing = False;
-        if self.timer.isActive(): self.timer.stop();
-        self.time_label.setText("00:00 / 00:00"); self.position_slider.setValue(0); self.show_cursor()
-    def update_ui(self):
-        if not self.timer.isActive(): return;
-        try: current_state = self.mediaplayer.get_state()
-        except Exception as e: print(f"Error getting state: {e}"); self.timer.isActive() and self.timer.stop(); return
-        if current_state in [vlc.State.Playing, vlc.State.Paused]:
-            media_length = self.mediaplayer.get_length()
-            if media_length > 0:
-                media_pos = self.mediaplayer.get_position(); current_msecs = self.mediaplayer.get_time()
-                if media_pos >= 0.0 and media_pos <= 1.01 and current_msecs >= 0:
-                     if not self.position_slider.isSliderDown(): self.position_slider.setValue(int(media_pos * 1000))
-                     current_secs = current_msecs // 1000; total_secs = media_length // 1000
-                     current_time_str = f"{current_secs // 60:02d}:{current_secs % 60:02d}"
-                     total_time_str = f"{total_secs // 60:02d}:{total_secs % 60:02d}"
-                     self.time_label.setText(f"{current_time_str} / {total_time_str}")
-            else:
-                if self.time_label.text() != "00:00 / --:--": self.time_label.setText("00:00 / --:--")
-                if not self.position_slider.isSliderDown(): self.position_slider.setValue(0)
-        elif current_state == vlc.State.Ended: print("Playback ended."); self.stop()
-        elif current_state == vlc.State.Error: print("VLC Error state."); QMessageBox.warning(self, self.tr("Playback Error"), self.tr("Playback error.")); self.show_browser()
-        elif current_state == vlc.State.Stopped:
-             if self.is_playing or self.timer.isActive(): print("VLC Stopped state."); self.stop()
+        self._update_play_button_icon(); self.is_playing = False; self.tracking_playback = False # Events still queued from before the stop are ignored
+        self._reset_playback_ui(); self.show_cursor()
+    def _reset_playback_ui(self):
+        """ Events filtered before this (still queued for the GUI thread) carry the old session and are dropped. """
+        with self.vlc_filter_lock: self.event_session += 1; self.filter_second = -1; self.filter_slider = -1
+        self.media_length = 0; self.last_time_second = -1; self.last_slider_pixel = -1
+        self.time_label.setText("00:00 / 00:00"); self.position_slider.setValue(0)
+    @staticmethod
+    def _format_time(msecs):
+        secs = max(0, msecs) // 1000; return f"{secs // 60:02d}:{secs % 60:02d}"
+    @pyqtSlot(int)
+    def on_vlc_length_changed(self, length):
+        self.media_length = length; self.position_slider.set_duration(length)
+    @pyqtSlot(int, int)
+    def on_vlc_time_changed(self, msecs, session):
+        """ Runs once per displayed second (filtered on libvlc's thread). """
+        if not self.tracking_playback or session != self.event_session: return
+        self.last_time_second = msecs // 1000 # Resume point for a profile fallback
+        total = self._format_time(self.media_length) if self.media_length > 0 else "--:--"
+        self.time_label.setText(f"{self._format_time(msecs)} / {total}")
+    @pyqtSlot(int, int)
+    def on_vlc_position_changed(self, value, session):
+        """ Moves the slider only when the handle would move by at least a pixel. """
+        if not self.tracking_playback or session != self.event_session or self.position_slider.isSliderDown(): return
+        pixel = value * self.position_slider.width() // 1000
+        if pixel == self.last_slider_pixel: return
+        self.last_slider_pixel = pixel; self.position_slider.setValue(value)
+    @pyqtSlot()
+    def on_vlc_end_reached(self):
+        if self.tracking_playback: print("Playback ended."); self.stop()
+    @pyqtSlot(int)
+    def on_vlc_error(self, generation):
+        """ Retries the video with the next profile of its chain (from where it failed); gives up when none is left. """
+        if generation != self.player_generation: return # From a player already replaced
+        print(f"VLC Error state (profile '{self.profile_name}')."); self.tracking_playback = False
+        video_path = self.current_video_path
+        if video_path and self.profile_chain:
+            failed = self.profile_name; next_name = self.profile_chain[0]
+            print(f"Falling back from playback profile '{failed}' to '{next_name}'."); self.playback_profiles.note_failed(video_path) # Saved once a profile plays it
+            self._restart_playback(self.profile_chain, max(0, self.last_time_second) * 1000); return
+        QMessageBox.warning(self, self.tr("Playback Error"), self.tr("Playback error.")); self.show_browser()
+    @pyqtSlot(int)
+    def on_vlc_playing(self, generation):
+        """ A video that fell back is pinned to the profile it now plays with, so it starts there next time. """
+        if generation != self.player_generation or not self.current_video_path: return
+        if self.playback_profiles.note_playing(self.current_video_path, self.profile_name): print(f"Playback profile '{self.profile_name}' saved for this file.")
+    def _restart_playback(self, chain, resume_ms):
+        self.pending_profile_chain = chain; self.pending_resume_ms = resume_ms; self.play_file(self.current_video_path)
+    def _media_info(self, video_path):
+        file_data = self.library_tab.file_model.file_data(video_path); return (file_data or {}).get('media') or None
+    def _build_profile_menu(self):
+        """ 'This file' and 'All <codec> files' sections, each with Automatic and every profile. """
+        self.profile_menu.clear(); video_path = self.current_video_path
+        if not video_path: self.profile_menu.addAction(self.tr("No video loaded")).setEnabled(False); return
+        playing = self.profile_menu.addAction(self.tr("Playing with: {0}").format(self.playback_profiles.label(self.profile_name))); playing.setEnabled(False)
+        codec = (self._media_info(video_path) or {}).get('video_codec')
+        sections = [(self.tr("This file"), self.playback_profiles.file_profile(video_path), lambda name: self.playback_profiles.set_file_profile(video_path, name))]
+        if codec: sections.append((self.tr("All {0} files").format(codec), self.playback_profiles.codec_profile(codec), lambda name: self.playback_profiles.set_codec_profile(codec, name)))
+        for title, current, apply in sections:
+            self.profile_menu.addSection(title); group = QActionGroup(self.profile_menu)
+            for name in [None] + self.playback_profiles.names():
+                action = self.profile_menu.addAction(self.tr("Automatic") if name is None else self.playback_profiles.label(name)); action.setCheckable(True); action.setChecked(name == current); group.addAction(action)
+                action.triggered.connect(lambda checked, name=name, apply=apply: self._on_profile_chosen(apply, name))
+    def _on_profile_chosen(self, apply, name):
+        apply(name); video_path = self.current_video_path
+        chain = self.playback_profiles.chain(video_path, self._media_info(video_path))
+        if chain[0] != self.profile_name and self.tracking_playback: print(f"Switching playback profile to '{chain[0]}'."); self._restart_playback(chain, max(0, self.mediaplayer.get_time())) # Continues where it was
     def set_position(self, position):
         if self.mediaplayer.is_seekable(): self.mediaplayer.set_position(position / 1000.0); self.show_cursor()
         else: print("Media not seekable.")
@@ -283,24 +394,64 @@ class MoviePlayerApp(QMainWindow):
     # --- Subtitle Handling Slots ---
     # ... (on_find_subtitles_requested - MODIFIED, on_subtitle_search_results - MODIFIED) ...
     # ... (on_subtitle_search_error, on_subtitle_selected, on_subtitle_download_ready, _download_subtitle_worker) ...
+    @staticmethod
+    def _parse_video_path(video_path):
+        """ Returns (cleaned_query, season, episode) for a video file; season/episode are None for movies. """
+        return parse_release_path(video_path) # Memoized; the library index parses the same names
+
     @pyqtSlot(str)
     def on_find_subtitles_requested(self, video_path):
         if not video_path: return
-        self.current_search_video_path = video_path; filename = os.path.basename(video_path); base_query = os.path.splitext(filename)[0]
-        season = None; episode = None; search_type = 'movie'; cleaned_query = base_query
-        test_name = filename.replace('.', ' ').replace('_', ' ')
-        match = SEASON_EPISODE_REGEX.search(test_name)
-        if match:
-            groups = match.groups(); print(f"Regex S/E Groups: {groups}")
-            if groups[0] is not None and groups[1] is not None: season = int(groups[0]); episode = int(groups[1]); search_type = 'episode'
-            elif groups[2] is not None and groups[3] is not None: season = int(groups[2]); episode = int(groups[3]); search_type = 'episode'
-            if season is not None and episode is not None:
-                 pattern_str = match.group(0).strip('._ -'); cleaned_query = base_query.replace(pattern_str, '', 1).strip('._ -')
-                 cleaned_query = CLEAN_QUERY_REGEX.sub('', cleaned_query).strip('._ -'); cleaned_query = re.sub(r'[._\-]+', ' ', cleaned_query).strip(); print(f" Series Detected. Query: '{cleaned_query}', S={season}, E={episode}")
-            else: cleaned_query = CLEAN_QUERY_REGEX.sub('', base_query).strip('._ -'); cleaned_query = re.sub(r'[._\-]+', ' ', cleaned_query).strip(); print(f" Movie/Uncertain Detected. Query: '{cleaned_query}'")
-        else: cleaned_query = CLEAN_QUERY_REGEX.sub('', base_query).strip('._ -'); cleaned_query = re.sub(r'[._\-]+', ' ', cleaned_query).strip(); print(f" Movie Detected. Query: '{cleaned_query}'")
-        languages = "en,pl"; print(f"Searching API: Type='{search_type}', Query='{cleaned_query}', S={season}, E={episode}, Lang={languages}"); QApplication.setOverrideCursor(Qt.WaitCursor)
-        self.subtitle_manager.search_subtitles(query=cleaned_query, languages=languages, season=season, episode=episode, type=search_type)
+        self.current_search_video_path = video_path
+        cleaned_query, season, episode = self._parse_video_path(video_path)
+        languages = "en,pl"
+        if season is None:
+            print(f" Movie Detected. Query: '{cleaned_query}'")
+            print(f"Searching API: Type='movie', Query='{cleaned_query}', Lang={languages}"); QApplication.setOverrideCursor(Qt.WaitCursor)
+            self.subtitle_manager.search_subtitles(query=cleaned_query, languages=languages, type='movie'); return
+        # Series: one query per (show, season), results are matched locally to every episode file
+        print(f" Series Detected. Query: '{cleaned_query}', S={season}, E={episode}")
+        cache_key = (cleaned_query.lower(), season, languages)
+        cached = self.season_subtitle_cache.get(cache_key)
+        if cached is not None:
+            print(f"Season cache hit for '{cleaned_query}' S{season}; no API call needed.")
+            self._show_season_results_for(video_path, episode, cached, cleaned_query, languages); return
+        self.pending_season_search = {'key': cache_key, 'video_path': video_path, 'episode': episode, 'languages': languages}
+        print(f"Searching API: Type='episode', Query='{cleaned_query}', S={season} (whole season), Lang={languages}"); QApplication.setOverrideCursor(Qt.WaitCursor)
+        self.subtitle_manager.search_season_subtitles(cleaned_query, season, languages=languages)
+    @pyqtSlot(str, int, list)
+    def on_season_search_results(self, query, season, results):
+        pending = self.pending_season_search; self.pending_season_search = None
+        if not pending or pending['key'][:2] != (query.lower(), season): print("Warn: Season results w/o matching context."); QApplication.restoreOverrideCursor(); return
+        by_episode = {}
+        for res in results:
+            if res.get('feature_episode') is not None: by_episode.setdefault(int(res['feature_episode']), []).append(res)
+        by_path = self._match_season_results_to_files(os.path.dirname(pending['video_path']), query, season, by_episode)
+        cached = {'by_episode': by_episode, 'by_path': by_path}; self.season_subtitle_cache[pending['key']] = cached
+        print(f"Season results: {len(results)} subtitles for {len(by_episode)} episode(s); matched {len(by_path)} local file(s).")
+        self._show_season_results_for(pending['video_path'], pending['episode'], cached, query, pending['languages'])
+    def _show_season_results_for(self, video_path, episode, cached, query, languages):
+        """ Shows cached season results for one episode, falling back to a per-episode API search when none matched. """
+        episode_results = cached['by_path'].get(video_path) or cached['by_episode'].get(episode, [])
+        if episode_results: self.on_subtitle_search_results(list(episode_results)); return
+        season = self._parse_video_path(video_path)[1]
+        print(f"No season results for E{episode}; falling back to episode search."); QApplication.setOverrideCursor(Qt.WaitCursor)
+        self.subtitle_manager.search_subtitles(query=query, languages=languages, season=season, episode=episode, type='episode')
+    def _match_season_results_to_files(self, video_dir, query, season, by_episode):
+        """ Maps each local episode file of (query, season) to its results, best release-name match first. """
+        matches = {}
+        try: dir_entries = os.listdir(video_dir)
+        except OSError as e: print(f"Warn: Cannot list '{video_dir}' for season matching: {e}"); return matches
+        for item in dir_entries:
+            if not self.library_tab.is_video_file(item): continue
+            item_query, item_season, item_episode = self._parse_video_path(os.path.join(video_dir, item))
+            if item_season != season or item_query.lower() != query.lower() or item_episode not in by_episode: continue
+            file_tokens = set(re.split(r'[._\- \[\]()]+', os.path.splitext(item)[0].lower())) - {''}
+            def release_score(res):
+                release_tokens = set(re.split(r'[._\- \[\]()]+', f"{res.get('release') or ''} {res.get('file_name') or ''}".lower())) - {''}
+                return len(file_tokens & release_tokens)
+            matches[os.path.join(video_dir, item)] = sorted(by_episode[item_episode], key=lambda r: (-release_score(r), -(r.get('download_count') or 0)))
+        return matches
     @pyqtSlot(list)
     def on_subtitle_search_results(self, results):
         QApplication.restoreOverrideCursor(); print(f"Received {len(results)} sub results.")
@@ -310,7 +461,7 @@ class MoviePlayerApp(QMainWindow):
         if not results: QMessageBox.information(self, self.tr("Subtitle Search"), self.tr("No subtitles found for '{0}'.").format(os.path.basename(self.current_search_video_path))); self.current_search_video_path = None; return
         dialog = SubtitleResultsDialog(results, self); dialog.subtitle_selected_for_download.connect(self.on_subtitle_selected); dialog.exec_()
     @pyqtSlot(str)
-    def on_subtitle_search_error(self, error_message): QApplication.restoreOverrideCursor(); QMessageBox.critical(self, self.tr("Subtitle Search Error"), self.tr("Failed search:\n{0}").format(error_message)); self.current_search_video_path = None
+    def on_subtitle_search_error(self, error_message): QApplication.restoreOverrideCursor(); self.pending_season_search = None; QMessageBox.critical(self, self.tr("Subtitle Search Error"), self.tr("Failed search:\n{0}").format(error_message)); self.current_search_video_path = None
     @pyqtSlot(dict)
     def on_subtitle_selected(self, subtitle_dict):
         if not self.current_search_video_path: print("Warn: Sub selected w/o context."); QMessageBox.warning(self, self.tr("Subtitle Download"), self.tr("Context lost.")); return
@@ -364,23 +515,88 @@ class MoviePlayerApp(QMainWindow):
     # --- Translation Handling Slots ---
     @pyqtSlot(str)
     def on_translate_subtitle_requested(self, srt_path):
-        if self.is_translating: QMessageBox.warning(self, self.tr("Translation Busy"), self.tr("Translation already in progress.")); return
+        """ Queues a library translation; several files (e.g. a season) can be queued while the dialog is open. """
         if not os.path.exists(srt_path): QMessageBox.critical(self, self.tr("Translation Error"), self.tr("Subtitle file not found:\n{0}").format(srt_path)); return
-        self.translation_progress_dialog = QProgressDialog(self.tr("Translating subtitle..."), self.tr("Cancel"), 0, 100, self)
-        self.translation_progress_dialog.setWindowTitle(self.tr("Translation Progress")); self.translation_progress_dialog.setWindowModality(Qt.WindowModal)
-        self.translation_progress_dialog.setAutoClose(True); self.translation_progress_dialog.setAutoReset(True)
-        self.translation_progress_dialog.canceled.connect(self.on_translation_cancel); self.translation_progress_dialog.setValue(0); self.translation_progress_dialog.show()
-        self.is_translating = True; print(f"Starting translation for: {srt_path}"); self.translator.translate_srt_file(srt_path)
-    @pyqtSlot(int, int)
-    def on_translation_progress(self, current_batch, total_batches):
-        if self.translation_progress_dialog:
-            self.translation_progress_dialog.setMaximum(total_batches); self.translation_progress_dialog.setValue(current_batch)
-            self.translation_progress_dialog.setLabelText(self.tr("Translating: Batch {0} of {1}").format(current_batch, total_batches)); QApplication.processEvents()
+        if srt_path in self.library_translations: return # Already queued
+        if not self.translation_jobs.submit(srt_path, PRIORITY_NORMAL): return # Rejected; reported via translation_error
+        print(f"Queued translation for: {srt_path}"); self.library_translations[srt_path] = (0, 0)
+        if not self.translation_progress_dialog:
+            self.library_translation_results = []
+            self.translation_progress_dialog = QProgressDialog(self.tr("Translating subtitle..."), self.tr("Cancel"), 0, 100, self)
+            self.translation_progress_dialog.setWindowTitle(self.tr("Translation Progress")); self.translation_progress_dialog.setWindowModality(Qt.NonModal)
+            self.translation_progress_dialog.setAutoClose(False); self.translation_progress_dialog.setAutoReset(False); self.translation_progress_dialog.setMinimumDuration(0)
+            self.translation_progress_dialog.canceled.connect(self.on_translation_cancel); self.translation_progress_dialog.setValue(0); self.translation_progress_dialog.show()
+        self._update_translation_dialog()
+    def _update_translation_dialog(self):
+        if not self.translation_progress_dialog: return
+        done = sum(progress[0] for progress in self.library_translations.values()); total = sum(progress[1] for progress in self.library_translations.values())
+        self.translation_progress_dialog.setMaximum(max(total, 1)); self.translation_progress_dialog.setValue(min(done, max(total, 1)))
+        self.translation_progress_dialog.setLabelText(self.tr("Translating {0} file(s): {1} of {2} lines").format(len(self.library_translations), done, total))
+    def _library_translation_done(self, srt_path):
+        """ Drops a finished library job; closes the dialog when none are left. Returns True if this ended the dialog's session. """
+        if self.library_translations.pop(srt_path, None) is None: return False
+        if self.library_translations: self._update_translation_dialog(); return False
+        if self.translation_progress_dialog: self.translation_progress_dialog.canceled.disconnect(self.on_translation_cancel); self.translation_progress_dialog.close(); self.translation_progress_dialog = None
+        return True
+    def _update_translate_button(self):
+        """ Player-bar Translate button: enabled when the playing video has a source subtitle and no progressive job runs. """
+        if self.progressive_translation: return # Shows progress until the job ends
+        self.translate_button.setText(self.tr("Translate"))
+        self.translate_button.setEnabled(bool(self.current_video_path and find_associated_srt(self.current_video_path)))
+    def on_translate_playing_requested(self):
+        """ Progressive translation of the playing video: subtitles near the playhead first, loaded while playback continues. """
+        if self.progressive_translation: QMessageBox.warning(self, self.tr("Translation Busy"), self.tr("Translation already in progress.")); return
+        srt_path = find_associated_srt(self.current_video_path) if self.current_video_path else None
+        if not srt_path: QMessageBox.warning(self, self.tr("Translation Error"), self.tr("No source subtitle found for this video.")); return
+        playhead_ms = max(0, self.mediaplayer.get_time())
+        self.progressive_translation = (self.current_video_path, srt_path); self.partial_cue_starts = None
+        self.translate_button.setEnabled(False); self.translate_button.setText(self.tr("Translating..."))
+        print(f"Starting progressive translation for: {srt_path} at {playhead_ms} ms")
+        if not self.translation_jobs.submit(srt_path, PRIORITY_PLAYBACK, playhead_ms=playhead_ms): self._finish_progressive_translation(srt_path)
+    def _attach_subtitle_to_player(self, srt_path):
+        """ Adds srt_path as a subtitle track of the current media (VLC reads it at once) and switches to it once VLC has created it. """
+        if not self.mediaplayer.get_media(): return
+        known = {track_id for track_id, _ in (self.mediaplayer.video_get_spu_description() or [])}
+        if self.mediaplayer.add_slave(vlc.MediaSlaveType.subtitle, pathlib.Path(srt_path).resolve().as_uri(), True) != 0: print(f"Warn: VLC could not load subtitle {srt_path}"); return
+        video_path = self.current_video_path; generation = self.player_generation
+        QTimer.singleShot(SUBTITLE_TRACK_SELECT_DELAY_MS, lambda: self._select_added_subtitle(known, video_path, generation))
+    def _select_added_subtitle(self, known, video_path, generation):
+        """ Selects the newest subtitle track not in known, which deselects the previously loaded one. """
+        if generation != self.player_generation or video_path != self.current_video_path or not self.mediaplayer.get_media(): return
+        added = [track_id for track_id, _ in (self.mediaplayer.video_get_spu_description() or []) if track_id not in known]
+        if added and max(added) != self.subtitle_spu: self.subtitle_spu = max(added); self.mediaplayer.video_set_spu(self.subtitle_spu)
+    @staticmethod
+    def _cues_near(starts, playhead_ms):
+        """ Number of cues (start times, sorted) from PARTIAL_RELOAD_BEHIND_MS before to PARTIAL_RELOAD_AHEAD_MS after the playhead. """
+        return bisect_left(starts, playhead_ms + PARTIAL_RELOAD_AHEAD_MS) - bisect_left(starts, playhead_ms - PARTIAL_RELOAD_BEHIND_MS)
+    def _finish_progressive_translation(self, original_srt_path, translated_srt_path=None):
+        """ Attaches the final file of a progressive job to the still-playing video and resets the player bar. Returns True for progressive jobs. """
+        progressive = bool(self.progressive_translation and self.progressive_translation[1] == original_srt_path)
+        if progressive:
+            video_path = self.progressive_translation[0]; self.progressive_translation = None; self.partial_cue_starts = None
+            if translated_srt_path and video_path == self.current_video_path: self._attach_subtitle_to_player(translated_srt_path)
+        self._update_translate_button(); return progressive
+    @pyqtSlot(str, str)
+    def on_partial_translation_ready(self, original_srt_path, partial_srt_path):
+        """ Reloads the partial file only when it adds cues around the playhead; every load adds a VLC track that cannot be removed. """
+        if not (self.progressive_translation and self.progressive_translation == (self.current_video_path, original_srt_path)): return
+        try: starts = parse_srt(partial_srt_path, 'utf-8').starts # Written by the translator as UTF-8
+        except (OSError, LookupError, ValueError) as e: print(f"Warn: Could not read partial translation: {e}"); return
+        playhead_ms = max(0, self.mediaplayer.get_time())
+        if self.partial_cue_starts is not None and self._cues_near(starts, playhead_ms) <= self._cues_near(self.partial_cue_starts, playhead_ms): return
+        print(f"Loading partial translation: {partial_srt_path}"); self.partial_cue_starts = starts; self._attach_subtitle_to_player(partial_srt_path)
+    @pyqtSlot(str, int, int)
+    def on_translation_progress(self, srt_path, translated_lines, total_lines):
+        if self.progressive_translation and self.progressive_translation[1] == srt_path: self.translate_button.setText(self.tr("Translating {0}%").format(translated_lines * 100 // max(total_lines, 1)))
+        if srt_path in self.library_translations: self.library_translations[srt_path] = (translated_lines, total_lines); self._update_translation_dialog()
     @pyqtSlot(str, str)
     def on_translation_complete(self, original_srt_path, translated_srt_path):
         """ Handle successful translation: Show message, remove other SRTs, refresh list """
-        print(f"Translation complete: {translated_srt_path}"); self.is_translating = False
-        if self.translation_progress_dialog: self.translation_progress_dialog.setValue(self.translation_progress_dialog.maximum()); self.translation_progress_dialog = None
+        print(f"Translation complete: {translated_srt_path}")
+        from_library = original_srt_path in self.library_translations
+        if from_library: self.library_translation_results.append(translated_srt_path)
+        session_done = self._library_translation_done(original_srt_path)
+        progressive = self._finish_progressive_translation(original_srt_path, translated_srt_path)
 
         # --- Remove ALL other SRTs (including original source) ---
         video_path_for_subs = None
@@ -401,7 +617,7 @@ class MoviePlayerApp(QMainWindow):
                 break
 
         if video_path_for_subs:
-            self._remove_other_srt_files(video_path_for_subs, translated_srt_path)
+            self._remove_other_srt_files(video_path_for_subs, [translated_srt_path, *self.translator.output_paths(original_srt_path).values()]) # Keep every target language
         else:
             # Fallback: only delete the original source if video path couldn't be guessed
             print(f"Warning: Could not determine video path for '{original_srt_path}'. Only deleting original source.")
@@ -411,15 +627,21 @@ class MoviePlayerApp(QMainWindow):
         # --- End Remove ---
 
         self.library_tab.refresh_files() # Refresh list
-        QMessageBox.information(self, self.tr("Translation Complete"), self.tr("Translation saved to:\n{0}").format(os.path.basename(translated_srt_path))) # Notify user
+        if progressive or not from_library or not session_done: return # Already on screen, or more queued files to come
+        if len(self.library_translation_results) == 1: QMessageBox.information(self, self.tr("Translation Complete"), self.tr("Translation saved to:\n{0}").format(os.path.basename(translated_srt_path))) # Notify user
+        else: QMessageBox.information(self, self.tr("Translation Complete"), self.tr("{0} subtitles translated.").format(len(self.library_translation_results)))
     @pyqtSlot(str, str)
     def on_translation_error(self, original_srt_path, error_message):
-        print(f"Translation failed for {original_srt_path}: {error_message}"); self.is_translating = False
-        if self.translation_progress_dialog: self.translation_progress_dialog.cancel(); self.translation_progress_dialog = None
+        print(f"Translation failed for {original_srt_path}: {error_message}"); self._finish_progressive_translation(original_srt_path); self._library_translation_done(original_srt_path)
         QMessageBox.critical(self, self.tr("Translation Error"), self.tr("Failed translate {0}:\n{1}").format(os.path.basename(original_srt_path), error_message))
         self.library_tab.refresh_files()
     def on_translation_cancel(self):
-        print("Translation cancelled by user."); self.is_translating = False; self.translation_progress_dialog = None
+        """ Progress dialog Cancel: drops queued library files and stops running ones after their batches in flight. """
+        print("Translation cancelled by user."); self.translation_progress_dialog = None
+        for srt_path in list(self.library_translations): self.translation_jobs.cancel(srt_path)
+    @pyqtSlot(str)
+    def on_translation_cancelled(self, srt_path):
+        print(f"Translation cancelled: {srt_path}"); self._finish_progressive_translation(srt_path); self._library_translation_done(srt_path)
 
     # --- Slot for Web Browser Search Request ---
     # ... (on_web_search_requested unchanged) ...
@@ -446,7 +668,9 @@ class MoviePlayerApp(QMainWindow):
     def closeEvent(self, event):
         print("Closing application..."); self.stop()
         if hasattr(self.downloads_tab, 'downloader') and hasattr(self.downloads_tab.downloader, 'shutdown'): print("Shutting down torrent manager..."); self.downloads_tab.downloader.shutdown()
-        if hasattr(self, 'subtitle_manager') and self.subtitle_manager.logged_in: print("Logging out from OpenSubtitles..."); self.subtitle_manager.logout(); QTimer.singleShot(500, event.accept); event.ignore()
-        else: event.accept()
+        self.library_tab.subtitle_extractor.shutdown(); self.library_tab.media_prober.shutdown(); self.library_tab.thumbnailer.shutdown(); self.library_tab.transcoder.shutdown(); self.library_tab.library_scanner.cancel(); self.library_tab.library_watcher.stop()
+        self.translation_jobs.cancel_all() # Unfinished jobs resume from their journals next time
+        # The OpenSubtitles session is kept (not logged out) so its cached token can be reused on next launch
+        event.accept()
 
 # --- END OF FILE source/movie_player.py ---
\ No newline at end of file
@@ -0,0 +1,104 @@
+# --- START OF FILE source/playback_profiles.py ---
+
+"""
+Playback profiles for the Raspberry Pi Movie Player App.
+A profile is a named set of libvlc options (hardware decoding, file/network
+caching, video output module, post-processing level) that the player's
+vlc.Instance is built with. The profile for a video is chosen per file, then
+per codec, then from its probe result (hardware-decodable or not); if playback
+fails, the player falls back along the rest of the chain, and the profile that
+then plays becomes the file's choice. Choices and extra or overridden profiles
+are kept in a JSON file in the config directory.
+"""
+
+import os
+import threading
+
+from source.storage import config_path, load_json, save_json
+from source.media_prober import needs_software_decode
+
+# --- Configuration ---
+PROFILES_FILENAME = "playback_profiles.json"
+# name -> (label, libvlc options). The Pi 4 profile decodes through the DRM hwaccel of Raspberry Pi OS's VLC build.
+BUILTIN_PROFILES = {
+    'pi4_hw': ("Pi 4 HW decode", ['--avcodec-hw=drm', '--vout=gles2,any', '--file-caching=1000', '--network-caching=1500', '--postproc-q=0']),
+    'usb_hdd': ("USB HDD high caching", ['--avcodec-hw=any', '--file-caching=5000', '--network-caching=5000']), # Rides out spin-up and seek stalls
+    'low_latency': ("Low latency", ['--file-caching=150', '--network-caching=300', '--clock-jitter=0', '--clock-synchro=0', '--drop-late-frames', '--skip-frames']),
+    'software': ("Software decode", ['--avcodec-hw=none', '--avcodec-threads=0', '--avcodec-skiploopfilter=4', '--postproc-q=0', '--file-caching=2000']), # Skips deblocking to keep up on the CPU
+    'default': ("VLC defaults", []),
+}
+DEFAULT_PROFILE = os.getenv("PLAYBACK_PROFILE", "pi4_hw") # Videos not probed yet
+SOFTWARE_DECODE_PROFILE = "software" # Probed videos the Pi cannot decode in hardware
+FALLBACK_PROFILES = ["software", "default"] # Tried in order after the chosen profile fails
+MAX_FILE_CHOICES = 500
+# --- End Configuration ---
+
+
+class PlaybackProfiles:
+    """ Thread-safe profile table and per-file/per-codec choices, persisted to the config directory. """
+
+    def __init__(self, path=None):
+        self.path = path or config_path(PROFILES_FILENAME); self.lock = threading.Lock()
+        saved = load_json(self.path, default={}) or {}
+        self.profiles = {name: {'label': label, 'options': list(options)} for name, (label, options) in BUILTIN_PROFILES.items()}
+        for name, profile in (saved.get('profiles') or {}).items(): # User-defined or tuned profiles
+            if isinstance(profile, dict) and isinstance(profile.get('options'), list): self.profiles[name] = {'label': profile.get('label') or name, 'options': [str(option) for option in profile['options']]}
+        self.custom = saved.get('profiles') or {}
+        self.files = {path: name for path, name in (saved.get('files') or {}).items() if name in self.profiles}
+        self.codecs = {codec: name for codec, name in (saved.get('codecs') or {}).items() if name in self.profiles}
+        self.failed_files = set() # Files that failed with a profile this session and have not played since
+
+    def names(self):
+        return list(self.profiles)
+
+    def label(self, name):
+        return self.profiles[name]['label'] if name in self.profiles else name
+
+    def options(self, name):
+        return list(self.profiles[name]['options'])
+
+    def file_profile(self, video_path):
+        with self.lock: return self.files.get(video_path)
+
+    def codec_profile(self, codec):
+        with self.lock: return self.codecs.get((codec or '').lower())
+
+    def chain(self, video_path, media=None):
+        """ Profiles to try for a video, best first: its own choice, its codec's, the automatic one, then the fallbacks. """
+        codec = (media or {}).get('video_codec')
+        automatic = (SOFTWARE_DECODE_PROFILE if needs_software_decode(media) else DEFAULT_PROFILE) if codec else DEFAULT_PROFILE
+        chain = []
+        for name in [self.file_profile(video_path), self.codec_profile(codec), automatic, *FALLBACK_PROFILES]:
+            if name in self.profiles and name not in chain: chain.append(name)
+        return chain
+
+    def set_file_profile(self, video_path, name):
+        """ name None: back to automatic. """
+        with self.lock:
+            self.files.pop(video_path, None)
+            if name: self.files[video_path] = name # Most recent last, so the oldest choices are dropped first
+            while len(self.files) > MAX_FILE_CHOICES: self.files.pop(next(iter(self.files)))
+        self.save()
+
+    def note_failed(self, video_path):
+        """ Playback of video_path failed; the profile it next plays with is saved as its choice (see note_playing). """
+        with self.lock: self.failed_files.add(video_path)
+
+    def note_playing(self, video_path, name):
+        """ video_path is playing with profile name. Saves name as its profile if it got there by falling back; returns True then. """
+        with self.lock:
+            if video_path not in self.failed_files: return False
+            self.failed_files.discard(video_path)
+        self.set_file_profile(video_path, name); return True
+
+    def set_codec_profile(self, codec, name):
+        with self.lock:
+            if name: self.codecs[codec.lower()] = name
+            else: self.codecs.pop(codec.lower(), None)
+        self.save()
+
+    def save(self):
+        with self.lock: data = {'profiles': self.custom, 'files': dict(self.files), 'codecs': dict(self.codecs)}
+        save_json(self.path, data)
+
+# --- END OF FILE source/playback_profiles.py ---
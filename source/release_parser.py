@@ -0,0 +1,95 @@
+# --- START OF FILE source/release_parser.py ---
+
+"""
+Release name parser for the Raspberry Pi Movie Player App.
+Turns video file names such as 'Show.Name.S02E05.Episode.Title.1080p.WEB-DL.mkv'
+into (title, season, episode). Used for subtitle searches and, at index time,
+to group the library by show and season. Results are memoized by file name, so
+re-indexing or regrouping a large library parses each name only once.
+"""
+
+import os
+import re
+import datetime
+from collections import namedtuple
+from functools import lru_cache
+
+# --- Configuration ---
+PARSE_CACHE_SIZE = 65536 # File names kept memoized (a few MB for a very large library)
+# --- End Configuration ---
+
+# Regex for Season/Episode Extraction ('S01E02', 'Season 1 Episode 2', '1x02'; 'x264'/'x265' are codecs, not episodes)
+SEASON_EPISODE_REGEX = re.compile(
+    r'(?:^|[._ \-])(?:s|season[._ \-]?)?(\d{1,3})[._ \-]?(?:e|ep|episode[._ \-]?|x(?!26[45]))(\d{1,3})[._ \-]|'
+    r'(?:^|[._ \-])(\d{1,3})x(\d{1,3})[._ \-]',
+    re.IGNORECASE
+)
+# Scene/P2P release tags (resolution, source, codec, audio, edition); the title ends at the first one.
+# Bare 'WEB' and edition words count only in capitals, as releases write them ('Charlotte's Web', 'The Extended Family').
+RELEASE_TAG_REGEX = re.compile(
+    r'(?<![^._ \-\[(])(?:'
+    r'(?:480|576|720|1080|1440|2160|4320)[pi]|4k|uhd|'
+    r'blu-?ray|bd-?(?:rip|remux)|br-?rip|remux|web[.\-]?(?:dl|rip)|(?-i:WEB)|[hps]dtv|dvd(?:rip|scr|r)?|hd-?rip|hdcam|'
+    r'[xh]\.?26[45]|hevc|avc|xvid|divx|av1|vp9|10-?bit|hdr(?:10)?|'
+    r'dts(?:-?hd)?|ac3|e-?ac-?3|e?aac(?:2\.0)?|dd[p+]?[257]\.?[01]|truehd|atmos|flac|'
+    r'(?-i:PROPER|REPACK|EXTENDED|UNRATED|REMASTERED|INTERNAL|LIMITED|MULTI|DUBBED|SUBBED)'
+    r')(?![^._ \-\])])',
+    re.IGNORECASE
+)
+# The release year follows the title ('Heat.1995.Remastered.1080p'); the last one before the tags ends it ('Wonder.Woman.1984.2020')
+YEAR_REGEX = re.compile(r'(?<![^._ \-\[(])\(?((?:19|20)\d{2})\)?(?![^._ \-\])])')
+LATEST_RELEASE_YEAR = datetime.date.today().year + 1 # 'Blade.Runner.2049' keeps its 2049
+BRACKETS_REGEX = re.compile(r'\[.*?\]|\(.*?\)') # '[Group]', '(US)'; dropped from titles
+SEPARATORS_REGEX = re.compile(r'[._\-]+')
+SEASON_DIR_REGEX = re.compile(r'^(?:s|season|sezon)[._ \-]*\d{1,3}$', re.IGNORECASE) # 'Season 1', 'S01', ...
+
+PARSER_VERSION = 2 # Bumped when parsing changes, so titles stored by the library index are parsed again
+ReleaseInfo = namedtuple('ReleaseInfo', ['title', 'season', 'episode']) # season/episode are None for movies
+
+
+def _clean_title(text):
+    """ Title part of a release name: up to its release year or first release tag, without bracketed groups. """
+    tag = next((match for match in RELEASE_TAG_REGEX.finditer(text) if match.start() > 0), None)
+    end = tag.start() if tag else len(text)
+    # A leading year is part of the title ('1917', '2001.A.Space.Odyssey.1968')
+    years = [match for match in YEAR_REGEX.finditer(text, 0, end) if match.start() > 0 and int(match.group(1)) <= LATEST_RELEASE_YEAR]
+    if years: end = years[-1].start()
+    text = BRACKETS_REGEX.sub(' ', text[:end]).strip('._ -[(')
+    return SEPARATORS_REGEX.sub(' ', text).strip()
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_release_name(filename):
+    """ Returns ReleaseInfo(title, season, episode) for a video file name (not a path). The title is empty for names like 'S01E02.mkv'. """
+    base_query = os.path.splitext(filename)[0]
+    test_name = filename.replace('.', ' ').replace('_', ' ') # Same length as filename, so match offsets apply to it
+    match = SEASON_EPISODE_REGEX.search(test_name)
+    if match:
+        groups = match.groups()
+        if groups[0] is not None: season, episode = int(groups[0]), int(groups[1])
+        else: season, episode = int(groups[2]), int(groups[3])
+        # The show is what precedes the marker; what follows is the episode title and release tags
+        return ReleaseInfo(_clean_title(base_query[:match.start()]), season, episode)
+    return ReleaseInfo(_clean_title(base_query), None, None)
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _directory_title(directory):
+    """ Title from the folder a video sits in, skipping 'Season N' folders. """
+    name = os.path.basename(directory)
+    if SEASON_DIR_REGEX.match(name): name = os.path.basename(os.path.dirname(directory))
+    return parse_release_name(name + ".dir").title # Suffix so a dotted folder name keeps its last word
+
+
+def parse_release_path(video_path):
+    """ parse_release_name for a path; names without a title ('S01E02.mkv') take the folder's. """
+    info = parse_release_name(os.path.basename(video_path))
+    if info.title: return info
+    return info._replace(title=_directory_title(os.path.dirname(video_path)))
+
+
+def show_key(title):
+    """ Grouping key: 'The.Office.US', 'the office us' and 'The Office US' are one show. """
+    return " ".join(title.casefold().split())
+
+# --- END OF FILE source/release_parser.py ---
@@ -0,0 +1,73 @@
+# --- START OF FILE source/seek_slider.py ---
+
+"""
+Seek slider for the Raspberry Pi Movie Player App.
+A position slider that shows the frame and time under the mouse while hovering,
+cut from the video's seek-preview sprite sheet (see thumbnailer.py), so the
+preview never touches the video file itself.
+"""
+
+from PyQt5.QtWidgets import QSlider, QLabel, QWidget, QVBoxLayout, QStyle, QStyleOptionSlider
+from PyQt5.QtGui import QPixmap
+from PyQt5.QtCore import Qt, QPoint
+
+from source.thumbnailer import SPRITE_TILES, SPRITE_COLUMNS, SPRITE_TILE_WIDTH
+
+
+def format_position(msecs):
+    secs = max(0, int(msecs)) // 1000; hours, rest = divmod(secs, 3600)
+    return f"{hours}:{rest // 60:02d}:{rest % 60:02d}" if hours else f"{rest // 60:02d}:{rest % 60:02d}"
+
+
+class SeekPreviewSlider(QSlider):
+    """ QSlider whose hover popup shows the preview tile and time at the mouse position. """
+
+    def __init__(self, orientation, parent=None):
+        super().__init__(orientation, parent)
+        self.setMouseTracking(True) # Hover without a pressed button
+        self.sprite = None; self.duration_ms = 0
+        self.popup = QWidget(self, Qt.ToolTip); self.popup.setStyleSheet("background-color: black; color: white;")
+        popup_layout = QVBoxLayout(self.popup); popup_layout.setContentsMargins(2, 2, 2, 2); popup_layout.setSpacing(2)
+        self.frame_label = QLabel(); self.time_label = QLabel(); self.time_label.setAlignment(Qt.AlignCenter)
+        popup_layout.addWidget(self.frame_label); popup_layout.addWidget(self.time_label)
+
+    def set_sprite(self, sprite_path):
+        pixmap = QPixmap(sprite_path)
+        self.sprite = None if pixmap.isNull() else pixmap
+
+    def set_duration(self, duration_ms):
+        self.duration_ms = duration_ms
+
+    def clear_preview(self):
+        self.sprite = None; self.duration_ms = 0; self.popup.hide()
+
+    def _fraction_at(self, x):
+        """ Slider position under x, as a fraction of the range (same mapping QSlider uses for clicks). """
+        option = QStyleOptionSlider(); self.initStyleOption(option)
+        groove = self.style().subControlRect(QStyle.CC_Slider, option, QStyle.SC_SliderGroove, self)
+        handle = self.style().subControlRect(QStyle.CC_Slider, option, QStyle.SC_SliderHandle, self)
+        value = QStyle.sliderValueFromPosition(self.minimum(), self.maximum(), x - groove.x() - handle.width() // 2, max(1, groove.width() - handle.width()))
+        return (value - self.minimum()) / max(1, self.maximum() - self.minimum())
+
+    def _tile(self, fraction):
+        tile = min(int(fraction * SPRITE_TILES), SPRITE_TILES - 1); rows = -(-SPRITE_TILES // SPRITE_COLUMNS)
+        tile_height = self.sprite.height() // rows
+        return self.sprite.copy((tile % SPRITE_COLUMNS) * SPRITE_TILE_WIDTH, (tile // SPRITE_COLUMNS) * tile_height, SPRITE_TILE_WIDTH, tile_height)
+
+    def mouseMoveEvent(self, event):
+        super().mouseMoveEvent(event)
+        if self.sprite is None and not self.duration_ms: self.popup.hide(); return
+        fraction = self._fraction_at(event.pos().x())
+        self.frame_label.setVisible(self.sprite is not None)
+        if self.sprite is not None: self.frame_label.setPixmap(self._tile(fraction))
+        self.time_label.setVisible(bool(self.duration_ms)); self.time_label.setText(format_position(fraction * self.duration_ms))
+        self.popup.adjustSize()
+        self.popup.move(self.mapToGlobal(QPoint(event.pos().x() - self.popup.width() // 2, -self.popup.height() - 4))); self.popup.show()
+
+    def leaveEvent(self, event):
+        self.popup.hide(); super().leaveEvent(event)
+
+    def hideEvent(self, event):
+        self.popup.hide(); super().hideEvent(event)
+
+# --- END OF FILE source/seek_slider.py ---
@@ -0,0 +1,220 @@
+# --- START OF FILE source/srt_parser.py ---
+
+"""
+Streaming SRT parser for the Raspberry Pi Movie Player App.
+Reads subtitle files line by line in a single pass, detects the encoding
+incrementally (stopping as soon as the detector is confident) and stores cues
+compactly: timings in int arrays (milliseconds), text in a flat list.
+"""
+
+import os
+import re
+import codecs
+import threading
+from array import array
+
+from source.storage import atomic_write_bytes, load_json, save_json
+
+try:
+    from chardet.universaldetector import UniversalDetector
+    CHARDET_AVAILABLE = True
+except ImportError:
+    print("WARNING: 'chardet' library not found. Non-UTF-8 subtitles may be decoded incorrectly.")
+    CHARDET_AVAILABLE = False
+
+# --- Configuration ---
+DETECT_CHUNK_SIZE = 16 * 1024 # Bytes fed to the detector per step
+DETECT_MAX_BYTES = 512 * 1024 # Stop detecting after this many bytes even if not confident
+DEFAULT_ENCODING = 'utf-8'
+SUBTITLE_INDEX_FILENAME = ".hackflix-subtitles.json" # Per-directory index of subtitles already normalized to UTF-8
+# --- End Configuration ---
+
+TIMING_REGEX = re.compile(r'(\d+):(\d{1,2}):(\d{1,2})[,.](\d{1,3})\s*-->\s*(\d+):(\d{1,2}):(\d{1,2})[,.](\d{1,3})')
+TAG_REGEX = re.compile(r'(?<!\\)\{[^}]*\}|<[^>]*>') # Same tags pysrt strips for text_without_tags
+# chardet often reports Central European (Polish) text as a Western/Turkish code page; these are re-scored
+SINGLE_BYTE_LATIN_ENCODINGS = ('windows-1250', 'iso-8859-2', 'windows-1252', 'iso-8859-1', 'windows-1254', 'iso-8859-9')
+LATIN_CANDIDATES = ('windows-1250', 'iso-8859-2', 'windows-1252')
+BOMS = ((codecs.BOM_UTF8, 'utf-8-sig'), (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16'))
+
+
+def _score_latin_decoding(sample, encoding):
+    """ Higher is better: non-ASCII letters count for, symbols and control characters against. """
+    score = 0
+    for ch in sample.decode(encoding, errors='replace'):
+        if ch < '\x80': continue
+        score += 1 if ch.isalpha() else -3
+    return score
+
+
+def _refine_single_byte(sample, encoding):
+    """ Picks the Latin code page whose decoding of sample looks most like real text. """
+    if codecs.lookup(encoding).name not in {codecs.lookup(e).name for e in SINGLE_BYTE_LATIN_ENCODINGS}: return encoding
+    candidates = [encoding] + [c for c in LATIN_CANDIDATES if codecs.lookup(c).name != codecs.lookup(encoding).name] # Ties keep chardet's answer
+    return max(candidates, key=lambda candidate: _score_latin_decoding(sample, candidate))
+
+
+def detect_encoding_bytes(chunks):
+    """
+    Detects the encoding of data given as an iterable of byte chunks.
+    Consumes chunks only until the answer is known: a BOM, a confident chardet
+    result, or DETECT_MAX_BYTES of input.
+    """
+    utf8_decoder = codecs.getincrementaldecoder('utf-8')(); utf8_ok = True
+    detector = UniversalDetector() if CHARDET_AVAILABLE else None
+    seen = 0; first = True; exhausted = True; sample = []
+    for chunk in chunks:
+        if first:
+            first = False
+            for bom, bom_encoding in BOMS:
+                if chunk.startswith(bom): return bom_encoding
+        if utf8_ok:
+            try: utf8_decoder.decode(chunk)
+            except UnicodeDecodeError: utf8_ok = False
+        if not utf8_ok: sample.append(chunk)
+        if detector is not None and not utf8_ok:
+            detector.feed(chunk)
+            if detector.done: exhausted = False; break
+        seen += len(chunk)
+        if seen >= DETECT_MAX_BYTES: exhausted = False; break
+    if utf8_ok:
+        # A truncated multi-byte sequence at the sample boundary is fine; at real EOF it is not
+        if not exhausted: return 'utf-8'
+        try: utf8_decoder.decode(b'', final=True); return 'utf-8'
+        except UnicodeDecodeError: pass
+    if detector is None: return DEFAULT_ENCODING
+    detector.close(); encoding = (detector.result or {}).get('encoding')
+    if not encoding: return DEFAULT_ENCODING
+    try: return _refine_single_byte(b"".join(sample), encoding.lower())
+    except LookupError: return DEFAULT_ENCODING
+
+
+def detect_encoding(filepath):
+    """ Detects the encoding of a file, reading only as much of it as needed. """
+    def _chunks():
+        with open(filepath, 'rb') as f:
+            while True:
+                chunk = f.read(DETECT_CHUNK_SIZE)
+                if not chunk: return
+                yield chunk
+    return detect_encoding_bytes(_chunks())
+
+
+_index_lock = threading.Lock()
+
+
+def _subtitle_index_path(srt_path):
+    return os.path.join(os.path.dirname(os.path.abspath(srt_path)), SUBTITLE_INDEX_FILENAME)
+
+
+def record_normalized_subtitle(srt_path, source_encoding):
+    """ Records in the directory's sidecar index that srt_path is UTF-8 (converted from source_encoding). """
+    try: st = os.stat(srt_path)
+    except OSError as e: print(f"Warning: Cannot index subtitle '{srt_path}': {e}"); return
+    entry = {'encoding': 'utf-8', 'source_encoding': source_encoding, 'size': st.st_size, 'mtime': st.st_mtime}
+    with _index_lock:
+        index_path = _subtitle_index_path(srt_path); index = load_json(index_path, default={}) or {}
+        index[os.path.basename(srt_path)] = entry; save_json(index_path, index)
+
+
+def indexed_encoding(srt_path):
+    """ Returns the recorded encoding if srt_path is unchanged since it was normalized, else None. """
+    try: st = os.stat(srt_path)
+    except OSError: return None
+    with _index_lock: index = load_json(_subtitle_index_path(srt_path), default={}) or {}
+    entry = index.get(os.path.basename(srt_path))
+    if entry and entry.get('size') == st.st_size and entry.get('mtime') == st.st_mtime: return entry.get('encoding')
+    return None
+
+
+def normalize_subtitle_bytes(data):
+    """ Decodes raw subtitle bytes with the detected encoding. Returns (utf8_bytes, source_encoding). """
+    source_encoding = detect_encoding_bytes(data[i:i + DETECT_CHUNK_SIZE] for i in range(0, len(data), DETECT_CHUNK_SIZE))
+    try: text = data.decode(source_encoding, errors='replace')
+    except LookupError: source_encoding = DEFAULT_ENCODING; text = data.decode(DEFAULT_ENCODING, errors='replace')
+    return text.lstrip('\ufeff').replace('\r\n', '\n').encode('utf-8'), source_encoding
+
+
+def write_normalized_subtitle(srt_path, data):
+    """ Atomically writes raw subtitle bytes to srt_path as UTF-8 and indexes it. Returns the source encoding. """
+    utf8_data, source_encoding = normalize_subtitle_bytes(data)
+    atomic_write_bytes(srt_path, utf8_data)
+    record_normalized_subtitle(srt_path, source_encoding)
+    return source_encoding
+
+
+def strip_tags(text):
+    """ Removes <i>-style and {\\an8}-style formatting tags. """
+    return TAG_REGEX.sub('', text)
+
+
+def format_timestamp(ms):
+    hours, rem = divmod(max(ms, 0), 3600000); minutes, rem = divmod(rem, 60000); seconds, millis = divmod(rem, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{millis:03d}"
+
+
+class SrtCues:
+    """
+    Compact cue storage: start/end times in milliseconds in int arrays, text in a flat list.
+    Cue i is (starts[i], ends[i], texts[i]).
+    """
+    __slots__ = ('starts', 'ends', 'texts', 'encoding')
+
+    def __init__(self, encoding=None):
+        self.starts = array('i'); self.ends = array('i'); self.texts = []; self.encoding = encoding
+
+    def __len__(self): return len(self.texts)
+
+    def append(self, start_ms, end_ms, text):
+        self.starts.append(start_ms); self.ends.append(end_ms); self.texts.append(text)
+
+    def plain_text(self, i): return strip_tags(self.texts[i])
+
+    def plain_texts(self): return [strip_tags(text) for text in self.texts]
+
+    def iter_srt(self, texts=None, indices=None):
+        """ Yields SRT blocks, optionally with replacement texts and/or only for the given cue indices. """
+        texts = self.texts if texts is None else texts
+        for number, i in enumerate(range(len(self.texts)) if indices is None else indices, start=1):
+            yield f"{number}\n{format_timestamp(self.starts[i])} --> {format_timestamp(self.ends[i])}\n{texts[i]}\n"
+
+    def to_srt(self, texts=None, indices=None):
+        if texts is not None and len(texts) != len(self.texts): raise ValueError("Subtitle count mismatch during reconstruction.")
+        return "\n".join(self.iter_srt(texts, indices))
+
+
+def _timing_to_ms(h, m, s, ms):
+    return ((int(h) * 60 + int(m)) * 60 + int(s)) * 1000 + int(ms.ljust(3, '0'))
+
+
+def parse_srt_lines(lines, encoding=None):
+    """
+    Single-pass parse of an iterable of text lines into SrtCues.
+    Tolerates missing index lines, missing blank separators and stray blank lines inside text.
+    """
+    cues = SrtCues(encoding); start = end = None; text_lines = []
+
+    def _flush():
+        while text_lines and not text_lines[-1].strip(): text_lines.pop()
+        while text_lines and not text_lines[0].strip(): text_lines.pop(0)
+        if start is not None and text_lines: cues.append(start, end, "\n".join(text_lines))
+
+    for line in lines:
+        line = line.rstrip('\r\n')
+        match = TIMING_REGEX.search(line) if '-->' in line else None
+        if match is None: text_lines.append(line); continue
+        # The digits-only line right before a timing line is the cue index, not text
+        while text_lines and not text_lines[-1].strip(): text_lines.pop()
+        if text_lines and text_lines[-1].strip().lstrip('\ufeff').isdigit(): text_lines.pop()
+        _flush()
+        groups = match.groups(); start = _timing_to_ms(*groups[:4]); end = _timing_to_ms(*groups[4:]); text_lines = []
+    _flush()
+    return cues
+
+
+def parse_srt(filepath, encoding=None):
+    """ Parses an SRT file; the encoding comes from the sidecar index, else is detected incrementally. """
+    encoding = encoding or indexed_encoding(filepath) or detect_encoding(filepath)
+    with open(filepath, 'r', encoding=encoding, errors='replace', newline=None) as f:
+        return parse_srt_lines(f, encoding)
+
+# --- END OF FILE source/srt_parser.py ---
@@ -0,0 +1,64 @@
+# --- START OF FILE source/storage.py ---
+
+"""
+Local storage helpers for the Raspberry Pi Movie Player App.
+Resolves the per-user config/cache directories and provides atomic file writes
+so that caches and state files are never left half-written.
+"""
+
+import os
+import json
+import tempfile
+
+APP_DIR_NAME = "hackflix"
+CONFIG_DIR = os.path.join(os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config"), APP_DIR_NAME)
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), APP_DIR_NAME)
+
+
+def config_path(filename):
+    """ Returns the path of a file in the app config directory, creating the directory if needed. """
+    os.makedirs(CONFIG_DIR, exist_ok=True)
+    return os.path.join(CONFIG_DIR, filename)
+
+
+def cache_path(filename):
+    """ Returns the path of a file in the app cache directory, creating the directory if needed. """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, filename)
+
+
+def atomic_write_bytes(path, data, mode=None):
+    """ Writes data to path via a temp file in the same directory and os.replace(). """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data); f.flush(); os.fsync(f.fileno())
+        if mode is not None: os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try: os.remove(tmp_path)
+        except OSError: pass
+        raise
+
+
+def atomic_write_text(path, text, encoding='utf-8', mode=None):
+    """ Text variant of atomic_write_bytes. """
+    atomic_write_bytes(path, text.encode(encoding), mode=mode)
+
+
+def load_json(path, default=None):
+    """ Loads a JSON file, returning default if it is missing or unreadable. """
+    try:
+        with open(path, 'r', encoding='utf-8') as f: return json.load(f)
+    except FileNotFoundError: return default
+    except (OSError, ValueError) as e: print(f"Warning: Could not read '{path}': {e}"); return default
+
+
+def save_json(path, data, mode=None):
+    """ Atomically writes data as JSON. Returns True on success. """
+    try: atomic_write_text(path, json.dumps(data, indent=1, ensure_ascii=False), mode=mode); return True
+    except OSError as e: print(f"Warning: Could not write '{path}': {e}"); return False
+
+# --- END OF FILE source/storage.py ---
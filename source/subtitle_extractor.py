@@ -0,0 +1,151 @@
+# --- START OF FILE source/subtitle_extractor.py ---
+
+"""
+Embedded subtitle extractor for the Raspberry Pi Movie Player App.
+Probes video containers (MKV/MP4/...) with ffprobe for text subtitle streams and
+writes them out as '<video>.<lang>.srt' sidecars with ffmpeg, in a background pool.
+Probe results are cached by (path, size, mtime) so files are only probed once.
+"""
+
+import os
+import json
+import shutil
+import threading
+import subprocess
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from source.storage import cache_path, load_json, save_json
+from source.srt_parser import record_normalized_subtitle
+
+# --- Configuration ---
+TEXT_SUBTITLE_CODECS = {'subrip', 'srt', 'ass', 'ssa', 'mov_text', 'webvtt', 'text'} # Bitmap codecs (pgs, dvd) cannot become SRT
+EXTRACTABLE_EXTENSIONS = {'.mkv', '.mp4', '.m4v', '.mov', '.webm'}
+MAX_EXTRACT_WORKERS = 2 # ffprobe/ffmpeg processes running at once
+PROBE_TIMEOUT = 30 # Seconds
+EXTRACT_TIMEOUT = 300 # Seconds
+PROBE_CACHE_FILENAME = "embedded_subtitles.json"
+# ISO 639-2 (as stored in containers) -> the 2-letter codes used for sidecar names
+LANGUAGE_CODE_MAP = {
+    'eng': 'en', 'pol': 'pl', 'ger': 'de', 'deu': 'de', 'fre': 'fr', 'fra': 'fr', 'spa': 'es', 'ita': 'it',
+    'por': 'pt', 'rus': 'ru', 'dut': 'nl', 'nld': 'nl', 'cze': 'cs', 'ces': 'cs', 'swe': 'sv', 'nor': 'no',
+    'dan': 'da', 'fin': 'fi', 'hun': 'hu', 'ukr': 'uk', 'jpn': 'ja', 'chi': 'zh', 'zho': 'zh', 'kor': 'ko',
+}
+# --- End Configuration ---
+
+
+def sidecar_language_code(language):
+    """ Maps a container language tag to the code used in '<video>.<code>.srt'; None for unknown. """
+    if not language or language.lower() in ('und', 'unk', 'mis', 'zxx'): return None
+    language = language.lower()
+    return LANGUAGE_CODE_MAP.get(language, language)
+
+
+class EmbeddedSubtitleExtractor(QObject):
+    """
+    Extracts embedded text subtitle tracks into sidecar SRT files in the background.
+    Emits extraction_finished(video_path, [written_srt_paths]) when a file was processed.
+    """
+    extraction_finished = pyqtSignal(str, list)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.ffprobe_path = shutil.which('ffprobe'); self.ffmpeg_path = shutil.which('ffmpeg')
+        self.available = bool(self.ffprobe_path and self.ffmpeg_path)
+        if not self.available: print("WARNING: ffprobe/ffmpeg not found. Embedded subtitle extraction disabled.")
+        self.executor = ThreadPoolExecutor(max_workers=MAX_EXTRACT_WORKERS, thread_name_prefix="sub-extract")
+        self.cache_file = cache_path(PROBE_CACHE_FILENAME)
+        self.probe_cache = load_json(self.cache_file, default={}) or {}
+        self.lock = threading.Lock(); self.save_lock = threading.Lock(); self.in_progress = set()
+
+    @staticmethod
+    def _file_signature(video_path):
+        st = os.stat(video_path)
+        return st.st_size, int(st.st_mtime)
+
+    def cached_tracks(self, video_path):
+        """ Returns the cached list of text tracks for video_path, or None if it has not been probed. """
+        try: size, mtime = self._file_signature(video_path)
+        except OSError: return None
+        with self.lock: entry = self.probe_cache.get(video_path)
+        if entry and entry.get('size') == size and entry.get('mtime') == mtime: return entry.get('tracks', [])
+        return None
+
+    def can_extract(self, video_path):
+        return self.available and os.path.splitext(video_path)[1].lower() in EXTRACTABLE_EXTENSIONS
+
+    def submit(self, video_path):
+        """ Queues video_path for probing/extraction unless already known to have no text tracks. """
+        if not self.can_extract(video_path): return False
+        tracks = self.cached_tracks(video_path)
+        if tracks is not None and not tracks: return False # Probed before: nothing to extract, costs nothing
+        with self.lock:
+            if video_path in self.in_progress: return False
+            self.in_progress.add(video_path)
+        self.executor.submit(self._extract_worker, video_path)
+        return True
+
+    def _probe(self, video_path):
+        """ Runs ffprobe and returns a list of text subtitle tracks. """
+        cmd = [self.ffprobe_path, '-v', 'error', '-select_streams', 's',
+               '-show_entries', 'stream=index,codec_name:stream_tags=language,title:stream_disposition=forced',
+               '-of', 'json', video_path]
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=PROBE_TIMEOUT)
+        if result.returncode != 0: raise RuntimeError(f"ffprobe failed: {result.stderr.strip()}")
+        tracks = []
+        for stream in json.loads(result.stdout or '{}').get('streams', []):
+            if stream.get('codec_name') not in TEXT_SUBTITLE_CODECS: continue
+            tags = stream.get('tags', {}); disposition = stream.get('disposition', {})
+            tracks.append({'index': stream.get('index'), 'codec': stream.get('codec_name'), 'language': tags.get('language'),
+                           'title': tags.get('title'), 'forced': bool(disposition.get('forced'))})
+        return tracks
+
+    def _store_probe(self, video_path, tracks):
+        size, mtime = self._file_signature(video_path)
+        with self.lock: self.probe_cache[video_path] = {'size': size, 'mtime': mtime, 'tracks': tracks}
+        # Writes are serialized and each re-snapshots under the lock, so an older snapshot can never be written last
+        with self.save_lock:
+            with self.lock: snapshot = dict(self.probe_cache)
+            save_json(self.cache_file, snapshot)
+
+    def _extract_track(self, video_path, track, srt_path):
+        """ Writes one track as SRT via a temp file, so a killed ffmpeg never leaves a partial sidecar. """
+        tmp_path = f"{srt_path}.part"
+        cmd = [self.ffmpeg_path, '-nostdin', '-v', 'error', '-y', '-i', video_path,
+               '-map', f"0:{track['index']}", '-c:s', 'srt', '-f', 'srt', tmp_path]
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=EXTRACT_TIMEOUT)
+            if result.returncode != 0 or not os.path.getsize(tmp_path): raise RuntimeError(f"ffmpeg failed: {result.stderr.strip()}")
+            os.replace(tmp_path, srt_path)
+            record_normalized_subtitle(srt_path, 'utf-8') # ffmpeg always writes SRT as UTF-8
+        finally:
+            if os.path.exists(tmp_path): os.remove(tmp_path)
+
+    def _extract_worker(self, video_path):
+        written = []
+        try:
+            tracks = self.cached_tracks(video_path)
+            if tracks is None: tracks = self._probe(video_path); self._store_probe(video_path, tracks)
+            print(f"Embedded text subtitle tracks in '{os.path.basename(video_path)}': {len(tracks)}")
+            base = os.path.splitext(video_path)[0]; seen_languages = set()
+            # Full (non-forced) tracks first, so forced-only tracks never shadow a complete one
+            for track in sorted(tracks, key=lambda t: t['forced']):
+                code = sidecar_language_code(track.get('language'))
+                if code in seen_languages: continue
+                seen_languages.add(code)
+                srt_path = f"{base}.{code}.srt" if code else f"{base}.srt"
+                if os.path.exists(srt_path): continue
+                try: self._extract_track(video_path, track, srt_path); written.append(srt_path); print(f"  Extracted track {track['index']} -> {srt_path}")
+                except (OSError, RuntimeError, subprocess.TimeoutExpired) as e: print(f"  Could not extract track {track['index']}: {e}")
+        except Exception as e:
+            print(f"Embedded subtitle probe failed for {video_path}: {e}\n{traceback.format_exc()}")
+        finally:
+            with self.lock: self.in_progress.discard(video_path)
+        self.extraction_finished.emit(video_path, written)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+# --- END OF FILE source/subtitle_extractor.py ---
@@ -12,11 +12,15 @@ import requests
 import json
 import time
 import threading
+import base64
 from urllib.parse import urljoin, urlencode
 from dotenv import load_dotenv
 
 from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
 
+from source.storage import config_path, load_json, save_json
+from source.srt_parser import write_normalized_subtitle
+
 # --- Configuration Placeholders ---
 load_dotenv()
 OPENSUBTITLES_API_KEY = os.environ.get("OPENSUBTITLES_API_KEY")
@@ -26,6 +30,10 @@ APP_USER_AGENT = "HackFlix v0.1.0" # Replace with your app name and version
 # --- End Configuration ---
 
 API_BASE_URL = "https://api.opensubtitles.com/api/v1/"
+SESSION_CACHE_FILENAME = "opensubtitles_session.json" # Cached JWT, reused across app launches
+DEFAULT_TOKEN_LIFETIME = 24 * 3600 # Seconds, used when the JWT carries no 'exp' claim
+TOKEN_EXPIRY_MARGIN = 300 # Seconds; treat tokens this close to expiry as expired
+SEASON_SEARCH_MAX_PAGES = 10 # Upper bound on result pages fetched for one (show, season) query
 
 # Translation helper (if needed outside QObject context)
 def tr(text):
@@ -39,6 +47,7 @@ class SubtitleManager(QObject): # Inherit QObject to use self.tr()
     # Signals
     login_status = pyqtSignal(bool, str)
     search_results = pyqtSignal(list)
+    season_search_results = pyqtSignal(str, int, list) # (query, season, results for every episode)
     search_error = pyqtSignal(str)
     download_ready = pyqtSignal(str, str)
     download_error = pyqtSignal(dict)
@@ -63,18 +72,84 @@ class SubtitleManager(QObject): # Inherit QObject to use self.tr()
         self.jwt_token = None
         self.user_info = None
         self.logged_in = False
+        self.token_expires_at = 0
+        self.auth_lock = threading.Lock() # One re-login at a time when several requests hit an expired token
+        self.session_cache_path = config_path(SESSION_CACHE_FILENAME)
+
+    @staticmethod
+    def _jwt_expiry(token):
+        """ Returns the 'exp' claim of a JWT as a timestamp, or None if it cannot be decoded. """
+        try:
+            payload = token.split('.')[1]; payload += '=' * (-len(payload) % 4)
+            exp = json.loads(base64.urlsafe_b64decode(payload)).get('exp')
+            return float(exp) if exp else None
+        except (IndexError, ValueError, TypeError, AttributeError): return None
+
+    def _save_cached_session(self):
+        cache = {'username': self.username, 'api_key': self.api_key, 'token': self.jwt_token, 'user': self.user_info, 'expires_at': self.token_expires_at}
+        if save_json(self.session_cache_path, cache, mode=0o600): print(f"Session cached until {time.ctime(self.token_expires_at)}.")
+
+    def _restore_cached_session(self):
+        """ Loads a still-valid cached session for the configured user. Returns True if restored. """
+        cache = load_json(self.session_cache_path)
+        if not isinstance(cache, dict) or not cache.get('token'): return False
+        if cache.get('username') != self.username or cache.get('api_key') != self.api_key: return False
+        if float(cache.get('expires_at') or 0) - TOKEN_EXPIRY_MARGIN <= time.time(): print("Cached session expired."); return False
+        self.jwt_token = cache['token']; self.user_info = cache.get('user') or {}; self.token_expires_at = float(cache['expires_at']); self.logged_in = True
+        return True
+
+    def _token_expired(self):
+        return self.token_expires_at - TOKEN_EXPIRY_MARGIN <= time.time()
+
+    def _emit_quota(self):
+        if self.user_info: self.quota_info.emit(self.user_info.get('allowed_downloads', 0), self.user_info.get('allowed_downloads', 0))
+
+    def _login_request(self):
+        """ Blocking login POST. Stores and caches the new session; returns None on success, else the error dict. """
+        data, error = self._make_request("POST", "login", data={"username": self.username, "password": self.password})
+        if not error and not (data and data.get("token")): error = {"message": self.tr("Login failed: Invalid server response."), "status": 500}
+        if error: self.logged_in = False; self.jwt_token = None; self.user_info = None; self.token_expires_at = 0; return error
+        self.jwt_token = data["token"]; self.user_info = data.get("user") or {}; self.logged_in = True
+        self.token_expires_at = self._jwt_expiry(self.jwt_token) or (time.time() + DEFAULT_TOKEN_LIFETIME)
+        self._save_cached_session(); print(f"Login OK. Level: {self.user_info.get('level', 'N/A')}, Allowed: {self.user_info.get('allowed_downloads', 'N/A')}")
+        return None
+
+    def _renew_session(self, rejected_token=None):
+        """
+        Logs in again when the token is missing, about to expire, or was just rejected (rejected_token).
+        Returns True if a usable token is held afterwards. Threads that waited for another renewal reuse its token.
+        """
+        with self.auth_lock:
+            if self.jwt_token and self.jwt_token != rejected_token and not self._token_expired(): return True
+            if not self.username or not self.password: return False
+            print("Session token expired or rejected. Logging in again...")
+            if self.jwt_token: self.invalidate_session()
+            error = self._login_request()
+        if error: print(f"Re-login failed: {error.get('message')}"); return False
+        self._emit_quota(); return True
+
+    def invalidate_session(self):
+        """ Drops the in-memory and cached session (e.g. after a 401), so the next login() hits the API. """
+        self.logged_in = False; self.jwt_token = None; self.user_info = None; self.token_expires_at = 0
+        try: os.remove(self.session_cache_path)
+        except FileNotFoundError: pass
+        except OSError as e: print(f"Warning: Could not remove session cache: {e}")
 
     def _make_request(self, method, endpoint, params=None, data=None, requires_auth=False):
+        """ With requires_auth, an expired token is renewed first, and a 401 triggers one re-login and one retry. """
         url = urljoin(self.base_url, endpoint); headers = self.session.headers.copy()
         if requires_auth:
-            if not self.jwt_token: return None, {"message": self.tr("Login required."), "status": 401}
-            headers["Authorization"] = f"Bearer {self.jwt_token}"
+            if (not self.jwt_token or self._token_expired()) and not self._renew_session(): return None, {"message": self.tr("Login required."), "status": 401}
+            token = self.jwt_token; headers["Authorization"] = f"Bearer {token}"
         try:
             response = self.session.request(method,url,params=params,json=data,headers=headers,timeout=20)
+            if response.status_code == 401 and requires_auth and self._renew_session(rejected_token=token):
+                headers["Authorization"] = f"Bearer {self.jwt_token}"; response = self.session.request(method, url, params=params, json=data, headers=headers, timeout=20)
             remaining = response.headers.get('ratelimit-remaining'); limit = response.headers.get('ratelimit-limit')
             if remaining is not None and limit is not None:
                  try: self.quota_info.emit(int(remaining), int(limit))
                  except ValueError: pass
+            if response.status_code == 401 and requires_auth: print("Session token rejected (401). Clearing cached session."); self.invalidate_session()
             if response.status_code == 429:
                 retry_after = int(response.headers.get('Retry-After', 2)); print(f"Rate limit. Retrying after {retry_after}s...")
                 time.sleep(retry_after); response = self.session.request(method, url, params=params, json=data, headers=headers, timeout=20)
@@ -89,18 +164,18 @@ class SubtitleManager(QObject): # Inherit QObject to use self.tr()
 
     def login(self):
         if not self.username or not self.password: self.login_status.emit(False, self.tr("Username/Password missing.")); return
-        endpoint = "login"; payload = {"username": self.username, "password": self.password}
+        if self._restore_cached_session():
+            print(f"Login restored from cache. Level: {self.user_info.get('level', 'N/A')}, Allowed: {self.user_info.get('allowed_downloads', 'N/A')}")
+            self.login_status.emit(True, self.tr("Login restored from cache.")); self._emit_quota(); return
         def _login_thread():
-            data, error = self._make_request("POST", endpoint, data=payload)
-            if error: self.logged_in = False; self.jwt_token = None; self.user_info = None; login_fail_msg = self.tr("Login failed ({0}): {1}").format(error.get('status', self.tr('N/A')), error.get('message', self.tr('Unknown error'))); self.login_status.emit(False, login_fail_msg)
-            elif data and data.get("token"): self.logged_in = True; self.jwt_token = data["token"]; self.user_info = data.get("user"); print(f"Login OK. Level: {self.user_info.get('level', 'N/A')}, Allowed: {self.user_info.get('allowed_downloads', 'N/A')}"); self.login_status.emit(True, self.tr("Login successful."));
-            if self.user_info: self.quota_info.emit(self.user_info.get('allowed_downloads', 0), self.user_info.get('allowed_downloads', 0))
-            else: self.logged_in = False; self.jwt_token = None; self.user_info = None; self.login_status.emit(False, self.tr("Login failed: Invalid server response."))
+            with self.auth_lock: error = self._login_request()
+            if error: login_fail_msg = self.tr("Login failed ({0}): {1}").format(error.get('status', self.tr('N/A')), error.get('message', self.tr('Unknown error'))); self.login_status.emit(False, login_fail_msg)
+            else: self.login_status.emit(True, self.tr("Login successful.")); self._emit_quota()
         threading.Thread(target=_login_thread, daemon=True).start()
 
     def logout(self):
         if not self.jwt_token: return; endpoint = "logout"
-        def _logout_thread(): _, error = self._make_request("DELETE", endpoint, requires_auth=True); self.logged_in = False; self.jwt_token = None; self.user_info = None;
+        def _logout_thread(): _, error = self._make_request("DELETE", endpoint, requires_auth=True); self.invalidate_session();
         if error: print(f"Logout failed: {error.get('message', 'Unknown error')}")
         else: print("Logout successful.")
         threading.Thread(target=_logout_thread, daemon=True).start()
@@ -132,12 +207,7 @@ class SubtitleManager(QObject): # Inherit QObject to use self.tr()
             data, error = self._make_request("GET", endpoint, params=sorted_params)
             if error: search_fail_msg = self.tr("Search failed ({0}): {1}").format(error.get('status', self.tr('N/A')), error.get('message', self.tr('Unknown error'))); self.search_error.emit(search_fail_msg)
             elif data and 'data' in data:
-                processed_results = []
-                for item in data['data']:
-                     # Data processing logic remains the same
-                     attributes = item.get('attributes', {}); file_info = attributes.get('files', [{}])[0]; feature_details = attributes.get('feature_details', {})
-                     processed = {'id': item.get('id'),'type': item.get('type'),'language': attributes.get('language'),'download_count': attributes.get('download_count'),'new_download_count': attributes.get('new_download_count'),'hearing_impaired': attributes.get('hearing_impaired'),'hd': attributes.get('hd'),'fps': attributes.get('fps'),'votes': attributes.get('votes'),'points': attributes.get('points'),'ratings': attributes.get('ratings'),'from_trusted': attributes.get('from_trusted'),'foreign_parts_only': attributes.get('foreign_parts_only'),'ai_translated': attributes.get('ai_translated'),'machine_translated': attributes.get('machine_translated'),'upload_date': attributes.get('upload_date'),'release': attributes.get('release'),'comments': attributes.get('comments'),'legacy_subtitle_id': attributes.get('legacy_subtitle_id'),'uploader': attributes.get('uploader', {}).get('name', 'Unknown'),'feature_title': feature_details.get('title', 'N/A'),'feature_year': feature_details.get('year'),'feature_imdb_id': feature_details.get('imdb_id'),'feature_tmdb_id': feature_details.get('tmdb_id'),'file_id': file_info.get('file_id'),'file_name': file_info.get('file_name', 'subtitle.srt')}
-                     processed_results.append(processed)
+                processed_results = [self._process_search_item(item) for item in data['data']]
                 self.search_results.emit(processed_results)
             else:
                 if data and data.get('total_count', 0) == 0: self.search_results.emit([])
@@ -145,12 +215,48 @@ class SubtitleManager(QObject): # Inherit QObject to use self.tr()
         threading.Thread(target=_search_thread, daemon=True).start()
     # --- End corrected signature ---
 
+    def search_season_subtitles(self, query, season, languages=None, max_pages=SEASON_SEARCH_MAX_PAGES):
+        """
+        Search subtitles for a whole season with one query, paging through all results.
+        Results carry 'feature_episode' so they can be matched to local episode files.
+        """
+        if not query or season is None:
+            self.search_error.emit(self.tr("Season search requires a query and a season number."))
+            return
+        endpoint = "subtitles"
+        base_params = {'query': query, 'season_number': season, 'type': 'episode'}
+        if languages: base_params['languages'] = languages.lower()
+
+        def _season_search_thread():
+            all_results = []; page = 1; total_pages = 1
+            while page <= min(total_pages, max_pages):
+                params = dict(sorted(dict(base_params, page=page).items()))
+                print(f"API Season Search Params: {params}") # Debug: Show what's sent
+                data, error = self._make_request("GET", endpoint, params=params)
+                if error:
+                    if all_results: print(f"Season search stopped at page {page}: {error.get('message')}"); break
+                    search_fail_msg = self.tr("Search failed ({0}): {1}").format(error.get('status', self.tr('N/A')), error.get('message', self.tr('Unknown error'))); self.search_error.emit(search_fail_msg); return
+                if not data or 'data' not in data:
+                    if all_results or (data and data.get('total_count', 0) == 0): break
+                    self.search_error.emit(self.tr("Search failed: Invalid response format.")); return
+                all_results.extend(self._process_search_item(item) for item in data['data'])
+                total_pages = data.get('total_pages', 1) or 1; page += 1
+            print(f"Season search: {len(all_results)} results in {page - 1} page(s) for '{query}' S{season}.")
+            self.season_search_results.emit(query, season, all_results)
+        threading.Thread(target=_season_search_thread, daemon=True).start()
+
+    @staticmethod
+    def _process_search_item(item):
+        """ Flattens one API subtitle result into the dict used by the UI. """
+        attributes = item.get('attributes', {}); file_info = attributes.get('files', [{}])[0]; feature_details = attributes.get('feature_details', {})
+        return {'id': item.get('id'),'type': item.get('type'),'language': attributes.get('language'),'download_count': attributes.get('download_count'),'new_download_count': attributes.get('new_download_count'),'hearing_impaired': attributes.get('hearing_impaired'),'hd': attributes.get('hd'),'fps': attributes.get('fps'),'votes': attributes.get('votes'),'points': attributes.get('points'),'ratings': attributes.get('ratings'),'from_trusted': attributes.get('from_trusted'),'foreign_parts_only': attributes.get('foreign_parts_only'),'ai_translated': attributes.get('ai_translated'),'machine_translated': attributes.get('machine_translated'),'upload_date': attributes.get('upload_date'),'release': attributes.get('release'),'comments': attributes.get('comments'),'legacy_subtitle_id': attributes.get('legacy_subtitle_id'),'uploader': attributes.get('uploader', {}).get('name', 'Unknown'),'feature_title': feature_details.get('title', 'N/A'),'feature_year': feature_details.get('year'),'feature_imdb_id': feature_details.get('imdb_id'),'feature_tmdb_id': feature_details.get('tmdb_id'),'feature_season': feature_details.get('season_number'),'feature_episode': feature_details.get('episode_number'),'parent_title': feature_details.get('parent_title'),'moviehash_match': attributes.get('moviehash_match', False),'file_id': file_info.get('file_id'),'file_name': file_info.get('file_name', 'subtitle.srt')}
+
     def request_download(self, file_id):
         if not file_id: self.download_error.emit({"message": self.tr("File ID is required."), "status": 400}); return
         endpoint = "download"; payload = {"file_id": int(file_id)}
-        login_potentially_required = bool(self.username and self.password)
+        login_potentially_required = bool(self.username and self.password) # Configured accounts log in (again) on demand
         def _download_thread():
-            data, error = self._make_request("POST", endpoint, data=payload, requires_auth=self.logged_in)
+            data, error = self._make_request("POST", endpoint, data=payload, requires_auth=login_potentially_required)
             if error: self.download_error.emit(error)
             elif data and data.get("link"):
                 remaining = data.get('remaining', -1); print(f"Download link obtained. Remaining: {remaining}")
@@ -161,10 +267,10 @@ class SubtitleManager(QObject): # Inherit QObject to use self.tr()
     def download_subtitle_file(self, download_link, save_path):
         try:
             response = requests.get(download_link, timeout=30, stream=True); response.raise_for_status()
-            os.makedirs(os.path.dirname(save_path), exist_ok=True)
-            with open(save_path, 'wb') as f:
-                 for chunk in response.iter_content(chunk_size=8192): f.write(chunk)
-            print(f"Subtitle downloaded: {save_path}"); return True, None
+            # Subtitles are small: buffer, normalize to UTF-8 once here, then write atomically
+            raw_data = b"".join(response.iter_content(chunk_size=8192))
+            source_encoding = write_normalized_subtitle(save_path, raw_data)
+            print(f"Subtitle downloaded: {save_path} (normalized from {source_encoding} to utf-8)"); return True, None
         except requests.exceptions.Timeout: error_msg = self.tr("Timeout downloading subtitle."); print(f"{error_msg} URL: {download_link}"); return False, error_msg
         except requests.exceptions.HTTPError as e: error_msg = self.tr("HTTP Error {0} downloading.").format(e.response.status_code); print(f"{error_msg} URL: {download_link} Details: {e.response.text}"); return False, error_msg
         except requests.exceptions.RequestException as e: error_msg = self.tr("Network error downloading: {0}").format(e); print(f"{error_msg} URL: {download_link}"); return False, error_msg
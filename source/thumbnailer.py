@@ -0,0 +1,215 @@
+# --- START OF FILE source/thumbnailer.py ---
+
+"""
+Thumbnail and seek-preview generation for the Raspberry Pi Movie Player App.
+Grabs a poster frame per video for the library list and a low-resolution
+sprite sheet (one tile per 1/SPRITE_TILES of the runtime) for previews on the
+player's position slider. Frames are grabbed by ffmpeg processes running at the
+lowest CPU and I/O priority, a bounded number at a time, and the images are
+stored in a size-capped LRU disk cache keyed by file identity (path, size, mtime).
+"""
+
+import os
+import shutil
+import hashlib
+import threading
+import subprocess
+import traceback
+from collections import OrderedDict
+
+from PyQt5.QtCore import QObject, pyqtSignal, QBuffer, QByteArray, QIODevice
+from PyQt5.QtGui import QImage, QPainter, QColor
+
+from source.storage import cache_path
+
+# --- Configuration ---
+THUMBNAIL_CACHE_DIRNAME = "thumbnails"
+THUMBNAIL_CACHE_MAX_MB = int(os.getenv("THUMBNAIL_CACHE_MAX_MB", "200")) # Least recently used images are evicted beyond this
+POSTER_WIDTH = 192 # px
+POSTER_POSITION = 0.1 # Fraction of the runtime (skips intros and black leaders); 30 s when the runtime is unknown
+SPRITE_TILES = 60 # Preview frames per video
+SPRITE_COLUMNS = 10
+SPRITE_TILE_WIDTH = 160 # px
+MAX_THUMBNAIL_WORKERS = 2 # ffmpeg processes running at once
+MAX_PENDING_POSTERS = 100 # Older poster requests (rows scrolled out of view) are dropped beyond this
+NICE_LEVEL = 19
+FRAME_TIMEOUT = 30 # Seconds per grabbed frame
+# --- End Configuration ---
+
+
+def _lower_priority():
+    """ preexec_fn for ffmpeg: lowest CPU priority, so playback and the UI are never starved. """
+    try: os.nice(NICE_LEVEL)
+    except OSError: pass
+
+
+class ThumbnailCache:
+    """
+    Directory of generated images with a total size cap. Recency is kept in memory and persisted as the
+    file mtime (refreshed once per session per file, to spare SD cards), so eviction order survives restarts.
+    """
+
+    def __init__(self, directory=None, max_bytes=THUMBNAIL_CACHE_MAX_MB * 1024 * 1024):
+        self.directory = directory or cache_path(THUMBNAIL_CACHE_DIRNAME); os.makedirs(self.directory, exist_ok=True)
+        self.max_bytes = max_bytes; self.lock = threading.Lock()
+        self.entries = OrderedDict(); self.total = 0; self.touched = set() # name -> size, least recently used first
+        found = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.name.endswith('.tmp'): os.remove(entry.path); continue # Left by a crash mid-write
+                    stat = entry.stat(); found.append((stat.st_mtime, entry.name, stat.st_size))
+                except OSError: continue
+        for _, name, size in sorted(found): self.entries[name] = size; self.total += size
+
+    def get(self, name):
+        """ Path of a cached image (marking it recently used), or None. """
+        with self.lock:
+            if name not in self.entries: return None
+            self.entries.move_to_end(name); touch = name not in self.touched; self.touched.add(name)
+        path = os.path.join(self.directory, name)
+        if touch:
+            try: os.utime(path)
+            except OSError:
+                with self.lock: self.total -= self.entries.pop(name, 0)
+                return None
+        return path
+
+    def put(self, name, data):
+        """ Stores image bytes and evicts the least recently used images over the cap. Returns the path. """
+        path = os.path.join(self.directory, name); tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f: f.write(data)
+        os.replace(tmp_path, path)
+        with self.lock:
+            self.total += len(data) - self.entries.pop(name, 0); self.entries[name] = len(data); self.touched.add(name)
+            evicted = []
+            while self.total > self.max_bytes and len(self.entries) > 1:
+                victim, size = self.entries.popitem(last=False); self.total -= size; evicted.append(victim)
+        for victim in evicted:
+            try: os.remove(os.path.join(self.directory, victim))
+            except OSError: pass
+        return path
+
+
+class Thumbnailer(QObject):
+    """
+    Generates posters and seek-preview sprites on worker threads. poster()/sprite() return a cached image path
+    at once, or None after queuing the generation; poster_ready/sprite_ready(video_path, image_path) follow.
+    Sprites (the video being watched) go before posters; among posters the newest request (visible rows) goes first.
+    """
+    poster_ready = pyqtSignal(str, str)
+    sprite_ready = pyqtSignal(str, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.ffmpeg_path = shutil.which('ffmpeg'); self.ffprobe_path = shutil.which('ffprobe')
+        self.available = bool(self.ffmpeg_path)
+        if not self.available: print("WARNING: ffmpeg not found. Thumbnails and seek previews disabled.")
+        self.priority_prefix = ['ionice', '-c', '3'] if shutil.which('ionice') else [] # Idle I/O class: disk reads yield to playback
+        self.cache = ThumbnailCache() if self.available else None
+        self.condition = threading.Condition(); self.stopping = False; self.workers = []
+        self.pending_sprites = OrderedDict(); self.pending_posters = OrderedDict() # video_path -> (name, size, mtime, duration)
+        self.running = set(); self.failed = set() # Names being generated; names that could not be generated this session
+
+    @staticmethod
+    def _file_key(video_path, size, mtime):
+        identity = f"{video_path}\0{size}\0{mtime}\0{POSTER_WIDTH}\0{SPRITE_TILES}x{SPRITE_COLUMNS}x{SPRITE_TILE_WIDTH}"
+        return hashlib.sha1(identity.encode('utf-8', 'surrogateescape')).hexdigest()
+
+    def poster(self, video_path, size, mtime, duration=None):
+        """ Cached poster path, or None (generation queued). """
+        if not self.available: return None
+        name = f"{self._file_key(video_path, size, mtime)}.poster.jpg"
+        path = self.cache.get(name)
+        if path: return path
+        with self.condition:
+            if name in self.running or name in self.failed: return None
+            self.pending_posters.pop(video_path, None); self.pending_posters[video_path] = (name, size, mtime, duration)
+            while len(self.pending_posters) > MAX_PENDING_POSTERS: self.pending_posters.popitem(last=False)
+            self._ensure_workers(); self.condition.notify()
+        return None
+
+    def sprite(self, video_path, duration=None):
+        """ Cached sprite sheet path for the video as it is on disk now, or None (generation queued). """
+        if not self.available: return None
+        try: stat = os.stat(video_path)
+        except OSError: return None
+        name = f"{self._file_key(video_path, stat.st_size, stat.st_mtime)}.sprite.jpg"
+        path = self.cache.get(name)
+        if path: return path
+        with self.condition:
+            if name in self.failed: return None
+            if name not in self.running: self.pending_sprites[video_path] = (name, stat.st_size, stat.st_mtime, duration)
+            self._ensure_workers(); self.condition.notify()
+        return None
+
+    def _ensure_workers(self):
+        """ Condition must be held. """
+        while len(self.workers) < MAX_THUMBNAIL_WORKERS:
+            worker = threading.Thread(target=self._worker, name=f"thumbnailer-{len(self.workers)}", daemon=True); self.workers.append(worker); worker.start()
+
+    def _next_job(self):
+        with self.condition:
+            while not self.stopping and not self.pending_sprites and not self.pending_posters: self.condition.wait()
+            if self.stopping: return None
+            if self.pending_sprites: kind = 'sprite'; video_path, job = self.pending_sprites.popitem(last=False)
+            else: kind = 'poster'; video_path, job = self.pending_posters.popitem(last=True) # Newest first
+            self.running.add(job[0])
+        return kind, video_path, job
+
+    def _worker(self):
+        while True:
+            next_job = self._next_job()
+            if next_job is None: return
+            kind, video_path, (name, size, mtime, duration) = next_job; failed = True
+            try:
+                data = self._make_sprite(video_path, duration) if kind == 'sprite' else self._make_poster(video_path, duration)
+                if data is None: continue
+                path = self.cache.put(name, data); failed = False
+                (self.sprite_ready if kind == 'sprite' else self.poster_ready).emit(video_path, path)
+            except RuntimeError: return # Thumbnailer deleted while the app was closing
+            except Exception as e: print(f"Thumbnail error for {video_path}: {e}\n{traceback.format_exc()}")
+            finally:
+                with self.condition:
+                    self.running.discard(name)
+                    if failed: self.failed.add(name) # Not retried this session
+
+    def _grab_frame(self, video_path, seconds, width):
+        """ One JPEG frame at `seconds`, scaled to `width`. Input seeking (-ss before -i) decodes from the nearest keyframe only. """
+        cmd = self.priority_prefix + [self.ffmpeg_path, '-nostdin', '-v', 'error', '-ss', f"{seconds:.3f}", '-i', video_path,
+                                      '-frames:v', '1', '-vf', f"scale={width}:-2", '-q:v', '5', '-f', 'image2pipe', '-vcodec', 'mjpeg', '-']
+        try: result = subprocess.run(cmd, capture_output=True, timeout=FRAME_TIMEOUT, preexec_fn=_lower_priority if os.name == 'posix' else None)
+        except (OSError, subprocess.TimeoutExpired) as e: print(f"Frame grab failed for {video_path} at {seconds:.0f}s: {e}"); return None
+        return result.stdout if result.returncode == 0 and result.stdout else None
+
+    def _duration(self, video_path):
+        if not self.ffprobe_path: return None
+        cmd = [self.ffprobe_path, '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=noprint_wrappers=1:nokey=1', video_path]
+        try: return float(subprocess.run(cmd, capture_output=True, text=True, timeout=FRAME_TIMEOUT).stdout.strip())
+        except (OSError, ValueError, subprocess.TimeoutExpired): return None
+
+    def _make_poster(self, video_path, duration):
+        seconds = duration * POSTER_POSITION if duration else 30.0
+        return self._grab_frame(video_path, seconds, POSTER_WIDTH) or (self._grab_frame(video_path, 0.0, POSTER_WIDTH) if seconds else None) # Shorter than the seek
+
+    def _make_sprite(self, video_path, duration):
+        """ Tiles SPRITE_TILES frames, tile i taken from the middle of the i-th 1/SPRITE_TILES of the runtime. """
+        duration = duration or self._duration(video_path)
+        if not duration: return None
+        rows = -(-SPRITE_TILES // SPRITE_COLUMNS); sheet = None
+        for tile in range(SPRITE_TILES):
+            if self.stopping: return None
+            data = self._grab_frame(video_path, (tile + 0.5) * duration / SPRITE_TILES, SPRITE_TILE_WIDTH)
+            frame = QImage.fromData(data) if data else QImage()
+            if frame.isNull(): continue # Left black
+            if sheet is None: # Tile height follows the video's aspect ratio
+                tile_height = frame.height(); sheet = QImage(SPRITE_COLUMNS * SPRITE_TILE_WIDTH, rows * tile_height, QImage.Format_RGB32); sheet.fill(QColor('black'))
+            painter = QPainter(sheet); painter.drawImage((tile % SPRITE_COLUMNS) * SPRITE_TILE_WIDTH, (tile // SPRITE_COLUMNS) * tile_height, frame); painter.end()
+        if sheet is None: return None
+        data = QByteArray(); buffer = QBuffer(data); buffer.open(QIODevice.WriteOnly); sheet.save(buffer, 'JPG', 70); buffer.close()
+        return bytes(data)
+
+    def shutdown(self):
+        with self.condition: self.stopping = True; self.pending_sprites.clear(); self.pending_posters.clear(); self.condition.notify_all()
+
+# --- END OF FILE source/thumbnailer.py ---
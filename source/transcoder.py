@@ -0,0 +1,244 @@
+# --- START OF FILE source/transcoder.py ---
+
+"""
+Background transcoding for the Raspberry Pi Movie Player App.
+Videos from finished downloads that the Pi cannot decode in hardware (HEVC,
+10-bit, taller than 1080p; see media_prober.needs_software_decode) are
+re-encoded by ffmpeg to 8-bit H.264 High@4.1 in Matroska, with audio, subtitle
+and attachment streams copied (MP4 text subtitles are converted to SRT). ffmpeg runs at the lowest CPU and I/O priority,
+a bounded number of jobs at a time, and only while enough disk space is left.
+The output is written to a hidden file next to the source and renamed to
+'<name>.h264.mkv' when complete, so the library never sees a partial file; the
+library then lists the conversion in place of the source. The source is kept
+(its torrent can go on seeding) unless TRANSCODE_DELETE_ORIGINAL is set. Queued
+jobs and a per-job report (speed, size ratio) are kept in a JSON state file.
+"""
+
+import os
+import time
+import shutil
+import tempfile
+import threading
+import subprocess
+import traceback
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from source.storage import config_path, load_json, save_json
+from source.media_prober import needs_software_decode
+from source.library_index import converted_name
+
+# --- Configuration ---
+TRANSCODE_STATE_FILENAME = "transcode_jobs.json"
+MAX_TRANSCODE_JOBS = int(os.getenv("MAX_TRANSCODE_JOBS", "1")) # One libx264 job already keeps every core of a Pi 4 busy
+TRANSCODE_ENCODER = os.getenv("TRANSCODE_ENCODER", "auto") # auto: the Pi's hardware encoder (h264_v4l2m2m) if ffmpeg has it, else libx264
+TRANSCODE_MAX_HEIGHT = 1080 # Taller videos are scaled down to this
+TRANSCODE_CRF = 20 # libx264 quality
+TRANSCODE_PRESET = "veryfast"
+TRANSCODE_HW_BITRATE = "6M" # h264_v4l2m2m has no constant-quality mode
+MIN_FREE_SPACE_MB = int(os.getenv("TRANSCODE_MIN_FREE_MB", "2048")) # Never fill the disk below this; a running job is stopped if it would
+OUTPUT_SIZE_ESTIMATE = 1.5 # H.264 output vs. HEVC source size, reserved before a job starts
+MAX_REPORTS = 100
+MAX_DOWNLOAD_ROOTS = 200
+NICE_LEVEL = 19
+MOV_TEXT_EXTENSIONS = ('.mp4', '.m4v', '.mov') # Their text subtitles are mov_text, which Matroska cannot hold; converted to SRT
+DELETE_ORIGINAL = os.getenv("TRANSCODE_DELETE_ORIGINAL", "0") == "1" # Opt-in: the source is removed once its conversion is complete
+# --- End Configuration ---
+
+STOPPED = "stopped" # _encode() result when the app is closing
+
+
+def _lower_priority():
+    """ preexec_fn for ffmpeg: lowest CPU priority, so playback and the UI are never starved. """
+    try: os.nice(NICE_LEVEL)
+    except OSError: pass
+
+
+def transcode_output_path(video_path):
+    """ The conversion sits next to its source. Matroska holds every audio/subtitle codec a download may carry. """
+    directory, name = os.path.split(video_path)
+    return os.path.join(directory, converted_name(name))
+
+
+class TranscodeQueue(QObject):
+    """
+    Queue of videos from finished downloads to convert for hardware decoding. add_download() registers a download's
+    file or folder; submit() queues a video below one of them whose probe result needs software decoding.
+    Emits job_progress(video_path, percent), job_finished(video_path, output_path, report) once the output is
+    complete next to the source, and job_failed(video_path, message).
+    """
+    job_progress = pyqtSignal(str, int)
+    job_finished = pyqtSignal(str, str, dict)
+    job_failed = pyqtSignal(str, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.ffmpeg_path = shutil.which('ffmpeg'); self.available = bool(self.ffmpeg_path); self.encoder = None # Resolved by the first job
+        if not self.available: print("WARNING: ffmpeg not found. Downloads will not be converted for hardware decoding.")
+        self.priority_prefix = ['ionice', '-c', '3'] if shutil.which('ionice') else [] # Idle I/O class: disk reads yield to playback
+        self.state_path = config_path(TRANSCODE_STATE_FILENAME)
+        state = load_json(self.state_path, {}) or {}
+        self.downloads = state.get('downloads', []); self.reports = state.get('reports', [])
+        self.pending = {job['video_path']: job for job in state.get('pending', [])} # video_path -> {video_path, size, mtime, duration}
+        self.condition = threading.Condition(); self.stopping = False; self.workers = []
+        self.queue = list(self.pending); self.running = set() # Jobs deferred for lack of disk space stay pending (not queued) until the next session
+        if self.queue and self.available:
+            print(f"Transcoder: resuming {len(self.queue)} queued jobs.")
+            with self.condition: self._ensure_workers()
+
+    def _save_state(self):
+        """ Condition must be held. """
+        save_json(self.state_path, {'downloads': self.downloads, 'pending': list(self.pending.values()), 'reports': self.reports[-MAX_REPORTS:]})
+
+    def add_download(self, path):
+        """ Registers a finished download (file or folder); its videos become eligible for conversion. """
+        path = os.path.normpath(path)
+        with self.condition:
+            if path in self.downloads: return
+            self.downloads.append(path); del self.downloads[:-MAX_DOWNLOAD_ROOTS]; self._save_state()
+
+    def is_download(self, video_path):
+        with self.condition: return any(video_path == root or video_path.startswith(root + os.sep) for root in self.downloads)
+
+    def _failed_before(self, video_path, size, mtime):
+        """ Condition must be held. A job that failed is not retried until the file changes. """
+        return any(report['source'] == video_path and report.get('source_size') == size and report.get('source_mtime') == mtime and report['status'] == 'failed'
+                   for report in self.reports)
+
+    def submit(self, video_path, media):
+        """ Queues a downloaded video whose probe result needs software decoding. Returns True if a job was queued. """
+        if not self.available or not media or media.get('error') or not needs_software_decode(media) or not self.is_download(video_path): return False
+        try: stat = os.stat(video_path)
+        except OSError: return False
+        with self.condition:
+            if video_path in self.pending or self._failed_before(video_path, stat.st_size, stat.st_mtime): return False
+            self.pending[video_path] = {'video_path': video_path, 'size': stat.st_size, 'mtime': stat.st_mtime, 'duration': media.get('duration')}
+            self.queue.append(video_path); self._save_state(); self._ensure_workers(); self.condition.notify()
+        print(f"Transcoder: queued '{os.path.basename(video_path)}' ({media.get('video_codec')}, {media.get('height')}p, {media.get('bit_depth') or 8}-bit).")
+        return True
+
+    def _ensure_workers(self):
+        """ Condition must be held. """
+        while len(self.workers) < MAX_TRANSCODE_JOBS:
+            worker = threading.Thread(target=self._worker, name=f"transcoder-{len(self.workers)}", daemon=True); self.workers.append(worker); worker.start()
+
+    def _next_job(self):
+        with self.condition:
+            while not self.stopping and not self.queue: self.condition.wait()
+            if self.stopping: return None
+            video_path = self.queue.pop(0); self.running.add(video_path)
+            return dict(self.pending[video_path])
+
+    def _worker(self):
+        while True:
+            job = self._next_job()
+            if job is None: return
+            video_path = job['video_path']; report = None
+            try:
+                report = self._run_job(job)
+                if report is None: continue # Stays queued (shutdown or waiting for disk space)
+                if report['status'] == 'done': self.job_finished.emit(video_path, report['output'], report)
+                else: self.job_failed.emit(video_path, report['error'])
+            except RuntimeError: return # Transcoder deleted while the app was closing
+            except Exception as e:
+                print(f"Transcode error for {video_path}: {e}\n{traceback.format_exc()}")
+                report = {'source': video_path, 'source_size': job['size'], 'source_mtime': job['mtime'], 'status': 'failed', 'error': str(e)[:200], 'finished': time.time()}
+                try: self.job_failed.emit(video_path, report['error'])
+                except RuntimeError: return
+            finally:
+                with self.condition:
+                    self.running.discard(video_path)
+                    if report is not None: self.pending.pop(video_path, None); self.reports.append(report); self._save_state()
+
+    def _resolve_encoder(self):
+        if self.encoder: return self.encoder
+        encoder = TRANSCODE_ENCODER
+        if encoder == 'auto':
+            try: encoders = subprocess.run([self.ffmpeg_path, '-hide_banner', '-encoders'], capture_output=True, text=True, timeout=10).stdout
+            except (OSError, subprocess.TimeoutExpired): encoders = ''
+            encoder = 'h264_v4l2m2m' if ' h264_v4l2m2m ' in encoders and os.path.exists('/dev/video11') else 'libx264' # video11: the Pi's encoder device
+        print(f"Transcoder: encoding with {encoder}."); self.encoder = encoder
+        return encoder
+
+    def _command(self, source, tmp_path, encoder):
+        if encoder == 'libx264': video_args = ['-c:v:0', 'libx264', '-preset', TRANSCODE_PRESET, '-crf', str(TRANSCODE_CRF), '-profile:v', 'high', '-level:v', '4.1']
+        else: video_args = ['-c:v:0', encoder, '-b:v', TRANSCODE_HW_BITRATE]
+        subtitle_args = ['-c:s', 'srt'] if source.lower().endswith(MOV_TEXT_EXTENSIONS) else []
+        return self.priority_prefix + [self.ffmpeg_path, '-nostdin', '-v', 'error', '-nostats', '-y', '-i', source,
+                                       '-map', '0:V:0', '-map', '0:a?', '-map', '0:s?', '-map', '0:t?', '-c', 'copy', *subtitle_args, *video_args, # 0:V skips attached cover pictures, as the prober does
+                                       '-vf', f"scale=-2:'min({TRANSCODE_MAX_HEIGHT},ih)',format=yuv420p", '-progress', 'pipe:1', '-f', 'matroska', tmp_path]
+
+    def _encode(self, job, tmp_path, encoder):
+        """ Runs ffmpeg into tmp_path. Returns None on success, STOPPED at shutdown, or an error message. """
+        source = job['video_path']; duration = job.get('duration'); directory = os.path.dirname(source); last_percent = -1
+        with tempfile.TemporaryFile() as errors: # A file, not a pipe: ffmpeg must never block on a full stderr pipe
+            process = subprocess.Popen(self._command(source, tmp_path, encoder), stdout=subprocess.PIPE, stderr=errors, text=True,
+                                       preexec_fn=_lower_priority if os.name == 'posix' else None)
+            stopped = None
+            for line in process.stdout: # '-progress' key=value blocks, one every ~0.5 s
+                key, _, value = line.strip().partition('=')
+                if key == 'out_time_us' and duration and value.isdigit():
+                    percent = min(99, int(int(value) / 1e6 * 100 / duration))
+                    if percent != last_percent: last_percent = percent; self.job_progress.emit(source, percent)
+                elif key == 'progress':
+                    if self.stopping: stopped = STOPPED
+                    elif shutil.disk_usage(directory).free < MIN_FREE_SPACE_MB * 1024 * 1024: stopped = self.tr("Stopped: disk space fell below {0} MB.").format(MIN_FREE_SPACE_MB)
+                    if stopped: process.kill(); break
+            process.wait()
+            if stopped: return stopped
+            if process.returncode != 0:
+                errors.seek(0); message = errors.read().decode('utf-8', 'replace').strip().splitlines()
+                return message[-1][:200] if message else f"ffmpeg exited with {process.returncode}"
+        return None
+
+    @staticmethod
+    def _unchanged(job):
+        try: stat = os.stat(job['video_path'])
+        except OSError: return False
+        return stat.st_size == job['size'] and stat.st_mtime == job['mtime']
+
+    def _dropped(self, report, reason):
+        print(f"Transcoder: '{os.path.basename(report['source'])}' dropped: {reason}")
+        report.update(status='dropped', error=reason, finished=time.time()); return report
+
+    def _run_job(self, job):
+        """ Converts one video next to its source. Returns its report, or None if there is nothing to report. """
+        source = job['video_path']; name = os.path.basename(source)
+        output = transcode_output_path(source); directory = os.path.dirname(source)
+        report = {'source': source, 'source_size': job['size'], 'source_mtime': job['mtime'], 'output': output, 'status': 'failed', 'finished': None}
+        if not self._unchanged(job): return self._dropped(report, self.tr("The file changed or is gone since it was queued.")) # Re-queued after its next probe
+        if os.path.exists(output): report.update(error=self.tr("'{0}' already exists.").format(os.path.basename(output)), finished=time.time()); return report
+        needed = job['size'] * OUTPUT_SIZE_ESTIMATE + MIN_FREE_SPACE_MB * 1024 * 1024; free = shutil.disk_usage(directory).free
+        if free < needed:
+            print(f"Transcoder: '{name}' deferred to the next session, {free / 1e9:.1f} GB free of {needed / 1e9:.1f} GB needed."); return None
+        tmp_path = os.path.join(directory, f".{os.path.basename(output)}.transcode") # Hidden: ignored by the library scanner and watcher
+        encoder = self._resolve_encoder(); start = time.monotonic()
+        try:
+            error = self._encode(job, tmp_path, encoder)
+            if error and error is not STOPPED and encoder != 'libx264':
+                print(f"Transcoder: {encoder} failed ({error}), retrying with libx264."); self.encoder = encoder = 'libx264'; start = time.monotonic()
+                error = self._encode(job, tmp_path, encoder)
+            if error is STOPPED: return None
+            elapsed = time.monotonic() - start
+            if error: report.update(error=error, encoder=encoder, finished=time.time()); print(f"Transcoder: '{name}' failed: {error}"); return report
+            if not self._unchanged(job): return self._dropped(report, self.tr("The file changed while it was being converted."))
+            output_size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, output) # Atomic: the library never sees a partial file
+            if DELETE_ORIGINAL:
+                try: os.remove(source)
+                except OSError as e: print(f"Transcoder: could not delete '{name}': {e}")
+        finally:
+            try: os.remove(tmp_path)
+            except OSError: pass
+        duration = job.get('duration')
+        report.update(status='done', encoder=encoder, elapsed=round(elapsed, 1), speed=round(duration / elapsed, 2) if duration and elapsed else None,
+                      output_size=output_size, ratio=round(output_size / job['size'], 3) if job['size'] else None, finished=time.time())
+        speed = f" ({report['speed']}x realtime)" if report['speed'] else ""
+        print(f"Transcoder: '{name}' done with {encoder} in {elapsed:.0f}s{speed}, size {job['size'] / 1e6:.0f} -> {output_size / 1e6:.0f} MB (x{report['ratio']}).")
+        return report
+
+    def shutdown(self):
+        """ Stops the workers; a running ffmpeg is killed and its job stays queued for the next session. """
+        with self.condition: self.stopping = True; self.queue.clear(); self.condition.notify_all()
+
+# --- END OF FILE source/transcoder.py ---
@@ -0,0 +1,199 @@
+# --- START OF FILE source/translation_backends.py ---
+
+"""
+Translation backends for SubtitleTranslator.
+- GeminiBackend: Google Gemini generateContent REST endpoint (default); batches use
+  streamGenerateContent (server-sent events) so records can be used as they arrive.
+- OpenAICompatibleBackend: any /chat/completions server (OpenAI, llama.cpp, vLLM, Ollama, LM Studio...).
+- OfflineBackend: in-process CPU machine translation with Argos Translate (optional dependency).
+Prompt-based backends only transport a prompt; batching, id records and retries stay in the translator.
+Select one with TRANSLATION_BACKEND=gemini|openai|offline (environment or .env).
+"""
+
+import os
+import json
+
+import requests
+from dotenv import load_dotenv
+
+try:
+    import argostranslate.translate as argos_translate
+except ImportError:
+    argos_translate = None
+
+# --- Configuration ---
+load_dotenv()
+TRANSLATION_BACKEND = os.environ.get("TRANSLATION_BACKEND", "gemini").lower()
+GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "YOUR_GEMINI_API_KEY_HERE")
+GEMINI_MODEL_NAME = "gemini-1.5-flash-latest" # Use the specific model identifier
+GEMINI_API_BASE_URL = os.environ.get("GEMINI_API_BASE_URL", "https://generativelanguage.googleapis.com/v1beta") # Override to point at a mock server
+GEMINI_STREAMING = os.environ.get("GEMINI_STREAMING", "1").lower() not in ("0", "false", "no") # Stream batch responses
+OPENAI_API_BASE_URL = os.environ.get("OPENAI_API_BASE_URL", "http://127.0.0.1:8080/v1") # A local model server by default
+OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "")
+OPENAI_MODEL_NAME = os.environ.get("OPENAI_MODEL_NAME", "local-model")
+API_TIMEOUT = 60 # Seconds
+RATE_LIMIT_DEFAULT_WAIT = 5 # Seconds to back off on 429 without a Retry-After header
+# --- End Configuration ---
+
+
+class RateLimitedError(Exception):
+    """ Raised by a backend on HTTP 429; the translator waits retry_after seconds and slows down. """
+    def __init__(self, retry_after):
+        super().__init__(f"Rate limited, retry after {retry_after}s"); self.retry_after = retry_after
+
+
+def _retry_after(response):
+    try: return float(response.headers.get('Retry-After', RATE_LIMIT_DEFAULT_WAIT))
+    except ValueError: return RATE_LIMIT_DEFAULT_WAIT
+
+
+class TranslationBackend:
+    """
+    Base class. Prompt backends (uses_prompts=True) implement generate(prompt, json_mode) and,
+    with supports_streaming, generate_stream(prompt, json_mode) yielding text chunks;
+    direct backends implement translate_texts(texts, source_code, target_code).
+    model_id keys the translation memory, journals and batch tuning, so it must identify the engine.
+    """
+    name = "base"
+    uses_prompts = True
+    max_concurrency = None # Cap on batches in flight; None means the translator's setting
+    supports_streaming = False
+
+    @property
+    def model_id(self):
+        raise NotImplementedError
+
+    def check(self, source_code, target_codes):
+        """ Returns an error message if the backend cannot be used, else None. """
+        return None
+
+    def generate(self, prompt, json_mode=False):
+        raise NotImplementedError
+
+    def generate_stream(self, prompt, json_mode=False):
+        """ Yields the generated text in chunks. RateLimitedError must be raised before the first chunk. """
+        yield self.generate(prompt, json_mode)
+
+    def translate_texts(self, texts, source_code, target_code):
+        raise NotImplementedError
+
+
+class GeminiBackend(TranslationBackend):
+    name = "gemini"
+
+    def __init__(self, api_key=GEMINI_API_KEY, model=GEMINI_MODEL_NAME, base_url=GEMINI_API_BASE_URL, streaming=GEMINI_STREAMING):
+        self.api_key = api_key; self.model = model; self.supports_streaming = streaming
+        self.api_url = f"{base_url}/models/{model}:generateContent"
+        self.stream_url = f"{base_url}/models/{model}:streamGenerateContent"
+        self.session = requests.Session()
+
+    @property
+    def model_id(self):
+        return self.model # Unprefixed, so translation memory from earlier versions stays valid
+
+    def check(self, source_code, target_codes):
+        if not self.api_key or self.api_key == "YOUR_GEMINI_API_KEY_HERE": return "Gemini API Key not configured."
+        return None
+
+    @staticmethod
+    def _payload(prompt, json_mode):
+        generation_config = {"temperature": 0.7, "candidateCount": 1}
+        if json_mode: generation_config["responseMimeType"] = "application/json"
+        return {"contents": [{"parts": [{"text": prompt}]}], "generationConfig": generation_config}
+
+    @staticmethod
+    def _response_text(data, allow_empty=False):
+        candidates = data.get('candidates', [])
+        if candidates:
+            content = candidates[0].get('content', {}); parts = content.get('parts', [])
+            if parts: return "".join(part.get('text', '') for part in parts)
+            if allow_empty: return "" # Stream chunks may carry only a finish reason
+            raise ValueError("Invalid Gemini response: 'parts' missing.")
+        block_reason = data.get('promptFeedback', {}).get('blockReason')
+        if block_reason: raise ValueError(f"Gemini API blocked prompt: {block_reason}")
+        if allow_empty: return ""
+        raise ValueError("Invalid Gemini response: 'candidates' missing.")
+
+    def generate(self, prompt, json_mode=False):
+        response = self.session.post(self.api_url, headers={'Content-Type': 'application/json'}, params={'key': self.api_key}, json=self._payload(prompt, json_mode), timeout=API_TIMEOUT)
+        if response.status_code == 429: raise RateLimitedError(_retry_after(response))
+        response.raise_for_status()
+        return self._response_text(response.json())
+
+    def generate_stream(self, prompt, json_mode=False):
+        """ streamGenerateContent as server-sent events; each 'data:' line holds a partial response. """
+        with self.session.post(self.stream_url, headers={'Content-Type': 'application/json'}, params={'key': self.api_key, 'alt': 'sse'},
+                               json=self._payload(prompt, json_mode), timeout=API_TIMEOUT, stream=True) as response:
+            if response.status_code == 429: raise RateLimitedError(_retry_after(response))
+            response.raise_for_status()
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data:'): continue
+                chunk = self._response_text(json.loads(line[5:]), allow_empty=True)
+                if chunk: yield chunk
+
+
+class OpenAICompatibleBackend(TranslationBackend):
+    """ Chat completions over HTTP; works with hosted APIs and local servers alike. """
+    name = "openai"
+
+    def __init__(self, base_url=OPENAI_API_BASE_URL, model=OPENAI_MODEL_NAME, api_key=OPENAI_API_KEY):
+        self.base_url = base_url.rstrip('/'); self.model = model; self.api_key = api_key
+        self.session = requests.Session()
+
+    @property
+    def model_id(self):
+        return f"openai:{self.model}"
+
+    def generate(self, prompt, json_mode=False):
+        headers = {'Content-Type': 'application/json'}
+        if self.api_key: headers['Authorization'] = f"Bearer {self.api_key}"
+        payload = {"model": self.model, "messages": [{"role": "user", "content": prompt}], "temperature": 0.3}
+        response = self.session.post(f"{self.base_url}/chat/completions", headers=headers, json=payload, timeout=API_TIMEOUT)
+        if response.status_code == 429: raise RateLimitedError(_retry_after(response))
+        response.raise_for_status()
+        choices = response.json().get('choices', [])
+        if not choices: raise ValueError("Invalid chat completion response: 'choices' missing.")
+        return choices[0].get('message', {}).get('content') or ''
+
+
+class OfflineBackend(TranslationBackend):
+    """
+    CPU-only translation in this process with Argos Translate (OpenNMT/CTranslate2 models).
+    Needs 'pip install argostranslate' and the language package, e.g. 'argospm install translate-en_pl'.
+    """
+    name = "offline"
+    uses_prompts = False
+    max_concurrency = 1 # One model on the CPU; more threads only contend
+
+    def __init__(self):
+        self.translations = {}
+
+    @property
+    def model_id(self):
+        return "argos"
+
+    def _translation(self, source_code, target_code):
+        key = (source_code, target_code)
+        if key not in self.translations: self.translations[key] = argos_translate.get_translation_from_codes(source_code, target_code)
+        return self.translations[key]
+
+    def check(self, source_code, target_codes):
+        if argos_translate is None: return "Offline translation needs the 'argostranslate' package."
+        for target_code in target_codes:
+            try:
+                if self._translation(source_code, target_code) is None: raise LookupError
+            except Exception: return f"No offline {source_code}->{target_code} language package installed."
+        return None
+
+    def translate_texts(self, texts, source_code, target_code):
+        """ Line by line, so subtitle line breaks survive. """
+        translation = self._translation(source_code, target_code)
+        return ["\n".join(translation.translate(line) if line.strip() else line for line in text.split("\n")) for text in texts]
+
+
+def create_backend(name=TRANSLATION_BACKEND):
+    backends = {'gemini': GeminiBackend, 'openai': OpenAICompatibleBackend, 'offline': OfflineBackend}
+    if name not in backends: print(f"Warning: Unknown TRANSLATION_BACKEND '{name}', using gemini."); name = 'gemini'
+    return backends[name]()
+
+# --- END OF FILE source/translation_backends.py ---
@@ -0,0 +1,145 @@
+# --- START OF FILE source/translation_jobs.py ---
+
+"""
+Translation job queue for the Raspberry Pi Movie Player App.
+Runs SubtitleTranslator jobs from a priority queue (FIFO within a priority) with
+a bounded number of concurrent jobs and cooperative cancellation between batches.
+Queued files from the same directory (the episodes of a season) are packed into
+one job when they ask for the same target languages, so their batches share
+round trips.
+"""
+
+import os
+import heapq
+import itertools
+import threading
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+# --- Configuration ---
+PRIORITY_PLAYBACK = 0 # Translation for the video that is playing
+PRIORITY_NORMAL = 10 # Requested from the library
+PRIORITY_BACKGROUND = 20
+MAX_CONCURRENT_JOBS = 2 # Jobs (single or packed) running at once; each keeps its own batches in flight
+MAX_PACKED_FILES = 12 # Files translated together in one packed job
+# --- End Configuration ---
+
+
+class TranslationJob:
+    """ One queued file. Lower priority values run first; seq keeps FIFO order within a priority. """
+    __slots__ = ('srt_path', 'priority', 'seq', 'playhead_ms', 'target_codes', 'cancel_event', 'cancelled')
+
+    def __init__(self, srt_path, priority, seq, playhead_ms=None, target_codes=None):
+        self.srt_path = srt_path; self.priority = priority; self.seq = seq; self.playhead_ms = playhead_ms
+        self.target_codes = target_codes # None means the translator's default targets
+        self.cancel_event = None # Shared by all files of a running (packed) job
+        self.cancelled = False # Set when this file itself was cancelled
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class TranslationJobManager(QObject):
+    """
+    Queues translation jobs for a SubtitleTranslator and runs them on worker threads.
+    Results arrive through the translator's signals (translation_complete, translation_error,
+    translation_cancelled, translation_progress). queue_changed(queued, running) reports load.
+    """
+    queue_changed = pyqtSignal(int, int)
+
+    def __init__(self, translator, max_concurrent_jobs=MAX_CONCURRENT_JOBS, parent=None):
+        super().__init__(parent)
+        self.translator = translator; self.max_concurrent_jobs = max_concurrent_jobs
+        self.lock = threading.Lock(); self.queue = []; self.queued = {}; self.running = {}
+        self.seq = itertools.count(); self.running_jobs = 0
+        self.dispatch_timer = QTimer(self); self.dispatch_timer.setSingleShot(True); self.dispatch_timer.setInterval(0)
+        self.dispatch_timer.timeout.connect(self._dispatch) # Coalesces submissions made in one event-loop pass, so they can be packed
+
+    def submit(self, srt_path, priority=PRIORITY_NORMAL, playhead_ms=None, target_codes=None):
+        """
+        Queues srt_path for translation into target_codes (default: the translator's targets). A file already
+        queued keeps its place but takes the higher priority. Returns False if rejected.
+        """
+        target_codes = tuple(target_codes) if target_codes else None
+        error_msg = self.translator.check_request(srt_path, target_codes)
+        if error_msg: self.translator.translation_error.emit(srt_path, error_msg); return False
+        with self.lock: self._enqueue(srt_path, priority, playhead_ms, target_codes)
+        self.dispatch_timer.start(); self._emit_queue_changed()
+        return True
+
+    def _enqueue(self, srt_path, priority, playhead_ms, target_codes=None):
+        """ Lock must be held. Superseded heap entries are dropped lazily when popped. """
+        if srt_path in self.running: return
+        job = self.queued.get(srt_path)
+        if job is None or priority < job.priority or (playhead_ms is not None and job.playhead_ms is None) or target_codes != job.target_codes:
+            job = TranslationJob(srt_path, min(priority, job.priority) if job else priority, next(self.seq), playhead_ms, target_codes)
+            heapq.heappush(self.queue, job); self.queued[srt_path] = job
+        print(f"Queued translation: {os.path.basename(srt_path)} (priority {job.priority}, {len(self.queued)} queued)")
+
+    def cancel(self, srt_path):
+        """ Removes a queued file, or stops a running job after the batches in flight (a packed job stops as a whole). """
+        with self.lock:
+            queued_job = self.queued.pop(srt_path, None); running_job = self.running.get(srt_path)
+            if running_job: running_job.cancelled = True; running_job.cancel_event.set() # Reported when its batches in flight are done
+        if queued_job: print(f"Removed queued translation: {os.path.basename(srt_path)}"); self.translator.translation_cancelled.emit(srt_path); self._emit_queue_changed()
+        return bool(queued_job or running_job)
+
+    def cancel_all(self):
+        with self.lock: paths = list(self.queued) + list(self.running)
+        for srt_path in paths: self.cancel(srt_path)
+
+    def is_active(self, srt_path):
+        with self.lock: return srt_path in self.queued or srt_path in self.running
+
+    def pending_count(self):
+        with self.lock: return len(self.queued) + len(self.running)
+
+    def _emit_queue_changed(self):
+        with self.lock: queued, running = len(self.queued), len(self.running)
+        self.queue_changed.emit(queued, running)
+
+    def _pop_group(self):
+        """ Pops the next job; a non-progressive job takes queued files from the same directory and targets along. Lock must be held. """
+        while self.queue:
+            job = heapq.heappop(self.queue)
+            if self.queued.get(job.srt_path) is not job: continue # Cancelled, superseded or already packed
+            del self.queued[job.srt_path]; group = [job]
+            if job.playhead_ms is None:
+                directory = os.path.dirname(job.srt_path)
+                for other in sorted(j for j in self.queued.values() if j.playhead_ms is None and j.target_codes == job.target_codes and os.path.dirname(j.srt_path) == directory)[:MAX_PACKED_FILES - 1]:
+                    del self.queued[other.srt_path]; group.append(other) # Its heap entry becomes stale
+            return group
+        return None
+
+    def _dispatch(self):
+        """ Starts queued jobs while fewer than max_concurrent_jobs are running. Safe to call from any thread. """
+        started = False
+        with self.lock:
+            while self.running_jobs < self.max_concurrent_jobs:
+                group = self._pop_group()
+                if not group: break
+                cancel_event = threading.Event()
+                for job in group: job.cancel_event = cancel_event; self.running[job.srt_path] = job
+                self.running_jobs += 1; started = True
+                threading.Thread(target=self._run_group, args=(group,), daemon=True).start()
+        if started: self._emit_queue_changed()
+
+    def _run_group(self, group):
+        unfinished = []
+        try:
+            print(f"Translation job started: {', '.join(os.path.basename(job.srt_path) for job in group)}")
+            unfinished = self.translator._run_translation_group([job.srt_path for job in group], group[0].playhead_ms, group[0].cancel_event, group[0].target_codes)
+        except Exception as e: print(f"Translation job failed: {e}")
+        finally:
+            cancelled = []
+            with self.lock:
+                for job in group: self.running.pop(job.srt_path, None)
+                self.running_jobs -= 1
+                for job in group:
+                    if job.srt_path not in unfinished: continue
+                    if job.cancelled: cancelled.append(job.srt_path)
+                    else: self._enqueue(job.srt_path, job.priority, job.playhead_ms, job.target_codes) # Stopped only because another file of its packed job was cancelled
+            for srt_path in cancelled: self.translator.translation_cancelled.emit(srt_path)
+            self._emit_queue_changed(); self._dispatch()
+
+# --- END OF FILE source/translation_jobs.py ---
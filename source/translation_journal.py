@@ -0,0 +1,77 @@
+# --- START OF FILE source/translation_journal.py ---
+
+"""
+Checkpoint journal for subtitle translation jobs.
+Completed batches are appended to '<srt>.translation-journal.jsonl' next to the
+source SRT as they finish. A later run on the same file (same content hash,
+target languages and model) resumes from the journal and only translates what
+is missing. The journal is removed once the translated SRT has been written.
+"""
+
+import os
+import json
+import hashlib
+import threading
+
+# --- Configuration ---
+JOURNAL_SUFFIX = ".translation-journal.jsonl"
+JOURNAL_VERSION = 2 # 2: dst holds {target_code: translation}, one job may have several targets
+HASH_CHUNK_SIZE = 64 * 1024
+# --- End Configuration ---
+
+
+def file_content_hash(filepath):
+    """ SHA-256 of the file contents, read in chunks. """
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''): digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TranslationJournal:
+    """
+    Append-only JSONL journal: a header line identifying the job, then one
+    {"src": normalized source text, "dst": {target_code: translation}} record per line.
+    """
+
+    def __init__(self, srt_path, content_hash, target_lang, model):
+        """ target_lang identifies the job's targets, e.g. "pl" or "pl,de". """
+        self.path = f"{srt_path}{JOURNAL_SUFFIX}"
+        self.header = {'version': JOURNAL_VERSION, 'sha256': content_hash, 'target': target_lang, 'model': model}
+        self.lock = threading.Lock()
+
+    def load(self):
+        """ Returns {src: dst} checkpointed for this job; a journal of another job (or version) is discarded. """
+        entries = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                try: header = json.loads(f.readline())
+                except ValueError: header = None
+                if header != self.header:
+                    print(f"  Translation journal '{os.path.basename(self.path)}' belongs to another file version. Starting over.") # Debug print
+                    self.discard(); return {}
+                for line in f:
+                    try: record = json.loads(line); entries[record['src']] = record['dst']
+                    except (ValueError, KeyError, TypeError): continue # Torn last line after a crash
+        except FileNotFoundError: return {}
+        except OSError as e: print(f"  Warning: Could not read translation journal: {e}") # Debug print
+        return entries
+
+    def append(self, pairs):
+        """ Appends (src, dst) pairs and flushes them to disk, so a finished batch survives a crash. """
+        lines = [json.dumps({'src': src, 'dst': dst}, ensure_ascii=False) + "\n" for src, dst in pairs if src]
+        if not lines: return
+        with self.lock:
+            try:
+                new_file = not os.path.exists(self.path)
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    if new_file: f.write(json.dumps(self.header) + "\n")
+                    f.writelines(lines); f.flush(); os.fsync(f.fileno())
+            except OSError as e: print(f"  Warning: Could not write translation journal: {e}") # Debug print
+
+    def discard(self):
+        try: os.remove(self.path)
+        except FileNotFoundError: pass
+        except OSError as e: print(f"  Warning: Could not remove translation journal: {e}") # Debug print
+
+# --- END OF FILE source/translation_journal.py ---
@@ -1,9 +1,13 @@
 # --- START OF FILE source/translation_manager.py ---
 
 """
-Handles subtitle translation using Google Gemini API.
-Parses SRT, batches subtitle text entries, calls API, retries on errors,
-falls back to single-entry translation, and reconstructs SRT.
+Handles subtitle translation through a pluggable backend (Gemini API by default,
+see translation_backends). Parses SRT (streaming parser), batches subtitle text
+entries as id-tagged JSON records, calls the backend (streaming records as they complete when the backend
+supports it), re-requests only missing ids, falls back to single-entry translation,
+checkpoints finished batches to a journal (resumable) and reconstructs SRT.
+In progressive mode the cues around the playback position go first and a
+growing partial SRT is written for the player to load while the film plays.
 """
 
 import os
@@ -14,55 +18,54 @@ import re
 import traceback
 import requests
 import json
-
-# Try importing pysrt, provide fallback/warning if missing
-try:
-    import pysrt
-    import chardet # pysrt often uses chardet
-    PYSRT_AVAILABLE = True
-except ImportError:
-    print("WARNING: 'pysrt' or 'chardet' library not found. Subtitle parsing will be less robust.")
-    print("Please install it: pip install pysrt chardet")
-    PYSRT_AVAILABLE = False
-    SRT_REGEX = re.compile(r"(\d+)\s*?\r?\n(\d{2}:\d{2}:\d{2},\d{3}) --> (\d{2}:\d{2}:\d{2},\d{3})\s*?\r?\n(.*?)(?=\r?\n\r?\n\d+|\Z)", re.DOTALL | re.MULTILINE)
-
+import queue
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
-from dotenv import load_dotenv
+
+from source.srt_parser import parse_srt, record_normalized_subtitle
+from source.storage import atomic_write_text
+from source.translation_memory import TranslationMemory, normalize_source_text
+from source.batch_sizer import BatchSizer
+from source.translation_journal import TranslationJournal, file_content_hash
+from source.translation_backends import create_backend, RateLimitedError
 
 # --- Configuration ---
-load_dotenv()
-GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "YOUR_GEMINI_API_KEY_HERE")
-GEMINI_MODEL_NAME = "gemini-1.5-flash-latest" # Use the specific model identifier
-GEMINI_API_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL_NAME}:generateContent"
 TARGET_LANGUAGE = "Polish"
 TARGET_LANGUAGE_CODE = "pl" # Standard code for the target language
 SOURCE_LANGUAGE = "English"
-BATCH_SIZE = 10 # Number of SUBTITLE ENTRIES per batch.
+SOURCE_LANGUAGE_CODE = "en"
+LANGUAGE_NAMES = {'pl': "Polish", 'en': "English", 'de': "German", 'fr': "French", 'es': "Spanish", 'it': "Italian", 'pt': "Portuguese",
+                  'nl': "Dutch", 'cs': "Czech", 'sk': "Slovak", 'uk': "Ukrainian", 'ru': "Russian", 'sv': "Swedish", 'hu': "Hungarian"}
+# Languages produced by one job, comma-separated (e.g. "pl,de"); the first one is shown in the player
+TARGET_LANGUAGE_CODES = [code.strip().lower() for code in os.environ.get("TRANSLATION_TARGETS", TARGET_LANGUAGE_CODE).split(",") if code.strip()]
 API_RETRY_COUNT = 4 # Number of retries specifically for count mismatch
 SINGLE_RETRY_COUNT = 1 # Number of retries for single line errors
-API_TIMEOUT = 60 # Seconds
+MAX_CONCURRENT_BATCHES = 4 # Batches kept in flight at once
+RATE_LIMIT_RETRY_COUNT = 6 # 429 responses tolerated per request before it counts as failed
+PROGRESSIVE_FIRST_BATCH = 8 # Entries in the first progressive batch, so the first subtitles show up quickly
+PROGRESSIVE_BEHIND_WEIGHT = 4 # Cues behind the playhead count as this many cues ahead when ordering
+PARTIAL_WRITE_INTERVAL = 4.0 # Seconds between rewrites of the partial SRT
+STREAM_POLL_INTERVAL = 0.25 # Seconds between commits of records streamed from batches in flight
 
-# Prompt for Batch Translation
-PROMPT_TEMPLATE_BATCH = f"""MAKE SURE THAT THE NUMBER OF OUTPUTS EQUALS {{batch_size}}.
-Translate the following {SOURCE_LANGUAGE} subtitle text entries into {TARGET_LANGUAGE}.
-Each entry is separated by "|||". Some entries may contain multiple lines.
-Preserve meaning and approximate line breaks if appropriate for {TARGET_LANGUAGE} subtitles.
-Return the translated entries in the exact same order, also separated by "|||".
-Do not add any extra text, explanations, numbering, or formatting. Only output the translated entries separated by "|||".
+# Prompt for Batch Translation (structured: JSON records tagged with ids, one key per target language)
+PROMPT_TEMPLATE_BATCH = f"""Translate the following {SOURCE_LANGUAGE} subtitle entries into {{target_languages}}.
+The input is a JSON array of {{batch_size}} objects with the keys "id" and "text". Some texts contain line breaks (\\n).
+Preserve meaning and approximate line breaks if appropriate for subtitles in each language.
+Return ONLY a JSON array with one object per input entry. Each object has the same "id" and one key per target language code {{target_keys}} holding the translation of "text".
+Do not merge, split, skip or renumber entries. Do not add any extra text or explanations.
 
-Input Entries (separated by |||):
+Input Entries:
 >>>
-{{batch_text}}
+{{batch_json}}
 >>>
-
-Translated Entries (separated by |||):
 """
 
-# Prompt for Single Entry Translation
-PROMPT_TEMPLATE_SINGLE = f"""Translate the following single {SOURCE_LANGUAGE} subtitle text entry into {TARGET_LANGUAGE}.
+# Prompt for Single Entry Translation (one target language)
+PROMPT_TEMPLATE_SINGLE = f"""Translate the following single {SOURCE_LANGUAGE} subtitle text entry into {{target_language}}.
 The entry may contain multiple lines.
-Preserve the meaning and approximate line breaks if appropriate for {TARGET_LANGUAGE} subtitles.
+Preserve the meaning and approximate line breaks if appropriate for {{target_language}} subtitles.
 Return only the translated text for this single entry. Do not add any extra text, explanations, or formatting.
 
 Input Entry:
@@ -75,183 +78,476 @@ Translated Entry:
 # --- End Configuration ---
 
 
+class TranslationCancelled(Exception):
+    """ Raised between batches once a job's cancel event is set. """
+
+
+class BatchContext:
+    """
+    State of one running job (_run_translation_group), so concurrent jobs on one translator never share it:
+    the in-flight window that 429s shrink, the API calls it made, and the texts that fell back to the original.
+    """
+
+    def __init__(self, max_in_flight):
+        self.lock = threading.Lock(); self.concurrency_limit = max_in_flight; self.success_streak = 0
+        self.api_calls = 0; self.fallback_texts = set()
+
+
+def language_name(code):
+    return LANGUAGE_NAMES.get(code, code)
+
+
+class IncrementalRecordParser:
+    """
+    Picks complete top-level JSON objects out of a streamed response as soon as their closing
+    brace arrives. Array brackets, code fences and separators between objects are skipped;
+    an object cut off by a truncated stream is never returned.
+    """
+
+    def __init__(self):
+        self.buffer = ""; self.pos = 0; self.depth = 0; self.in_string = False; self.escaped = False; self.start = None
+
+    def feed(self, chunk):
+        """ Adds a chunk of text and returns the objects it completed. """
+        self.buffer += chunk; records = []
+        for i in range(self.pos, len(self.buffer)):
+            char = self.buffer[i]
+            if self.in_string:
+                if self.escaped: self.escaped = False
+                elif char == '\\': self.escaped = True
+                elif char == '"': self.in_string = False
+            elif char == '"': self.in_string = self.depth > 0
+            elif char == '{':
+                if self.depth == 0: self.start = i
+                self.depth += 1
+            elif char == '}' and self.depth > 0:
+                self.depth -= 1
+                if self.depth == 0:
+                    try: records.append(json.loads(self.buffer[self.start:i + 1]))
+                    except ValueError: pass # Malformed object; its id is re-requested
+        if self.depth == 0: self.buffer = ""; self.pos = 0 # Nothing open, drop consumed text
+        else: self.buffer = self.buffer[self.start:]; self.pos = len(self.buffer); self.start = 0
+        return records
+
+
 class SubtitleTranslator(QObject):
     """
-    Translates subtitle files entry-by-entry (batched) using the Gemini API,
-    with fallback to single-entry translation.
+    Translates subtitle files entry-by-entry (batched) through a TranslationBackend,
+    with fallback to single-entry translation. Jobs are queued and run by TranslationJobManager.
     """
-    translation_progress = pyqtSignal(int, int)
+    translation_progress = pyqtSignal(str, int, int) # (original_srt_path, entries translated, entries to translate); packed files report under the first one
     translation_complete = pyqtSignal(str, str)
+    partial_translation_ready = pyqtSignal(str, str) # Emits (original_srt_path, partial_srt_path) in progressive mode
+    translation_cancelled = pyqtSignal(str) # Emits original_srt_path; emitted by TranslationJobManager
     translation_error = pyqtSignal(str, str) # Emits (original_srt_path, error_message_string)
 
-    def __init__(self, parent=None):
+    def __init__(self, backend=None, parent=None):
         super().__init__(parent)
-        self.api_key = GEMINI_API_KEY
-        self.api_url = GEMINI_API_URL
-        self.session = requests.Session()
+        self.max_concurrent_batches = MAX_CONCURRENT_BATCHES
+        self.translation_memory = TranslationMemory()
+        self.set_backend(backend or create_backend())
+        self._local = threading.local() # Per-worker 429 counter, read by the batch sizer
+        # A 429 pauses new requests of every job (one API quota); each job's in-flight window shrinks in its BatchContext
+        self._backpressure_lock = threading.Lock(); self._resume_at = 0.0
+        self.api_calls = 0 # Requests sent by all jobs (including 429s and retries)
+
+    def set_backend(self, backend):
+        """ Switches the translation engine; batch tuning is kept per engine. """
+        self.backend = backend
+        self.batch_sizer = BatchSizer(backend.model_id) # Entries per batch follow an adaptive token budget
+        print(f"Translation backend: {backend.name} ({backend.model_id})")
 
-    def translate_srt_file(self, srt_filepath):
-        """ Starts the translation process in a background thread. """
+    def check_request(self, srt_filepath, target_codes=None):
+        """ Returns an error message if srt_filepath cannot be translated, else None. Jobs are run by TranslationJobManager. """
         if not os.path.exists(srt_filepath):
             # Use self.tr() for error message
-            error_msg = self.tr("Input file not found: {0}").format(srt_filepath)
-            self.translation_error.emit(srt_filepath, error_msg)
-            return
-        if not self.api_key or self.api_key == "YOUR_GEMINI_API_KEY_HERE":
-             # Use self.tr()
-             error_msg = self.tr("Gemini API Key not configured.")
-             self.translation_error.emit(srt_filepath, error_msg)
-             return
-        thread = threading.Thread(target=self._run_translation, args=(srt_filepath,), daemon=True); thread.start()
+            return self.tr("Input file not found: {0}").format(srt_filepath)
+        error_msg = self.backend.check(SOURCE_LANGUAGE_CODE, target_codes or TARGET_LANGUAGE_CODES)
+        # Use self.tr()
+        return self.tr(error_msg) if error_msg else None
 
     def _parse_srt(self, filepath):
-        """ Parses SRT file using pysrt if available, otherwise basic regex. """
-        print(f"Parsing SRT file: {filepath}"); subs = []; encoding = 'utf-8' # Debug print
-        if PYSRT_AVAILABLE:
-            try:
-                with open(filepath, 'rb') as fp: raw_data = fp.read(); detected = chardet.detect(raw_data)
-                encoding = detected.get('encoding', 'utf-8') if detected else 'utf-8'
-                if encoding.lower() in ['ascii','windows-1250','iso-8859-1','iso-8859-2']: encoding = 'utf-8'
-                print(f"  Detected encoding: {encoding}"); subs = pysrt.open(filepath, encoding=encoding); print(f"  Parsed {len(subs)} entries using pysrt."); return subs
-            except Exception as e: print(f"  pysrt failed (enc: {encoding}): {e}. Falling back."); # Debug print
-        try: # Regex fallback
-            with open(filepath, 'r', encoding='utf-8', errors='ignore') as f: content = f.read()
-            raw_entries = SRT_REGEX.findall(content); subs = []
-            for index, start, end, text in raw_entries: subs.append({'index': int(index), 'start_time': start.strip(), 'end_time': end.strip(), 'text': text.strip().replace('\r', '')})
-            print(f"  Parsed {len(subs)} entries using regex."); return subs # Debug print
-        except Exception as e:
-            print(f"  Regex parse failed: {e}") # Debug print
+        """ Parses the SRT file in a single streaming pass into compact SrtCues. """
+        print(f"Parsing SRT file: {filepath}") # Debug print
+        try:
+            cues = parse_srt(filepath)
+            print(f"  Detected encoding: {cues.encoding}. Parsed {len(cues)} entries.") # Debug print
+            return cues
+        except (OSError, LookupError, ValueError) as e:
+            print(f"  SRT parse failed: {e}") # Debug print
             # Use self.tr() for exception message
-            raise ValueError(self.tr("Failed to parse SRT file ({0}) using both pysrt and regex.").format(filepath)) from e
+            raise ValueError(self.tr("Failed to parse SRT file ({0}).").format(filepath)) from e
 
-    def _reconstruct_srt(self, original_subs, translated_texts, use_pysrt_obj):
+    def _reconstruct_srt(self, original_subs, translated_texts):
         """ Reconstructs the SRT content string with translated text. """
         if len(original_subs) != len(translated_texts):
             print(f"Error: Sub count mismatch reconstruction. Orig: {len(original_subs)}, Trans: {len(translated_texts)}") # Debug print
             # Use self.tr() for exception message
             raise ValueError(self.tr("Subtitle count mismatch during reconstruction."))
+        return original_subs.to_srt(translated_texts)
+
+    def _max_in_flight(self):
+        return min(self.max_concurrent_batches, self.backend.max_concurrency or self.max_concurrent_batches)
+
+    def _wait_for_backpressure(self):
+        """ Blocks while a rate-limit pause is active. """
+        while True:
+            with self._backpressure_lock: delay = self._resume_at - time.time()
+            if delay <= 0: return
+            time.sleep(min(delay, 1.0))
+
+    def _note_rate_limited(self, retry_after, context):
+        with self._backpressure_lock: self._resume_at = max(self._resume_at, time.time() + retry_after)
+        with context.lock:
+            context.concurrency_limit = max(1, context.concurrency_limit // 2); context.success_streak = 0
+            print(f"    Rate limited (429). Pausing {retry_after:.1f}s, in-flight batches now <= {context.concurrency_limit}.") # Debug print
+
+    def _note_request_ok(self, context):
+        with context.lock:
+            context.success_streak += 1
+            if context.concurrency_limit < self._max_in_flight() and context.success_streak >= context.concurrency_limit * 2:
+                context.concurrency_limit += 1; context.success_streak = 0
 
-        srt_content = ""
-        if use_pysrt_obj:
-            lines = []
-            for i, sub in enumerate(original_subs): sub.text = translated_texts[i]; lines.append(str(i + 1)); lines.append(f"{sub.start} --> {sub.end}"); lines.append(sub.text); lines.append("")
-            srt_content = "\n".join(lines)
-        else:
-            output_lines = [];
-            for i, entry in enumerate(original_subs): output_lines.append(str(entry['index'])); output_lines.append(f"{entry['start_time']} --> {entry['end_time']}"); output_lines.append(translated_texts[i]); output_lines.append("")
-            srt_content = "\n".join(output_lines)
-        return srt_content
-
-    def _call_gemini_api_single(self, entry_text, retry_count=SINGLE_RETRY_COUNT):
-        """Sends a SINGLE entry to the Gemini API, with retries."""
+    def _count_call(self, context):
+        with self._backpressure_lock: self.api_calls += 1
+        with context.lock: context.api_calls += 1
+
+    def _generate(self, prompt, context, json_mode=False):
+        """ Sends one prompt to the backend and returns the generated text; waits out and retries 429 responses. """
+        for _ in range(RATE_LIMIT_RETRY_COUNT + 1):
+            self._wait_for_backpressure(); self._count_call(context)
+            try: generated_text = self.backend.generate(prompt, json_mode)
+            except RateLimitedError as e:
+                self._note_rate_limited(e.retry_after, context); self._local.rate_limited = getattr(self._local, 'rate_limited', 0) + 1; last_error = e; continue
+            self._note_request_ok(context); return generated_text
+        raise last_error
+
+    def _try_api_single(self, entry_text, context, target_code=TARGET_LANGUAGE_CODE, retry_count=SINGLE_RETRY_COUNT):
+        """Sends a SINGLE entry to the backend for one language, with retries. Returns None if every attempt failed."""
         if not entry_text or not entry_text.strip(): return ""
-        prompt = PROMPT_TEMPLATE_SINGLE.format(entry_text=entry_text)
-        headers = {'Content-Type': 'application/json'}
-        payload = {"contents": [{"parts": [{"text": prompt}]}], "generationConfig": {"temperature": 0.7, "candidateCount": 1}}
-        params = {'key': self.api_key}
+        prompt = PROMPT_TEMPLATE_SINGLE.format(entry_text=entry_text, target_language=language_name(target_code))
         for attempt in range(retry_count + 1):
-             try:
-                 response = self.session.post(self.api_url, headers=headers, params=params, json=payload, timeout=API_TIMEOUT)
-                 response.raise_for_status(); data = response.json(); candidates = data.get('candidates', [])
-                 if candidates:
-                     content = candidates[0].get('content', {}); parts = content.get('parts', [])
-                     if parts: return parts[0].get('text', '').strip()
-                     # Use self.tr() for internal error messages that become exception text
-                     else: raise ValueError(self.tr("Invalid Gemini response: 'parts' missing."))
-                 else:
-                     prompt_feedback = data.get('promptFeedback', {}); block_reason = prompt_feedback.get('blockReason')
-                     if block_reason: raise ValueError(self.tr("Gemini API blocked prompt: {0}").format(block_reason))
-                     else: raise ValueError(self.tr("Invalid Gemini response: 'candidates' missing."))
+             try: return self._generate(prompt, context).strip()
              except Exception as e:
                  print(f"      Single API Error (Attempt {attempt+1}/{retry_count+1}): {e}") # Debug print
-                 if attempt == retry_count: print(f"      Single entry translation failed: '{entry_text[:50]}...'"); return entry_text # Fallback original
+                 if attempt == retry_count: print(f"      Single entry translation failed: '{entry_text[:50]}...'"); return None
                  time.sleep(1.0 ** attempt) # Simple backoff
-        return entry_text # Fallback if loop finishes unexpectedly
+        return None
+
+    def _call_api_single(self, entry_text, context, target_code=TARGET_LANGUAGE_CODE, retry_count=SINGLE_RETRY_COUNT):
+        """Sends a SINGLE entry to the backend, falling back to the original text on failure."""
+        translated_text = self._try_api_single(entry_text, context, target_code, retry_count)
+        return entry_text if translated_text is None else translated_text
+
+    def _remember(self, pairs):
+        """ Stores successful (source, {target_code: translation}) pairs in the translation memory. """
+        by_target = {}
+        for src, dst in pairs:
+            for code, translation in dst.items(): by_target.setdefault(code, []).append((src, translation))
+        try:
+            for code, code_pairs in by_target.items(): self.translation_memory.store_many(code_pairs, SOURCE_LANGUAGE_CODE, code, self.backend.model_id)
+        except Exception as e: print(f"    Warning: Could not store translations in memory: {e}") # Debug print
+
+    @staticmethod
+    def _parse_id_records(generated_text, target_codes=(TARGET_LANGUAGE_CODE,)):
+        """
+        Extracts {id: {target_code: text}} from a JSON-array response; a record counts only with
+        every target present. Salvages every complete object from malformed or truncated output
+        instead of rejecting the whole response.
+        """
+        text = generated_text.strip()
+        if text.startswith("```"): text = text.strip('`'); text = text[text.find('\n') + 1:] if text.lower().startswith('json') else text
+        try: parsed = json.loads(text); records = parsed if isinstance(parsed, list) else next((v for v in parsed.values() if isinstance(v, list)), [])
+        except (ValueError, AttributeError):
+            records = []; decoder = json.JSONDecoder(); pos = text.find('{')
+            while pos != -1:
+                try: record, end = decoder.raw_decode(text, pos); records.append(record); pos = text.find('{', end)
+                except ValueError: pos = text.find('{', pos + 1)
+        result = {}
+        for record in records:
+            entry = SubtitleTranslator._record_entry(record, target_codes)
+            if entry: result[entry[0]] = entry[1]
+        return result
+
+    @staticmethod
+    def _record_entry(record, target_codes):
+        """ (id, {target_code: text}) for a valid record with every target present, else None. A bare "text" is the input echoed back, never a translation. """
+        if not isinstance(record, dict): return None
+        if not all(isinstance(record.get(code), str) for code in target_codes): return None
+        try: return int(record.get('id')), {code: record[code].strip() for code in target_codes}
+        except (TypeError, ValueError): return None
 
-    def _call_gemini_api_batch(self, batch_entry_texts):
-        """ Sends a batch of entries to Gemini API, retries on count mismatch, falls back to single. """
+    def _generate_records(self, prompt, target_codes, context):
+        """
+        Streams a batch prompt and yields (id, {target_code: text}) as each record completes.
+        Waits out and retries 429 responses (raised before any data arrives); a stream that breaks
+        off raises after the records received so far have been yielded.
+        """
+        for _ in range(RATE_LIMIT_RETRY_COUNT + 1):
+            self._wait_for_backpressure(); self._count_call(context)
+            parser = IncrementalRecordParser()
+            try:
+                for chunk in self.backend.generate_stream(prompt, json_mode=True):
+                    for record in parser.feed(chunk):
+                        entry = self._record_entry(record, target_codes)
+                        if entry: yield entry
+            except RateLimitedError as e:
+                self._note_rate_limited(e.retry_after, context); self._local.rate_limited = getattr(self._local, 'rate_limited', 0) + 1; last_error = e; continue
+            self._note_request_ok(context); return
+        raise last_error
+
+    def _call_direct_batch(self, batch_entry_texts, target_codes, context):
+        """ Batch for a backend that translates texts directly (no prompt, no ids to lose); one call per language. """
+        started = time.monotonic(); translated = [{} for _ in batch_entry_texts]
+        for code in target_codes:
+            self._count_call(context)
+            for entry, text in zip(translated, self.backend.translate_texts(batch_entry_texts, SOURCE_LANGUAGE_CODE, code)): entry[code] = text
+        self.batch_sizer.record_result(time.monotonic() - started, len(batch_entry_texts), 0, False)
+        self._remember(zip(batch_entry_texts, translated))
+        return translated
+
+    def _call_api_batch(self, batch_entry_texts, context, target_codes=(TARGET_LANGUAGE_CODE,), on_records=None):
+        """
+        Sends a batch of entries as id-tagged JSON records. Valid records are accepted even when
+        others are missing; only the missing ids are re-requested, and any still missing after
+        API_RETRY_COUNT rounds fall back to single-entry translation. Every record carries all
+        target languages, so N languages cost about the same number of calls as one.
+        With a streaming backend each record is accepted as soon as it completes and passed to
+        on_records([(index in batch, translation)]); a truncated stream keeps what arrived and
+        only the unfinished ids are re-requested. Returns one {target_code: text} dict per entry;
+        texts that fell back to the original are added to context.fallback_texts.
+        """
         if not batch_entry_texts: return []
-        expected_count = len(batch_entry_texts); joined_batch_text = " ||| ".join(batch_entry_texts)
-        prompt = PROMPT_TEMPLATE_BATCH.format(batch_text=joined_batch_text, batch_size=expected_count)
-        headers = { 'Content-Type': 'application/json' }
-        payload = {"contents": [{"parts": [{"text": prompt}]}], "generationConfig": {"temperature": 0.7, "candidateCount": 1}}
-        params = { 'key': self.api_key }; last_error = None
+        if not self.backend.uses_prompts: return self._call_direct_batch(batch_entry_texts, target_codes, context)
+        target_languages = ", ".join(f"{language_name(code)} ({code})" for code in target_codes); target_keys = json.dumps(list(target_codes))
+        translated = {}; missing_ids = list(range(1, len(batch_entry_texts) + 1)); last_error = None
         for attempt in range(API_RETRY_COUNT + 1):
-            print(f"    Batch API Call Attempt {attempt + 1}/{API_RETRY_COUNT + 1}...") # Debug print
+            accepted = {}
+            records = [{"id": entry_id, "text": batch_entry_texts[entry_id - 1]} for entry_id in missing_ids]
+            prompt = PROMPT_TEMPLATE_BATCH.format(batch_json=json.dumps(records, ensure_ascii=False), batch_size=len(records), target_languages=target_languages, target_keys=target_keys)
+            print(f"    Batch API Call Attempt {attempt + 1}/{API_RETRY_COUNT + 1} ({len(records)} entries)...") # Debug print
+            self._local.rate_limited = 0; started = time.monotonic(); pending_ids = set(missing_ids); round_error = None
             try:
-                response = self.session.post(self.api_url, headers=headers, params=params, json=payload, timeout=API_TIMEOUT)
-                response.raise_for_status(); data = response.json(); candidates = data.get('candidates', [])
-                if candidates:
-                    content = candidates[0].get('content', {}); parts = content.get('parts', [])
-                    if parts:
-                        generated_text = parts[0].get('text', ''); translated_batch = [entry.strip() for entry in generated_text.split('|||')]
-                        if len(translated_batch) == expected_count: print(f"    Attempt {attempt + 1}: Success (Count OK)."); return translated_batch # Debug print
-                        else: print(f"    Attempt {attempt + 1}: API count mismatch! Exp:{expected_count}, Got:{len(translated_batch)}"); last_error = ValueError(self.tr("API translation count mismatch (Got {0}, Expected {1})").format(len(translated_batch), expected_count)) # Use tr()
-                    # Use self.tr() for internal error messages
-                    else: last_error = ValueError(self.tr("Invalid Gemini response: 'parts' missing."))
+                if self.backend.supports_streaming:
+                    for entry_id, entry in self._generate_records(prompt, target_codes, context):
+                        if entry_id not in pending_ids or entry_id in accepted: continue
+                        accepted[entry_id] = entry
+                        if on_records: on_records([(entry_id - 1, entry)]) # Usable while the rest of the batch is still streaming
                 else:
-                     prompt_feedback = data.get('promptFeedback', {}); block_reason = prompt_feedback.get('blockReason')
-                     if block_reason: last_error = ValueError(self.tr("Gemini API blocked prompt: {0}").format(block_reason)) # Use tr()
-                     else: last_error = ValueError(self.tr("Invalid Gemini response: 'candidates' missing.")) # Use tr()
-                if last_error and attempt < API_RETRY_COUNT: print(f"      Retrying batch... ({last_error})"); time.sleep(1.5 ** attempt); continue # Debug print
-                else: print("      Max batch retries reached or structure error."); break # Debug print
-            except requests.exceptions.RequestException as e: print(f"    Attempt {attempt + 1}: API Request Error: {e}"); last_error = e; time.sleep(1.5 ** attempt) # Debug print
-            except Exception as e: print(f"    Attempt {attempt + 1}: Unexpected Error: {e}"); last_error = e; time.sleep(1.5 ** attempt) # Debug print
-            if attempt == API_RETRY_COUNT: print("      Max batch retries reached."); break # Debug print
-
-        # Use self.tr() for fallback message
-        print(f"  Batch translation failed ({last_error}). Falling back to single entries...") # Debug print
-        translated_batch_single = []
-        for entry_index, original_text in enumerate(batch_entry_texts):
-             print(f"    Translating entry {entry_index+1}/{len(batch_entry_texts)} individually...") # Debug print
-             translated_text = self._call_gemini_api_single(original_text); translated_batch_single.append(translated_text)
-        if len(translated_batch_single) != expected_count:
-             # Use self.tr() for error message
-             print(f"  ERROR: Count mismatch after single fallback! Returning original."); return batch_entry_texts # Debug print
-        return translated_batch_single
-
-
-    def _run_translation(self, srt_filepath):
-        """ The actual translation logic running in a background thread. """
-        try:
-            original_subs = self._parse_srt(srt_filepath)
-            is_pysrt_obj = PYSRT_AVAILABLE and isinstance(original_subs, pysrt.SubRipFile)
-            all_original_texts = [sub.text_without_tags if is_pysrt_obj else entry['text'] for sub in original_subs] if is_pysrt_obj else [entry['text'] for entry in original_subs]
-            total_entries = len(all_original_texts)
-            if total_entries == 0: raise ValueError(self.tr("SRT file has no text entries.")); # Use tr()
-
-            all_translated_texts = []; total_batches = (total_entries + BATCH_SIZE - 1) // BATCH_SIZE
-            print(f"Starting translation of {total_entries} entries in {total_batches} batches...") # Debug print
-
-            for i in range(0, total_entries, BATCH_SIZE):
-                batch_num = (i // BATCH_SIZE) + 1
-                print(f"  Translating Batch {batch_num}/{total_batches}...") # Debug print
-                self.translation_progress.emit(batch_num, total_batches)
-                batch_to_translate = all_original_texts[i : i + BATCH_SIZE]
-                translated_batch = self._call_gemini_api_batch(batch_to_translate)
-                all_translated_texts.extend(translated_batch)
-
-            print("Translation processing complete. Reconstructing file...") # Debug print
-            translated_srt_content = self._reconstruct_srt(original_subs, all_translated_texts, is_pysrt_obj)
-
-            dir_name = os.path.dirname(srt_filepath); base_name_full = os.path.basename(srt_filepath)
-            base_name_no_ext, ext = os.path.splitext(base_name_full)
-            lang_pattern = r'\.([a-zA-Z]{2,3})$'; match = re.search(lang_pattern, base_name_no_ext)
-            video_base_name = base_name_no_ext
-            if match: lang_code_found = match.group(1); print(f"  Found lang code '.{lang_code_found}'."); video_base_name = base_name_no_ext[:-len(match.group(0))] # Debug print
-            translated_srt_filename = f"{video_base_name}.{TARGET_LANGUAGE_CODE}{ext}"; translated_srt_path = os.path.join(dir_name, translated_srt_filename)
-
-            try: # Save the file
-                with open(translated_srt_path, "w", encoding="utf-8") as f: f.write(translated_srt_content)
+                    received = self._parse_id_records(self._generate(prompt, context, json_mode=True), target_codes)
+                    accepted = {entry_id: received[entry_id] for entry_id in missing_ids if entry_id in received}
+            except requests.exceptions.RequestException as e: print(f"    Attempt {attempt + 1}: API Request Error: {e}"); round_error = e # Debug print
+            except ValueError as e: print(f"    Attempt {attempt + 1}: {e}"); round_error = e # Debug print
+            except Exception as e: print(f"    Attempt {attempt + 1}: Unexpected Error: {e}"); round_error = e # Debug print
+            if attempt == 0: self.batch_sizer.record_result(time.monotonic() - started, len(records), len(records) - len(accepted), self._local.rate_limited > 0)
+            translated.update(accepted); self._remember((batch_entry_texts[entry_id - 1], entry) for entry_id, entry in accepted.items()) # Records before a stream break are kept
+            missing_ids = [entry_id for entry_id in missing_ids if entry_id not in accepted]
+            if not missing_ids: print(f"    Attempt {attempt + 1}: Success (all ids present)."); break # Debug print
+            print(f"    Attempt {attempt + 1}: {len(accepted)} accepted, {len(missing_ids)} id(s) missing."); last_error = round_error or ValueError(self.tr("API response missing {0} entries").format(len(missing_ids))) # Use tr()
+            if attempt < API_RETRY_COUNT and not accepted: time.sleep(1.5 ** attempt) # Back off only when a round made no progress
+
+        if missing_ids:
+            print(f"  Batch translation incomplete ({last_error}). Translating {len(missing_ids)} missing entries individually...") # Debug print
+            for entry_id in missing_ids:
+                original_text = batch_entry_texts[entry_id - 1]; translated[entry_id] = {}
+                for code in target_codes:
+                    translated_text = self._try_api_single(original_text, context, code)
+                    if translated_text is None: # Fallback original, never remembered or journaled
+                        translated_text = original_text
+                        with context.lock: context.fallback_texts.add(original_text)
+                    else: self._remember([(original_text, {code: translated_text})])
+                    translated[entry_id][code] = translated_text
+        return [translated[entry_id] for entry_id in range(1, len(batch_entry_texts) + 1)]
+
+    def _translate_batches(self, all_original_texts, context, on_batch_done=None, first_batch_limit=None, cancel_event=None, progress_key="", target_codes=(TARGET_LANGUAGE_CODE,)):
+        """
+        Translates all texts in token-budgeted batches, keeping up to context.concurrency_limit requests
+        in flight (fewer after 429s). Each batch is sized when it is dispatched, so budget changes
+        take effect immediately. Results ({target_code: text} per entry) are reassembled in the original order.
+        on_batch_done(texts, translations) is called on this thread after each batch (checkpointing),
+        and every STREAM_POLL_INTERVAL for records streamed from batches still in flight.
+        cancel_event is checked between batches: no new batch is sent, batches in flight are
+        finished (and checkpointed), then TranslationCancelled is raised.
+        """
+        total_entries = len(all_original_texts); all_translated_texts = [None] * total_entries; completed_entries = 0
+        streamed = queue.Queue(); reported = {} # Batch start -> indexes in the batch already committed
+        poll_interval = STREAM_POLL_INTERVAL if self.backend.supports_streaming else None
+
+        def commit(batch_entries):
+            """ Commits [(batch start, [(index in batch, translation)])] once per index. """
+            nonlocal completed_entries
+            texts = []; translations = []
+            for start, entries in batch_entries:
+                seen = reported.setdefault(start, set())
+                for index, translation in entries:
+                    if index in seen: continue
+                    seen.add(index); all_translated_texts[start + index] = translation
+                    texts.append(all_original_texts[start + index]); translations.append(translation)
+            if not texts: return
+            if on_batch_done: on_batch_done(texts, translations)
+            completed_entries += len(texts); self.translation_progress.emit(progress_key, completed_entries, total_entries)
+
+        max_in_flight = self._max_in_flight(); next_start = 0; in_flight = {}; batch_count = 0; cancelled = False
+        with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="translate") as pool:
+            while True:
+                if not cancelled and cancel_event is not None and cancel_event.is_set():
+                    cancelled = True; print(f"  Cancel requested. Finishing {len(in_flight)} batch(es) in flight...") # Debug print
+                while not cancelled and next_start < total_entries and len(in_flight) < context.concurrency_limit:
+                    end = self.batch_sizer.take_batch(all_original_texts, next_start)
+                    if first_batch_limit and batch_count == 0: end = min(end, next_start + first_batch_limit)
+                    batch_to_translate = all_original_texts[next_start:end]
+                    batch_count += 1; print(f"  Translating Batch {batch_count}: entries {next_start + 1}-{end} of {total_entries}...") # Debug print
+                    on_records = lambda entries, start=next_start: streamed.put((start, entries))
+                    in_flight[pool.submit(self._call_api_batch, batch_to_translate, context, target_codes, on_records)] = (next_start, len(batch_to_translate)); next_start = end
+                if not in_flight: break
+                done, _ = wait(in_flight, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                batch_entries = []; finished = []
+                while not streamed.empty(): batch_entries.append(streamed.get_nowait())
+                for future in done:
+                    start, count = in_flight.pop(future); finished.append(start)
+                    batch_entries.append((start, list(enumerate(future.result())))) # Entries not streamed (fallbacks, non-streaming backends)
+                commit(batch_entries)
+                for start in finished: reported.pop(start, None)
+        if batch_count: self.batch_sizer.save()
+        if cancelled: raise TranslationCancelled()
+        return all_translated_texts
+
+    @staticmethod
+    def _output_path(srt_filepath, target_code=TARGET_LANGUAGE_CODE):
+        """ '<video>.<src>.srt' -> '<video>.<target_code>.srt' in the same directory. """
+        dir_name = os.path.dirname(srt_filepath); base_name_full = os.path.basename(srt_filepath)
+        base_name_no_ext, ext = os.path.splitext(base_name_full)
+        lang_pattern = r'\.([a-zA-Z]{2,3})$'; match = re.search(lang_pattern, base_name_no_ext)
+        video_base_name = base_name_no_ext
+        if match: lang_code_found = match.group(1); print(f"  Found lang code '.{lang_code_found}'."); video_base_name = base_name_no_ext[:-len(match.group(0))] # Debug print
+        return os.path.join(dir_name, f"{video_base_name}.{target_code}{ext}")
+
+    def output_paths(self, srt_filepath, target_codes=None):
+        """ {target_code: translated SRT path} a job on srt_filepath writes; the first target is the primary one. """
+        return {code: self._output_path(srt_filepath, code) for code in (target_codes or TARGET_LANGUAGE_CODES)}
+
+    @staticmethod
+    def _playhead_order(original_subs, normalized_texts, texts, playhead_ms):
+        """ Orders texts by distance of their nearest cue from the playhead, ahead before behind. """
+        playhead_index = max(0, bisect_right(original_subs.starts, playhead_ms) - 1); priority = {}
+        for i, text in enumerate(normalized_texts):
+            if not text: continue
+            distance = i - playhead_index if i >= playhead_index else (playhead_index - i) * PROGRESSIVE_BEHIND_WEIGHT
+            if distance < priority.get(text, distance + 1): priority[text] = distance
+        return sorted(texts, key=priority.__getitem__)
+
+    def _write_partial_srt(self, original_subs, normalized_texts, translations, partial_path, target_code=TARGET_LANGUAGE_CODE):
+        """ Writes only the cues translated so far (one language), so the player never shows untranslated lines. """
+        indices = [i for i, text in enumerate(normalized_texts) if text and text in translations]
+        if not indices: return False
+        texts = [translations[text][target_code] if text in translations else "" for text in normalized_texts]
+        try: atomic_write_text(partial_path, original_subs.to_srt(texts, indices)); return True
+        except OSError as e: print(f"  Warning: Could not write partial translation: {e}"); return False # Debug print
+
+    def _prepare_job(self, srt_filepath, target_codes):
+        """
+        Parses one file and resolves the lines its journal and the translation memory already cover
+        in every target language. Returns a job dict.
+        """
+        original_subs = self._parse_srt(srt_filepath)
+        all_original_texts = original_subs.plain_texts(); total_entries = len(all_original_texts)
+        if total_entries == 0: raise ValueError(self.tr("SRT file has no text entries.")); # Use tr()
+
+        # Identical lines are translated once; lines already in the journal or translation memory not at all
+        normalized_texts = [normalize_source_text(text) for text in all_original_texts]
+        unique_texts = list(dict.fromkeys(text for text in normalized_texts if text)); unique_set = set(unique_texts)
+        journal = TranslationJournal(srt_filepath, file_content_hash(srt_filepath), ",".join(target_codes), self.backend.model_id)
+        resumed = {text: dst for text, dst in journal.load().items() if text in unique_set and isinstance(dst, dict) and all(code in dst for code in target_codes)}
+        if resumed: print(f"Resuming translation of '{os.path.basename(srt_filepath)}': {len(resumed)}/{len(unique_texts)} unique lines restored from journal.") # Debug print
+        lookup_texts = [text for text in unique_texts if text not in resumed]; per_target = {}
+        for code in target_codes: per_target[code] = self.translation_memory.lookup_many(lookup_texts, SOURCE_LANGUAGE_CODE, code, self.backend.model_id)
+        # A line is known only when every target language is covered; otherwise the batch asks for all of them
+        memory_hits = {text: {code: per_target[code][text] for code in target_codes} for text in lookup_texts if all(text in per_target[code] for code in target_codes)}
+        memory_hits.update(resumed)
+        texts_to_translate = [text for text in unique_texts if text not in memory_hits]
+        print(f"Translation memory for '{os.path.basename(srt_filepath)}': {len(memory_hits)}/{len(unique_texts)} unique lines hit "
+              f"({len(memory_hits) / max(len(unique_texts), 1):.0%}), {total_entries - len(unique_texts)} duplicate/empty lines skipped, "
+              f"{len(texts_to_translate)} lines to translate.") # Hit-rate report
+        return {'srt_path': srt_filepath, 'subs': original_subs, 'normalized': normalized_texts, 'unique': unique_set, 'journal': journal,
+                'known': memory_hits, 'missing': texts_to_translate, 'output_paths': self.output_paths(srt_filepath, target_codes), 'partial_path': None}
+
+    def _finish_job(self, job, translations):
+        """ Reconstructs and saves one translated file per target language, then drops the checkpoint. Completion reports the primary file. """
+        translated_srt_path = None
+        try: # Save the files
+            for code, translated_srt_path in job['output_paths'].items():
+                all_translated_texts = [translations[text][code] if text else "" for text in job['normalized']]
+                atomic_write_text(translated_srt_path, self._reconstruct_srt(job['subs'], all_translated_texts)); record_normalized_subtitle(translated_srt_path, 'utf-8')
                 print(f"Saved translated file: {translated_srt_path}") # Debug print
-                self.translation_complete.emit(srt_filepath, translated_srt_path)
-            except IOError as e:
-                 # Use self.tr() for exception message
-                 raise IOError(self.tr("Failed write translated file '{0}': {1}").format(translated_srt_path, e))
+            job['journal'].discard() # Job finished; the checkpoint is no longer needed
+            if job['partial_path'] and os.path.exists(job['partial_path']): os.remove(job['partial_path'])
+            self.translation_complete.emit(job['srt_path'], next(iter(job['output_paths'].values())))
+        except IOError as e:
+             # Use self.tr() for exception message
+             raise IOError(self.tr("Failed write translated file '{0}': {1}").format(translated_srt_path, e))
+
+    def _run_translation(self, srt_filepath, playhead_ms=None, cancel_event=None, target_codes=None):
+        """ Translates one file (progressive when playhead_ms is given). Returns True if it was cancelled. """
+        return bool(self._run_translation_group([srt_filepath], playhead_ms, cancel_event, target_codes))
+
+    def _run_translation_group(self, srt_filepaths, playhead_ms=None, cancel_event=None, target_codes=None):
+        """
+        Translates one or more files (e.g. queued episodes of a season) through shared batches, so small
+        files share round trips and lines repeated across files are sent once. Every batch asks for all
+        target_codes at once and one SRT is written per language. Emits complete/error per file.
+        Returns the files left unfinished because cancel_event was set; their journals keep the progress.
+        """
+        target_codes = tuple(target_codes or TARGET_LANGUAGE_CODES); jobs = []; context = BatchContext(self._max_in_flight())
+        for srt_filepath in srt_filepaths:
+            try: jobs.append(self._prepare_job(srt_filepath, target_codes))
+            except Exception as e:
+                print(f"Error during translation for {srt_filepath}: {e}"); traceback.print_exc() # Debug print
+                self.translation_error.emit(srt_filepath, str(e))
+        if not jobs: return []
+        translations = {}
+        for job in jobs: translations.update(job['known'])
+        texts_to_translate = list(dict.fromkeys(text for job in jobs for text in job['missing'] if text not in translations))
+        if len(jobs) > 1: print(f"Packed {len(jobs)} files into shared batches: {len(texts_to_translate)} unique lines ({sum(len(job['missing']) for job in jobs)} before cross-file dedupe).") # Debug print
 
+        progressive_job = jobs[0] if playhead_ms is not None and len(jobs) == 1 else None; last_partial_write = [0.0]
+        def on_batch_done(batch_texts, batch_translations):
+            translations.update(zip(batch_texts, batch_translations))
+            with context.lock: failed = context.fallback_texts.intersection(batch_texts); context.fallback_texts -= failed
+            pairs = [(src, dst) for src, dst in zip(batch_texts, batch_translations) if src not in failed] # Fallbacks are retried on resume; lines translated as themselves are kept
+            for job in jobs: job['journal'].append((src, dst) for src, dst in pairs if src in job['unique'])
+            if not progressive_job or time.monotonic() - last_partial_write[0] < PARTIAL_WRITE_INTERVAL: return
+            if self._write_partial_srt(progressive_job['subs'], progressive_job['normalized'], translations, progressive_job['partial_path'], target_codes[0]):
+                last_partial_write[0] = time.monotonic(); self.partial_translation_ready.emit(progressive_job['srt_path'], progressive_job['partial_path'])
+        if progressive_job:
+            # Progressive mode: playhead window first, partial SRT rewritten as batches land
+            texts_to_translate = self._playhead_order(progressive_job['subs'], progressive_job['normalized'], texts_to_translate, playhead_ms)
+            progressive_job['partial_path'] = f"{os.path.splitext(progressive_job['output_paths'][target_codes[0]])[0]}.partial.srt" # Primary language only
+            print(f"Progressive translation from {playhead_ms // 1000}s.") # Debug print
+            if translations: on_batch_done([], [])
+
+        progress_key = jobs[0]['srt_path']
+        try:
+            print(f"Starting translation of {len(texts_to_translate)} entries into {', '.join(target_codes)} (batch budget ~{self.batch_sizer.token_budget:.0f} tokens, {self.max_concurrent_batches} in flight)...") # Debug print
+            self._translate_batches(texts_to_translate, context, on_batch_done, PROGRESSIVE_FIRST_BATCH if progressive_job else None, cancel_event, progress_key, target_codes)
+        except TranslationCancelled:
+            print(f"Translation cancelled; {len(jobs)} file(s) can resume from their journals.") # Debug print
+            return [job['srt_path'] for job in jobs]
         except Exception as e:
-            print(f"Error during translation for {srt_filepath}: {e}"); traceback.print_exc() # Debug print
-            # Emit the potentially translated exception message
-            self.translation_error.emit(srt_filepath, str(e))
+            print(f"Error during translation for {progress_key}: {e}"); traceback.print_exc() # Debug print
+            for job in jobs: self.translation_error.emit(job['srt_path'], str(e))
+            return []
+        if not texts_to_translate: self.translation_progress.emit(progress_key, 1, 1) # Served entirely from memory
+        api_calls = context.api_calls; total_entries = sum(len(job['normalized']) for job in jobs)
+        print(f"API calls: {api_calls} for {len(texts_to_translate)} lines sent ({api_calls / max(len(texts_to_translate), 1):.2f} per cue, "
+              f"{api_calls / total_entries:.2f} per cue in file(s)).") # Calls-per-cue metric
+
+        print("Translation processing complete. Reconstructing file(s)...") # Debug print
+        for job in jobs:
+            try: self._finish_job(job, translations)
+            except Exception as e:
+                print(f"Error during translation for {job['srt_path']}: {e}"); traceback.print_exc() # Debug print
+                # Emit the potentially translated exception message
+                self.translation_error.emit(job['srt_path'], str(e))
+        return []
 
 # --- END OF FILE source/translation_manager.py ---
\ No newline at end of file
@@ -0,0 +1,75 @@
+# --- START OF FILE source/translation_memory.py ---
+
+"""
+Persistent translation memory for subtitle lines.
+Stores translations in SQLite keyed by (normalized source text, source language,
+target language, model), so re-running a translation or translating another
+release of the same film only sends unseen lines to the API.
+"""
+
+import re
+import time
+import sqlite3
+import threading
+import unicodedata
+
+from source.storage import cache_path
+
+# --- Configuration ---
+TM_DB_FILENAME = "translation_memory.sqlite3"
+SQLITE_MAX_VARIABLES = 900 # Stay below SQLite's default bound-parameter limit per query
+# --- End Configuration ---
+
+WHITESPACE_REGEX = re.compile(r'[ \t\u00a0]+')
+
+
+def normalize_source_text(text):
+    """ NFC, trimmed lines, collapsed runs of spaces, no empty lines. Line breaks are kept. """
+    if not text: return ""
+    text = unicodedata.normalize('NFC', text)
+    lines = (WHITESPACE_REGEX.sub(' ', line).strip() for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+class TranslationMemory:
+    """ Thread-safe SQLite store of (source, source_lang, target_lang, model) -> translation. """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or cache_path(TM_DB_FILENAME)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""CREATE TABLE IF NOT EXISTS translations (
+                source_text TEXT NOT NULL, source_lang TEXT NOT NULL, target_lang TEXT NOT NULL, model TEXT NOT NULL,
+                translation TEXT NOT NULL, hits INTEGER NOT NULL DEFAULT 0, updated_at REAL NOT NULL,
+                PRIMARY KEY (source_text, source_lang, target_lang, model)) WITHOUT ROWID""")
+
+    def lookup_many(self, source_texts, source_lang, target_lang, model):
+        """ Returns {source_text: translation} for the (already normalized) texts found in memory. """
+        found = {}; texts = list(source_texts)
+        with self.lock, self.conn:
+            for i in range(0, len(texts), SQLITE_MAX_VARIABLES):
+                chunk = texts[i:i + SQLITE_MAX_VARIABLES]; placeholders = ",".join("?" * len(chunk))
+                rows = self.conn.execute(
+                    f"SELECT source_text, translation FROM translations WHERE source_lang=? AND target_lang=? AND model=? AND source_text IN ({placeholders})",
+                    (source_lang, target_lang, model, *chunk)).fetchall()
+                found.update(rows)
+            if found:
+                self.conn.executemany("UPDATE translations SET hits = hits + 1 WHERE source_text=? AND source_lang=? AND target_lang=? AND model=?",
+                                      [(text, source_lang, target_lang, model) for text in found])
+        return found
+
+    def store_many(self, pairs, source_lang, target_lang, model):
+        """ Stores (source_text, translation) pairs; source texts must already be normalized. """
+        now = time.time(); rows = [(src, source_lang, target_lang, model, dst, now) for src, dst in pairs if src]
+        if not rows: return
+        with self.lock, self.conn:
+            self.conn.executemany("""INSERT INTO translations (source_text, source_lang, target_lang, model, translation, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(source_text, source_lang, target_lang, model)
+                DO UPDATE SET translation=excluded.translation, updated_at=excluded.updated_at""", rows)
+
+    def close(self):
+        with self.lock: self.conn.close()
+
+# --- END OF FILE source/translation_memory.py ---
@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+
+from source import batch_sizer
+from source.batch_sizer import BatchSizer, estimate_tokens
+
+
+class BatchSizerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory(); self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "tuning.json")
+
+    def test_fills_up_to_the_token_budget(self):
+        sizer = BatchSizer("model", self.path); sizer.token_budget = estimate_tokens("x" * 40) * 3
+        texts = ["x" * 40] * 10
+        self.assertEqual(sizer.take_batch(texts, 0), 3)
+        self.assertEqual(sizer.take_batch(texts, 9), 10)
+
+    def test_oversized_entry_still_makes_a_batch(self):
+        sizer = BatchSizer("model", self.path)
+        self.assertEqual(sizer.take_batch(["x" * 100000, "short"], 0), 1)
+
+    def test_entry_cap(self):
+        sizer = BatchSizer("model", self.path); sizer.token_budget = batch_sizer.TOKEN_BUDGET_MAX
+        self.assertEqual(sizer.take_batch([""] * 500, 0), batch_sizer.MAX_ENTRIES_PER_BATCH)
+
+    def test_adapts_within_bounds(self):
+        sizer = BatchSizer("model", self.path); start = sizer.token_budget
+        sizer.record_result(1.0, 10, 0, False)
+        self.assertAlmostEqual(sizer.token_budget, start * batch_sizer.GROW_FACTOR)
+        sizer.record_result(1.0, 10, 5, False)
+        self.assertAlmostEqual(sizer.token_budget, start * batch_sizer.GROW_FACTOR * batch_sizer.SHRINK_FACTOR)
+        for _ in range(50): sizer.record_result(1.0, 10, 0, True)
+        self.assertEqual(sizer.token_budget, batch_sizer.TOKEN_BUDGET_MIN)
+        for _ in range(50): sizer.record_result(1.0, 10, 0, False)
+        self.assertEqual(sizer.token_budget, batch_sizer.TOKEN_BUDGET_MAX)
+
+    def test_slow_batch_shrinks_in_proportion(self):
+        sizer = BatchSizer("model", self.path); start = sizer.token_budget
+        sizer.record_result(batch_sizer.TARGET_BATCH_LATENCY * 1.25, 10, 0, False)
+        self.assertAlmostEqual(sizer.token_budget, start * 0.8)
+
+    def test_budget_is_persisted_per_model(self):
+        sizer = BatchSizer("a", self.path); sizer.token_budget = 1234.0; sizer.save()
+        self.assertEqual(BatchSizer("a", self.path).token_budget, 1234.0)
+        self.assertEqual(BatchSizer("b", self.path).token_budget, batch_sizer.TOKEN_BUDGET_DEFAULT)
+
+
+if __name__ == '__main__':
+    unittest.main()
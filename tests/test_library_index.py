@@ -0,0 +1,101 @@
+import os
+import time
+import tempfile
+import threading
+import unittest
+
+from source.library_index import LibraryIndex
+
+VIDEO_EXTENSIONS = ['.mkv', '.mp4']
+OLD = time.time() - 3600 # Well outside RACY_MTIME_WINDOW
+
+
+class LibraryIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory(); self.addCleanup(self.tmp.cleanup)
+        self.root = os.path.join(self.tmp.name, "library"); os.mkdir(self.root)
+        self.index = LibraryIndex(db_path=os.path.join(self.tmp.name, "index.sqlite3")); self.addCleanup(self.index.close)
+
+    def _write(self, relative_path, data=b"x"):
+        path = os.path.join(self.root, relative_path); os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f: f.write(data)
+        return path
+
+    def _age_directories(self, mtime=OLD):
+        for dirpath, _, _ in os.walk(self.root): os.utime(dirpath, (mtime, mtime))
+
+    def _paths(self, files_data):
+        return sorted(os.path.relpath(file_data['video_path'], self.root) for file_data in files_data)
+
+    def test_refresh_indexes_videos_with_sidecars_and_titles(self):
+        video = self._write("Show/Show.S01E02.720p.mkv"); self._write("Show/Show.S01E02.720p.en.srt"); self._write("Show/notes.txt"); self._write("Show/.hidden.mkv")
+        files_data, relisted = self.index.refresh(self.root, VIDEO_EXTENSIONS)
+        self.assertEqual(relisted, 2); self.assertEqual(self._paths(files_data), ["Show/Show.S01E02.720p.mkv"])
+        file_data = files_data[0]
+        self.assertEqual(file_data['source_srt'], video[:-len(".mkv")] + ".en.srt"); self.assertEqual(file_data['sidecars'], ["Show.S01E02.720p.en.srt"])
+        self.assertEqual((file_data['title'], file_data['season'], file_data['episode']), ("Show", 1, 2))
+        self.assertEqual(self._paths(self.index.load(self.root)), ["Show/Show.S01E02.720p.mkv"])
+
+    def test_unchanged_directories_are_not_listed_again(self):
+        self._write("a/one.mkv"); self._write("b/two.mp4"); self._age_directories()
+        self.index.refresh(self.root, VIDEO_EXTENSIONS)
+        self._write("a/three.mkv", b"not noticed"); os.utime(os.path.join(self.root, "a"), (OLD, OLD)) # Same mtime: the listing is reused
+        files_data, relisted = self.index.refresh(self.root, VIDEO_EXTENSIONS)
+        self.assertEqual(relisted, 0); self.assertEqual(self._paths(files_data), ["a/one.mkv", "b/two.mp4"])
+
+    def test_changed_directory_is_listed_again(self):
+        self._write("a/one.mkv"); self._age_directories(); self.index.refresh(self.root, VIDEO_EXTENSIONS)
+        self._write("a/two.mkv"); os.utime(os.path.join(self.root, "a"), (OLD + 10, OLD + 10))
+        files_data, relisted = self.index.refresh(self.root, VIDEO_EXTENSIONS)
+        self.assertEqual(relisted, 1); self.assertEqual(self._paths(files_data), ["a/one.mkv", "a/two.mkv"])
+
+    def test_recently_modified_directory_is_listed_again(self):
+        self._write("a/one.mkv"); self._age_directories(); now = time.time(); os.utime(os.path.join(self.root, "a"), (now, now))
+        self.index.refresh(self.root, VIDEO_EXTENSIONS)
+        self._write("a/two.mkv"); os.utime(os.path.join(self.root, "a"), (now, now)) # Changed within the same mtime tick
+        files_data, relisted = self.index.refresh(self.root, VIDEO_EXTENSIONS)
+        self.assertEqual(relisted, 1); self.assertEqual(self._paths(files_data), ["a/one.mkv", "a/two.mkv"])
+
+    def test_vanished_and_renamed_directories_are_dropped(self):
+        self._write("a/one.mkv"); self._write("b/two.mkv"); self._age_directories(); self.index.refresh(self.root, VIDEO_EXTENSIONS)
+        os.rename(os.path.join(self.root, "a"), os.path.join(self.root, "c")); os.remove(os.path.join(self.root, "b", "two.mkv")); os.rmdir(os.path.join(self.root, "b"))
+        self._age_directories(OLD + 10)
+        files_data, _ = self.index.refresh(self.root, VIDEO_EXTENSIONS)
+        self.assertEqual(self._paths(files_data), ["c/one.mkv"]); self.assertEqual(self._paths(self.index.load(self.root)), ["c/one.mkv"])
+        self.assertEqual(sorted(os.path.relpath(path, self.root) for path in self.index.directories(self.root)), [".", "c"])
+
+    def test_cancelled_walk_keeps_everything(self):
+        self._write("a/one.mkv"); self._write("b/two.mkv"); self._age_directories(); self.index.refresh(self.root, VIDEO_EXTENSIONS)
+        for name in ("a", "b"): os.remove(os.path.join(self.root, name, os.listdir(os.path.join(self.root, name))[0])); os.rmdir(os.path.join(self.root, name))
+        self._write("c/three.mkv"); self._age_directories(OLD + 10)
+        cancel_event = threading.Event()
+        for directory, _, relisted in self.index.iter_refresh(self.root, VIDEO_EXTENSIONS, cancel_event):
+            if directory == self.root: self.assertTrue(relisted); cancel_event.set()
+        self.assertEqual(self._paths(self.index.load(self.root)), ["a/one.mkv", "b/two.mkv"]) # Nothing dropped; "c" was never reached
+        files_data, _ = self.index.refresh(self.root, VIDEO_EXTENSIONS)
+        self.assertEqual(self._paths(files_data), ["c/three.mkv"])
+
+    def test_force_root_lists_an_unchanged_root(self):
+        video = self._write("one.mkv"); self._age_directories(); self.index.refresh(self.root, VIDEO_EXTENSIONS)
+        self._write("one.mkv", b"rewritten"); os.utime(self.root, (OLD, OLD)) # Rewriting a file leaves the directory mtime alone
+        self.assertEqual(self.index.refresh(self.root, VIDEO_EXTENSIONS)[0][0]['size'], 1)
+        files_data = [file_data for _, directory_files, _ in self.index.iter_refresh(self.root, VIDEO_EXTENSIONS, force_root=True) for file_data in directory_files]
+        self.assertEqual([(file_data['video_path'], file_data['size']) for file_data in files_data], [(video, len(b"rewritten"))])
+
+    def test_converted_source_is_hidden(self):
+        self._write("Movie.2019.x265.mkv"); self._write("Movie.2019.x265.en.srt"); self._write("Movie.2019.x265.h264.mkv")
+        files_data, _ = self.index.refresh(self.root, VIDEO_EXTENSIONS)
+        self.assertEqual(self._paths(files_data), ["Movie.2019.x265.h264.mkv"])
+        self.assertEqual(os.path.basename(files_data[0]['source_srt']), "Movie.2019.x265.en.srt")
+
+    def test_media_follows_size_and_mtime(self):
+        video = self._write("one.mkv"); stat = os.stat(video); self.index.store_media(video, stat.st_size, stat.st_mtime, {'video_codec': 'hevc'})
+        self.assertEqual(self.index.media(video, stat.st_size, stat.st_mtime), {'video_codec': 'hevc'})
+        self.assertIsNone(self.index.media(video, stat.st_size + 1, stat.st_mtime))
+        files_data, _ = self.index.refresh(self.root, VIDEO_EXTENSIONS)
+        self.assertEqual(files_data[0]['media'], {'video_codec': 'hevc'})
+
+
+if __name__ == '__main__':
+    unittest.main()
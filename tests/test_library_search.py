@@ -0,0 +1,55 @@
+import unittest
+
+from source.library_model import TitleSearchIndex, normalize_title
+
+
+class NormalizeTitleTest(unittest.TestCase):
+
+    def test_normalize_title(self):
+        self.assertEqual(normalize_title("Amélie.(2001)_[1080p]-Gr"), "amelie 2001 1080p gr")
+
+
+class TitleSearchIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = TitleSearchIndex()
+        for key, title in enumerate(["The.Office.US.S01E01.mkv", "Breaking_Bad-S02E03.mkv", "Amélie (2001).avi", "Office Space 1999.mp4", "Up.2009.mkv"]):
+            self.index.add(key, title)
+
+    def test_empty_query_matches_everything(self):
+        self.assertIsNone(self.index.search("  .. "))
+        self.assertTrue(self.index.matches(0, ""))
+
+    def test_substring_of_a_word(self):
+        self.assertEqual(self.index.search("ffic"), {0, 3})
+        self.assertEqual(self.index.search("amelie"), {2})
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.index.search("office us"), {0})
+        self.assertEqual(self.index.search("bad office"), set())
+
+    def test_trigrams_must_come_from_one_word(self):
+        self.index.add(9, "ab.bc.abc")
+        self.assertEqual(self.index.search("abc"), {9})
+        self.assertEqual(self.index.search("abca"), set()) # 'abc' and 'bca' never occur in one word
+
+    def test_short_words_are_prefixes(self):
+        self.assertEqual(self.index.search("up"), {4})
+        self.assertEqual(self.index.search("p"), set())
+
+    def test_updates_are_incremental(self):
+        self.index.add(4, "Down.2010.mkv")
+        self.assertEqual(self.index.search("up"), set())
+        self.assertEqual(self.index.search("down"), {4})
+        self.index.remove(4); self.index.remove(42)
+        self.assertEqual(self.index.search("down"), set())
+        self.assertNotIn("dow", self.index.trigrams)
+
+    def test_matches_single_key(self):
+        self.assertTrue(self.index.matches(1, "breaking s02"))
+        self.assertFalse(self.index.matches(1, "office"))
+        self.assertFalse(self.index.matches(42, "office"))
+
+
+if __name__ == '__main__':
+    unittest.main()
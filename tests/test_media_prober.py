@@ -0,0 +1,44 @@
+import unittest
+from unittest import mock
+
+from source import media_prober
+from source.media_prober import format_runtime, needs_software_decode
+
+
+class NeedsSoftwareDecodeTest(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.dict(media_prober.HW_DECODE_LIMITS, {'h264': (1080, 8), 'hevc': (2160, 10), 'mpeg2video': (None, None)}, clear=True)
+        patcher.start(); self.addCleanup(patcher.stop)
+
+    def test_unprobed_or_failed(self):
+        self.assertFalse(needs_software_decode(None))
+        self.assertFalse(needs_software_decode({'error': "ffprobe exited with 1"}))
+
+    def test_codec_not_in_hardware(self):
+        self.assertTrue(needs_software_decode({'video_codec': 'vp9', 'height': 720}))
+
+    def test_height_limit(self):
+        self.assertFalse(needs_software_decode({'video_codec': 'H264', 'height': 1080}))
+        self.assertTrue(needs_software_decode({'video_codec': 'h264', 'height': 1440}))
+        self.assertFalse(needs_software_decode({'video_codec': 'hevc', 'height': 2160}))
+        self.assertFalse(needs_software_decode({'video_codec': 'h264', 'height': None}))
+
+    def test_bit_depth_limit(self):
+        self.assertTrue(needs_software_decode({'video_codec': 'h264', 'height': 720, 'bit_depth': 10}))
+        self.assertFalse(needs_software_decode({'video_codec': 'hevc', 'height': 2160, 'bit_depth': 10}))
+        self.assertFalse(needs_software_decode({'video_codec': 'h264', 'height': 720, 'bit_depth': None})) # Unknown depth counts as 8-bit
+
+    def test_codec_without_limits(self):
+        self.assertFalse(needs_software_decode({'video_codec': 'mpeg2video', 'height': 4320, 'bit_depth': 12}))
+
+
+class FormatRuntimeTest(unittest.TestCase):
+
+    def test_format_runtime(self):
+        self.assertEqual(format_runtime(59.6), "1:00")
+        self.assertEqual(format_runtime(3725), "1:02:05")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import json
+import tempfile
+import unittest
+from unittest import mock
+
+from source import media_prober, playback_profiles
+from source.playback_profiles import PlaybackProfiles
+
+
+class PlaybackProfilesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory(); self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "profiles.json")
+        for patcher in (mock.patch.dict(media_prober.HW_DECODE_LIMITS, {'h264': (1080, 8)}, clear=True), mock.patch.object(playback_profiles, 'DEFAULT_PROFILE', 'pi4_hw')):
+            patcher.start(); self.addCleanup(patcher.stop)
+
+    def test_automatic_chain(self):
+        profiles = PlaybackProfiles(path=self.path)
+        self.assertEqual(profiles.chain("/v/a.mkv"), ['pi4_hw', 'software', 'default']) # Not probed yet
+        self.assertEqual(profiles.chain("/v/a.mkv", {'video_codec': 'h264', 'height': 1080}), ['pi4_hw', 'software', 'default'])
+        self.assertEqual(profiles.chain("/v/a.mkv", {'video_codec': 'hevc', 'height': 2160}), ['software', 'default'])
+
+    def test_file_choice_then_codec_choice(self):
+        profiles = PlaybackProfiles(path=self.path)
+        profiles.set_codec_profile('HEVC', 'usb_hdd'); profiles.set_file_profile("/v/a.mkv", 'low_latency')
+        media = {'video_codec': 'hevc', 'height': 2160}
+        self.assertEqual(profiles.chain("/v/a.mkv", media), ['low_latency', 'usb_hdd', 'software', 'default'])
+        self.assertEqual(profiles.chain("/v/b.mkv", media), ['usb_hdd', 'software', 'default'])
+        profiles.set_file_profile("/v/a.mkv", None)
+        self.assertEqual(profiles.chain("/v/a.mkv", media)[0], 'usb_hdd')
+
+    def test_unknown_profiles_are_skipped(self):
+        with mock.patch.object(playback_profiles, 'DEFAULT_PROFILE', 'missing'):
+            self.assertEqual(PlaybackProfiles(path=self.path).chain("/v/a.mkv"), ['software', 'default'])
+
+    def test_choices_and_custom_profiles_persist(self):
+        with open(self.path, 'w') as f:
+            json.dump({'profiles': {'tuned': {'label': "Tuned", 'options': ['--file-caching=3000']}, 'broken': {'options': "x"}},
+                       'files': {"/v/gone.mkv": 'broken'}}, f)
+        profiles = PlaybackProfiles(path=self.path)
+        self.assertEqual(profiles.options('tuned'), ['--file-caching=3000']); self.assertNotIn('broken', profiles.names())
+        self.assertIsNone(profiles.file_profile("/v/gone.mkv"))
+        profiles.set_file_profile("/v/a.mkv", 'tuned')
+        reloaded = PlaybackProfiles(path=self.path)
+        self.assertEqual(reloaded.chain("/v/a.mkv")[0], 'tuned'); self.assertEqual(reloaded.label('tuned'), "Tuned")
+
+    def test_fallback_is_saved_only_once_it_plays(self):
+        profiles = PlaybackProfiles(path=self.path)
+        self.assertFalse(profiles.note_playing("/v/a.mkv", 'pi4_hw')) # Played without failing: nothing pinned
+        profiles.note_failed("/v/a.mkv") # pi4_hw failed, software is tried next...
+        profiles.note_failed("/v/a.mkv") # ...and fails too
+        self.assertIsNone(PlaybackProfiles(path=self.path).file_profile("/v/a.mkv"))
+        self.assertTrue(profiles.note_playing("/v/a.mkv", 'default'))
+        self.assertEqual(PlaybackProfiles(path=self.path).file_profile("/v/a.mkv"), 'default')
+        self.assertFalse(profiles.note_playing("/v/a.mkv", 'default'))
+
+    def test_oldest_file_choices_are_dropped(self):
+        profiles = PlaybackProfiles(path=self.path)
+        with mock.patch.object(playback_profiles, 'MAX_FILE_CHOICES', 2):
+            for name in ("a", "b", "c"): profiles.set_file_profile(f"/v/{name}.mkv", 'software')
+        self.assertEqual(list(profiles.files), ["/v/b.mkv", "/v/c.mkv"])
+
+
+if __name__ == '__main__':
+    unittest.main()
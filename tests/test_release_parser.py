@@ -0,0 +1,84 @@
+import os
+import unittest
+
+from source.release_parser import RELEASE_TAG_REGEX, ReleaseInfo, parse_release_name, parse_release_path, show_key
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "release_names.tsv")
+
+
+class ParseReleaseNameTest(unittest.TestCase):
+
+    def test_episode_markers(self):
+        cases = {
+            "Show.Name.S02E05.Episode.Title.1080p.WEB-DL.mkv": ("Show Name", 2, 5),
+            "Show Name - Season 1 Episode 2.mkv": ("Show Name", 1, 2),
+            "The.Office.US.1x03.HDTV.avi": ("The Office US", 1, 3),
+            "Show_Name_s03e10_720p.mkv": ("Show Name", 3, 10),
+            "Dark.S01E01.German.1080p.WEBRip.x265-GRP.mkv": ("Dark", 1, 1),
+            "[Group] Show Name - S01E12 (1080p.WEB.H264).mkv": ("Show Name", 1, 12),
+        }
+        for name, expected in cases.items():
+            with self.subTest(name=name): self.assertEqual(parse_release_name(name), ReleaseInfo(*expected))
+
+    def test_marker_at_start_has_no_title(self):
+        self.assertEqual(parse_release_name("S01E02.Pilot.mkv"), ReleaseInfo("", 1, 2))
+
+    def test_codec_is_not_an_episode(self):
+        self.assertEqual(parse_release_name("Movie.2010.DTS.5.1.x264-GRP.mkv").season, None)
+        self.assertEqual(parse_release_name("Movie.2010.1080p.BluRay.x265.mkv").season, None)
+
+    def test_movie(self):
+        self.assertEqual(parse_release_name("Inception (2010) [1080p].mkv"), ReleaseInfo("Inception", None, None))
+
+    def test_release_tags_stay_out_of_titles(self):
+        cases = {
+            "Blade.Runner.2049.1080p.BluRay.x264-ROVERS.mkv": "Blade Runner 2049",
+            "Movie.2010.DTS.5.1.x264-GRP.mkv": "Movie",
+            "Dune.Part.Two.2024.2160p.WEB-DL.DDP5.1.Atmos.DV.HDR.H.265-FLUX.mkv": "Dune Part Two",
+            "The.Matrix.1999.1080p.WEB.H264-GRP.mkv": "The Matrix",
+            "Heat.1995.REMASTERED.1080p.BluRay.x264-GRP.mkv": "Heat",
+            "Oppenheimer.2023.IMAX.1080p.BluRay.x264-GRP.mkv": "Oppenheimer",
+            "Arrival (2016) [1080p] [BluRay] [5.1] [YTS.MX].mp4": "Arrival",
+        }
+        for name, title in cases.items():
+            with self.subTest(name=name): self.assertEqual(parse_release_name(name).title, title)
+
+    def test_years_that_belong_to_the_title(self):
+        cases = {"2001.A.Space.Odyssey.1968.1080p.mkv": "2001 A Space Odyssey", "1917.2019.1080p.BluRay.x264-SPARKS.mkv": "1917", "1917.mkv": "1917",
+                 "Wonder.Woman.1984.2020.1080p.WEB-DL.mkv": "Wonder Woman 1984", "Blade.Runner.2049.2017.1080p.mkv": "Blade Runner 2049"}
+        for name, title in cases.items():
+            with self.subTest(name=name): self.assertEqual(parse_release_name(name).title, title)
+
+    def test_capitalized_tag_words_only_as_tags(self):
+        self.assertEqual(parse_release_name("Charlotte's.Web.2006.720p.BluRay.x264-SiNNERS.mkv").title, "Charlotte's Web")
+
+
+class ReleaseNameCorpusTest(unittest.TestCase):
+    """ Every labelled name of the benchmark corpus parses as expected, with no release tag left in a title. """
+
+    def test_corpus(self):
+        with open(CORPUS_PATH, encoding='utf-8') as f: lines = [line.rstrip('\n') for line in f if line.strip() and not line.startswith('#')]
+        self.assertGreater(len(lines), 100)
+        for line in lines:
+            name, title, season, episode = (line.split('\t') + ['', '', ''])[:4]
+            with self.subTest(name=name):
+                info = parse_release_name(name)
+                self.assertEqual((show_key(info.title), info.season, info.episode), (show_key(title), int(season) if season else None, int(episode) if episode else None))
+                self.assertIsNone(next(RELEASE_TAG_REGEX.finditer(info.title.replace(' ', '.')), None))
+
+
+class ParseReleasePathTest(unittest.TestCase):
+
+    def test_title_from_folder(self):
+        self.assertEqual(parse_release_path("/media/Show Name/Season 2/S02E03.mkv"), ReleaseInfo("Show Name", 2, 3))
+        self.assertEqual(parse_release_path("/media/The.Wire/S01/S01E01.mkv"), ReleaseInfo("The Wire", 1, 1))
+
+    def test_file_name_title_wins(self):
+        self.assertEqual(parse_release_path("/media/Downloads/Fargo.S01E01.720p.mkv"), ReleaseInfo("Fargo", 1, 1))
+
+    def test_show_key(self):
+        self.assertEqual(show_key("The Office US"), show_key("the  office us"))
+
+
+if __name__ == '__main__':
+    unittest.main()
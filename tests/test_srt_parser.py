@@ -0,0 +1,90 @@
+import os
+import codecs
+import tempfile
+import unittest
+
+from source.srt_parser import SrtCues, detect_encoding_bytes, format_timestamp, parse_srt, parse_srt_lines, strip_tags
+
+
+SAMPLE = """1
+00:00:01,000 --> 00:00:02,500
+Hello <i>there</i>.
+
+2
+00:00:03,000 --> 00:00:04,000
+{\\an8}Second line
+continues here.
+
+"""
+
+
+class ParseSrtLinesTest(unittest.TestCase):
+
+    def test_parses_cues(self):
+        cues = parse_srt_lines(SAMPLE.splitlines(True))
+        self.assertEqual(len(cues), 2)
+        self.assertEqual(list(cues.starts), [1000, 3000]); self.assertEqual(list(cues.ends), [2500, 4000])
+        self.assertEqual(cues.texts[1], "{\\an8}Second line\ncontinues here.")
+        self.assertEqual(cues.plain_texts(), ["Hello there.", "Second line\ncontinues here."])
+
+    def test_tolerates_missing_index_and_separator(self):
+        lines = ["00:00:01,000 --> 00:00:02,000\n", "First\n", "00:00:03.5 --> 00:00:04,000\n", "\n", "Second\n"]
+        cues = parse_srt_lines(lines)
+        self.assertEqual(cues.texts, ["First", "Second"])
+        self.assertEqual(cues.starts[1], 3500)
+
+    def test_digits_in_text_are_kept(self):
+        cues = parse_srt_lines("1\n00:00:01,000 --> 00:00:02,000\n42\n\n2\n00:00:03,000 --> 00:00:04,000\nEnd\n".splitlines(True))
+        self.assertEqual(cues.texts, ["42", "End"])
+
+    def test_cue_without_text_is_dropped(self):
+        cues = parse_srt_lines("1\n00:00:01,000 --> 00:00:02,000\n\n2\n00:00:03,000 --> 00:00:04,000\nText\n".splitlines(True))
+        self.assertEqual(cues.texts, ["Text"])
+
+
+class SrtCuesTest(unittest.TestCase):
+
+    def test_round_trip_with_replacement_texts(self):
+        cues = parse_srt_lines(SAMPLE.splitlines(True))
+        srt = cues.to_srt(["Witaj.", "Druga linia"])
+        self.assertEqual(srt, "1\n00:00:01,000 --> 00:00:02,500\nWitaj.\n\n2\n00:00:03,000 --> 00:00:04,000\nDruga linia\n")
+        self.assertEqual(parse_srt_lines(srt.splitlines(True)).texts, ["Witaj.", "Druga linia"])
+
+    def test_subset_is_renumbered(self):
+        cues = SrtCues(); cues.append(0, 1000, "a"); cues.append(1000, 2000, "b"); cues.append(2000, 3000, "c")
+        self.assertEqual(list(cues.iter_srt(indices=[2])), ["1\n00:00:02,000 --> 00:00:03,000\nc\n"])
+
+    def test_count_mismatch_raises(self):
+        cues = SrtCues(); cues.append(0, 1000, "a")
+        with self.assertRaises(ValueError): cues.to_srt(["a", "b"])
+
+
+class HelpersTest(unittest.TestCase):
+
+    def test_format_timestamp(self):
+        self.assertEqual(format_timestamp(0), "00:00:00,000")
+        self.assertEqual(format_timestamp(3723004), "01:02:03,004")
+        self.assertEqual(format_timestamp(-5), "00:00:00,000")
+
+    def test_strip_tags(self):
+        self.assertEqual(strip_tags("<b>Bold</b> {\\i1}and{\\i0} plain"), "Bold and plain")
+
+    def test_detect_encoding_boms(self):
+        self.assertEqual(detect_encoding_bytes([codecs.BOM_UTF8 + b"abc"]), 'utf-8-sig')
+        self.assertEqual(detect_encoding_bytes([codecs.BOM_UTF16_LE + "a".encode('utf-16-le')]), 'utf-16')
+
+    def test_detect_encoding_utf8_split_across_chunks(self):
+        data = "Zażółć gęślą jaźń".encode('utf-8')
+        self.assertEqual(detect_encoding_bytes([data[:3], data[3:]]), 'utf-8')
+
+    def test_parse_srt_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "sample.srt")
+            with open(path, 'wb') as f: f.write(codecs.BOM_UTF8 + SAMPLE.replace('\n', '\r\n').encode('utf-8'))
+            cues = parse_srt(path)
+        self.assertEqual(cues.encoding, 'utf-8-sig')
+        self.assertEqual(cues.plain_text(0), "Hello there.")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import json
+import tempfile
+import threading
+import subprocess
+import unittest
+from unittest import mock
+
+from source import subtitle_extractor
+from source.subtitle_extractor import EmbeddedSubtitleExtractor
+
+STREAMS = [
+    {'index': 2, 'codec_name': 'subrip', 'tags': {'language': 'eng'}},
+    {'index': 3, 'codec_name': 'hdmv_pgs_subtitle', 'tags': {'language': 'pol'}}, # Bitmap: never extracted
+    {'index': 4, 'codec_name': 'mov_text', 'tags': {'language': 'pol', 'title': "Forced"}, 'disposition': {'forced': 1}},
+    {'index': 5, 'codec_name': 'ass', 'tags': {'language': 'und'}},
+]
+
+
+class SubtitleExtractorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory(); self.addCleanup(self.tmp.cleanup)
+        self.cache_file = os.path.join(self.tmp.name, "embedded_subtitles.json"); self.commands = []
+        for patcher in (mock.patch.object(subtitle_extractor.shutil, 'which', lambda name: f"/usr/bin/{name}"),
+                        mock.patch.object(subtitle_extractor, 'cache_path', lambda filename: self.cache_file),
+                        mock.patch.object(subtitle_extractor.subprocess, 'run', self._run)):
+            patcher.start(); self.addCleanup(patcher.stop)
+        self.video = os.path.join(self.tmp.name, "Movie.mkv")
+        with open(self.video, 'wb') as f: f.write(b"video")
+
+    def _run(self, cmd, **kwargs):
+        """ Fake ffprobe (STREAMS) and ffmpeg (writes a one-cue SRT for the mapped stream). """
+        self.commands.append(cmd)
+        if cmd[0].endswith('ffprobe'): return subprocess.CompletedProcess(cmd, 0, json.dumps({'streams': STREAMS}), "")
+        with open(cmd[-1], 'w', encoding='utf-8') as f: f.write(f"1\n00:00:01,000 --> 00:00:02,000\nstream {cmd[cmd.index('-map') + 1]}\n")
+        return subprocess.CompletedProcess(cmd, 0, "", "")
+
+    def _probes(self):
+        return sum(cmd[0].endswith('ffprobe') for cmd in self.commands)
+
+    def _extractor(self):
+        extractor = EmbeddedSubtitleExtractor(); self.addCleanup(extractor.shutdown); return extractor
+
+    def test_only_text_tracks_are_extracted(self):
+        extractor = self._extractor(); finished = []; extractor.extraction_finished.connect(lambda path, written: finished.append(written))
+        extractor._extract_worker(self.video)
+        self.assertEqual([track['index'] for track in extractor.cached_tracks(self.video)], [2, 4, 5])
+        base = os.path.join(self.tmp.name, "Movie")
+        self.assertEqual(sorted(finished[0]), [base + ".en.srt", base + ".pl.srt", base + ".srt"])
+        with open(base + ".pl.srt", encoding='utf-8') as f: self.assertIn("stream 0:4", f.read())
+        self.assertFalse([name for name in os.listdir(self.tmp.name) if name.endswith('.part')])
+
+    def test_probe_result_is_cached_across_sessions(self):
+        self._extractor()._extract_worker(self.video); self.assertEqual(self._probes(), 1)
+        extractor = self._extractor() # Reads the saved cache
+        self.assertEqual(len(extractor.cached_tracks(self.video)), 3)
+        extractor._extract_worker(self.video); self.assertEqual(self._probes(), 1)
+
+    def test_changed_file_is_probed_again(self):
+        extractor = self._extractor(); extractor._extract_worker(self.video)
+        stat = os.stat(self.video); os.utime(self.video, (stat.st_atime, stat.st_mtime + 5))
+        self.assertIsNone(extractor.cached_tracks(self.video))
+        extractor._extract_worker(self.video); self.assertEqual(self._probes(), 2)
+        self.assertIsNotNone(extractor.cached_tracks(self.video))
+
+    def test_file_without_text_tracks_is_not_submitted_again(self):
+        extractor = self._extractor(); extractor._store_probe(self.video, [])
+        self.assertFalse(extractor.submit(self.video)); self.assertEqual(self.commands, [])
+
+    def test_concurrent_stores_all_reach_the_saved_cache(self):
+        extractor = self._extractor(); videos = []
+        for number in range(20):
+            path = os.path.join(self.tmp.name, f"e{number:02d}.mkv"); videos.append(path)
+            with open(path, 'wb') as f: f.write(b"x" * number)
+        threads = [threading.Thread(target=extractor._store_probe, args=(path, [])) for path in videos]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+        with open(self.cache_file, encoding='utf-8') as f: saved = json.load(f)
+        self.assertEqual(sorted(saved), videos); self.assertEqual(saved[videos[3]]['size'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
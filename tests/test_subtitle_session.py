@@ -0,0 +1,87 @@
+import os
+import json
+import time
+import base64
+import tempfile
+import unittest
+from unittest import mock
+
+from source import subtitle_manager
+from source.subtitle_manager import SubtitleManager
+
+
+def make_token(name, exp):
+    payload = base64.urlsafe_b64encode(json.dumps({'sub': name, 'exp': exp}).encode()).decode().rstrip('=')
+    return f"header.{payload}.signature"
+
+
+class FakeResponse:
+
+    def __init__(self, status_code, data):
+        self.status_code = status_code; self.ok = status_code < 400; self.headers = {}; self.data = data; self.text = json.dumps(data)
+
+    def json(self): return self.data
+
+
+class FakeSession:
+    """ Accepts only the most recently issued token; answers login and download. """
+
+    def __init__(self):
+        self.headers = {}; self.calls = []; self.valid_token = None; self.logins = 0; self.reject_all = False
+
+    def request(self, method, url, params=None, json=None, headers=None, timeout=None):
+        endpoint = url.rsplit('/', 1)[-1]; self.calls.append((endpoint, (headers or {}).get('Authorization')))
+        if endpoint == 'login':
+            self.logins += 1; self.valid_token = make_token(f"login{self.logins}", time.time() + 3600)
+            return FakeResponse(200, {'token': self.valid_token, 'user': {'allowed_downloads': 100, 'level': 'Sub leecher'}})
+        if self.reject_all or (headers or {}).get('Authorization') != f"Bearer {self.valid_token}": return FakeResponse(401, {'message': "Unauthorized"})
+        return FakeResponse(200, {'link': "https://example.invalid/sub.srt", 'file_name': "sub.srt", 'remaining': 99})
+
+
+class SessionRenewalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory(); self.addCleanup(self.tmp.cleanup)
+        cache_file = os.path.join(self.tmp.name, "session.json")
+        for patcher in (mock.patch.object(subtitle_manager, 'config_path', lambda filename: cache_file),
+                        mock.patch.multiple(subtitle_manager, OPENSUBTITLES_USERNAME="user", OPENSUBTITLES_PASSWORD="secret", OPENSUBTITLES_API_KEY="key")):
+            patcher.start(); self.addCleanup(patcher.stop)
+        self.manager = SubtitleManager(); self.manager.session = FakeSession()
+        self.quota = []; self.manager.quota_info.connect(lambda remaining, limit: self.quota.append((remaining, limit)))
+
+    def download(self):
+        return self.manager._make_request("POST", "download", data={'file_id': 1}, requires_auth=True)
+
+    def test_rejected_token_logs_in_again_and_retries_once(self):
+        self.manager.jwt_token = make_token("stale", time.time() + 3600); self.manager.token_expires_at = time.time() + 3600; self.manager.logged_in = True
+        data, error = self.download()
+        self.assertIsNone(error); self.assertEqual(data['file_name'], "sub.srt")
+        self.assertEqual([endpoint for endpoint, _ in self.manager.session.calls], ['download', 'login', 'download'])
+        self.assertTrue(self.manager.logged_in); self.assertEqual(self.quota, [(100, 100)])
+
+    def test_expired_token_is_renewed_before_the_request(self):
+        self.manager.jwt_token = make_token("old", time.time() + 10); self.manager.token_expires_at = time.time() + 10; self.manager.logged_in = True
+        data, error = self.download()
+        self.assertIsNone(error)
+        self.assertEqual([endpoint for endpoint, _ in self.manager.session.calls], ['login', 'download'])
+
+    def test_not_logged_in_yet(self):
+        self.assertIsNone(self.download()[1])
+        self.assertEqual(self.manager.session.logins, 1)
+
+    def test_persistent_401_is_retried_only_once(self):
+        self.manager.session.reject_all = True
+        data, error = self.download()
+        self.assertEqual(error['status'], 401); self.assertFalse(self.manager.logged_in)
+        self.assertEqual([endpoint for endpoint, _ in self.manager.session.calls], ['login', 'download', 'login', 'download'])
+
+    def test_cached_restore_emits_quota(self):
+        self.manager._login_request(); restored = SubtitleManager(); restored.quota_info.connect(lambda remaining, limit: self.quota.append((remaining, limit)))
+        statuses = []; restored.login_status.connect(lambda success, message: statuses.append(success))
+        restored.login()
+        self.assertEqual(statuses, [True]); self.assertEqual(self.quota, [(100, 100)])
+        self.assertEqual(restored.jwt_token, self.manager.jwt_token)
+
+
+if __name__ == '__main__':
+    unittest.main()
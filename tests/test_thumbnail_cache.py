@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+
+from source.thumbnailer import ThumbnailCache
+
+
+class ThumbnailCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory(); self.addCleanup(self.tmp.cleanup)
+        self.directory = self.tmp.name
+
+    def test_evicts_least_recently_used_over_the_cap(self):
+        cache = ThumbnailCache(directory=self.directory, max_bytes=250)
+        for name in ("a.jpg", "b.jpg"): cache.put(name, b"x" * 100)
+        self.assertIsNotNone(cache.get("a.jpg")) # 'b' is now the least recently used
+        cache.put("c.jpg", b"x" * 100)
+        self.assertIsNone(cache.get("b.jpg"))
+        self.assertFalse(os.path.exists(os.path.join(self.directory, "b.jpg")))
+        self.assertEqual(sorted(os.listdir(self.directory)), ["a.jpg", "c.jpg"])
+        self.assertEqual(cache.total, 200)
+
+    def test_replacing_an_image_updates_the_total(self):
+        cache = ThumbnailCache(directory=self.directory, max_bytes=1000)
+        cache.put("a.jpg", b"x" * 100); cache.put("a.jpg", b"x" * 30)
+        self.assertEqual(cache.total, 30)
+
+    def test_newest_image_is_kept_even_over_the_cap(self):
+        cache = ThumbnailCache(directory=self.directory, max_bytes=50)
+        cache.put("a.jpg", b"x" * 10); path = cache.put("big.jpg", b"x" * 100)
+        self.assertTrue(os.path.exists(path)); self.assertEqual(list(cache.entries), ["big.jpg"])
+
+    def test_recency_survives_a_restart(self):
+        for age, name in enumerate(("new.jpg", "old.jpg")):
+            path = os.path.join(self.directory, name)
+            with open(path, 'wb') as f: f.write(b"x" * 100)
+            os.utime(path, (1000000 - age * 1000, 1000000 - age * 1000))
+        with open(os.path.join(self.directory, "partial.jpg.tmp"), 'wb') as f: f.write(b"x")
+        cache = ThumbnailCache(directory=self.directory, max_bytes=250)
+        self.assertEqual(list(cache.entries), ["old.jpg", "new.jpg"])
+        self.assertFalse(os.path.exists(os.path.join(self.directory, "partial.jpg.tmp")))
+        cache.put("c.jpg", b"x" * 100)
+        self.assertEqual(sorted(os.listdir(self.directory)), ["c.jpg", "new.jpg"])
+
+    def test_file_removed_behind_the_cache(self):
+        cache = ThumbnailCache(directory=self.directory, max_bytes=1000)
+        path = cache.put("a.jpg", b"x" * 10); cache.touched.clear(); os.remove(path)
+        self.assertIsNone(cache.get("a.jpg"))
+        self.assertEqual(cache.total, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
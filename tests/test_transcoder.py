@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from source import transcoder
+from source.library_index import LibraryIndex, find_sidecars
+from source.transcoder import TranscodeQueue, transcode_output_path
+
+VIDEO_EXTENSIONS = {'.mkv', '.mp4'}
+
+
+class ConvertedVideoTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory(); self.addCleanup(self.tmp.cleanup)
+        self.directory = self.tmp.name
+
+    def _write(self, name, data=b"x"):
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as f: f.write(data)
+        return path
+
+    def _job(self, path, duration=60):
+        stat = os.stat(path)
+        return {'video_path': path, 'size': stat.st_size, 'mtime': stat.st_mtime, 'duration': duration}
+
+    def _queue(self):
+        with mock.patch.object(transcoder, 'config_path', return_value=os.path.join(self.directory, ".jobs.json")): queue = TranscodeQueue()
+        queue.encoder = 'libx264'
+        def encode(job, tmp_path, encoder):
+            with open(tmp_path, 'wb') as f: f.write(b"h264")
+        queue._encode = encode
+        return queue
+
+    def test_output_is_next_to_the_source(self):
+        self.assertEqual(transcode_output_path("/v/Show.S01E01.x265.mkv"), "/v/Show.S01E01.x265.h264.mkv")
+        self.assertEqual(transcode_output_path("/v/Movie.2019.mp4"), "/v/Movie.2019.h264.mkv")
+
+    def test_source_is_kept_by_default(self):
+        source = self._write("Movie.2019.x265.mp4", b"hevc")
+        report = self._queue()._run_job(self._job(source))
+        self.assertEqual(report['status'], 'done')
+        self.assertEqual(report['output'], os.path.join(self.directory, "Movie.2019.x265.h264.mkv"))
+        with open(source, 'rb') as f: self.assertEqual(f.read(), b"hevc")
+        with open(report['output'], 'rb') as f: self.assertEqual(f.read(), b"h264")
+        self.assertEqual(sorted(os.listdir(self.directory)), ["Movie.2019.x265.h264.mkv", "Movie.2019.x265.mp4"]) # No temporary file left
+
+    def test_source_is_deleted_only_when_opted_in(self):
+        source = self._write("Movie.2019.x265.mkv", b"hevc")
+        with mock.patch.object(transcoder, 'DELETE_ORIGINAL', True): report = self._queue()._run_job(self._job(source))
+        self.assertEqual(report['status'], 'done'); self.assertFalse(os.path.exists(source)); self.assertTrue(os.path.exists(report['output']))
+
+    def test_existing_output_is_not_overwritten(self):
+        source = self._write("Movie.mkv", b"hevc"); output = self._write("Movie.h264.mkv", b"mine")
+        report = self._queue()._run_job(self._job(source))
+        self.assertEqual(report['status'], 'failed')
+        with open(output, 'rb') as f: self.assertEqual(f.read(), b"mine")
+
+    def test_command_skips_attached_pictures(self):
+        command = self._queue()._command("/v/Movie.mkv", "/v/.Movie.h264.mkv.transcode", 'libx264')
+        self.assertEqual(command[command.index('0:a?') - 2:command.index('0:a?') - 1], ['0:V:0'])
+        self.assertNotIn('0:v:0', command); self.assertNotIn('-c:s', command) # Matroska sources keep their subtitle codecs
+
+    def test_mp4_text_subtitles_become_srt(self):
+        for name in ("Movie.mp4", "Movie.M4V", "Movie.mov"):
+            with self.subTest(name=name):
+                command = self._queue()._command(f"/v/{name}", "/v/.tmp", 'libx264')
+                self.assertEqual(command[command.index('-c:s'):command.index('-c:s') + 2], ['-c:s', 'srt'])
+                self.assertGreater(command.index('-c:s'), command.index('copy')) # Overrides the stream copy for subtitles only
+
+    def test_library_lists_the_conversion_in_place_of_the_source(self):
+        self._write("Movie.mkv"); converted = self._write("Movie.h264.mkv"); self._write("Other.mp4")
+        index = LibraryIndex(db_path=os.path.join(self.directory, ".index.sqlite3")); self.addCleanup(index.close)
+        _, videos = index.scan_directory(self.directory, VIDEO_EXTENSIONS)
+        self.assertEqual(sorted(os.path.basename(row[0]) for row in videos), ["Movie.h264.mkv", "Other.mp4"])
+        self.assertIn(converted, [row[0] for row in videos])
+
+    def test_conversion_uses_the_source_subtitles(self):
+        names = {"Movie.mkv", "Movie.h264.mkv", "Movie.en.srt", "Movie.pl.srt"}
+        source_srt, translated_srt, sidecars = find_sidecars(os.path.join(self.directory, "Movie.h264.mkv"), names)
+        self.assertEqual(source_srt, os.path.join(self.directory, "Movie.en.srt")); self.assertEqual(translated_srt, os.path.join(self.directory, "Movie.pl.srt"))
+        self.assertEqual(sidecars, ["Movie.en.srt", "Movie.pl.srt"])
+
+    def test_own_subtitles_come_first(self):
+        names = {"Movie.h264.mkv", "Movie.en.srt", "Movie.h264.en.srt"}
+        source_srt, _, sidecars = find_sidecars(os.path.join(self.directory, "Movie.h264.mkv"), names)
+        self.assertEqual(source_srt, os.path.join(self.directory, "Movie.h264.en.srt")); self.assertEqual(len(sidecars), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
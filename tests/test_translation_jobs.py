@@ -0,0 +1,77 @@
+import time
+import threading
+import unittest
+
+from PyQt5.QtCore import QObject, Qt, pyqtSignal
+
+from source.translation_jobs import TranslationJobManager, MAX_PACKED_FILES, PRIORITY_PLAYBACK, PRIORITY_NORMAL, PRIORITY_BACKGROUND
+
+
+class StubTranslator(QObject):
+    """ Records the groups it is given. While hold is set, a group runs until cancelled and then reports every file unfinished. """
+    translation_error = pyqtSignal(str, str)
+    translation_cancelled = pyqtSignal(str)
+
+    def __init__(self):
+        super().__init__(); self.groups = []; self.hold = threading.Event(); self.started = threading.Event()
+
+    def check_request(self, srt_path, target_codes=None):
+        return None
+
+    def _run_translation_group(self, srt_paths, playhead_ms=None, cancel_event=None, target_codes=None):
+        self.groups.append(list(srt_paths)); self.started.set()
+        if not self.hold.is_set(): return []
+        self.hold.clear(); cancel_event.wait(5)
+        return list(srt_paths) if cancel_event.is_set() else []
+
+
+class TranslationJobManagerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.translator = StubTranslator(); self.cancelled = []
+        self.translator.translation_cancelled.connect(self.cancelled.append, Qt.DirectConnection) # Emitted from the job's thread
+        self.manager = TranslationJobManager(self.translator, max_concurrent_jobs=0) # Nothing starts on its own
+
+    def _pop_all(self):
+        groups = []
+        with self.manager.lock:
+            while True:
+                group = self.manager._pop_group()
+                if not group: return groups
+                groups.append([job.srt_path for job in group])
+
+    def test_priority_order_and_fifo_within_a_priority(self):
+        for path, priority in (("/a/1.en.srt", PRIORITY_BACKGROUND), ("/b/2.en.srt", PRIORITY_NORMAL), ("/c/3.en.srt", PRIORITY_PLAYBACK), ("/d/4.en.srt", PRIORITY_NORMAL)):
+            self.manager.submit(path, priority)
+        self.assertEqual(self._pop_all(), [["/c/3.en.srt"], ["/b/2.en.srt"], ["/d/4.en.srt"], ["/a/1.en.srt"]])
+
+    def test_reprioritised_file_moves_up_and_its_old_entry_is_skipped(self):
+        self.manager.submit("/a/1.en.srt"); self.manager.submit("/b/2.en.srt"); self.manager.submit("/b/2.en.srt", PRIORITY_PLAYBACK, playhead_ms=5000)
+        self.manager.submit("/a/1.en.srt", PRIORITY_BACKGROUND) # A lower priority never demotes a queued file
+        self.assertEqual(len(self.manager.queue), 3)
+        self.assertEqual(self._pop_all(), [["/b/2.en.srt"], ["/a/1.en.srt"]]); self.assertEqual(self.manager.queue, [])
+
+    def test_cancelled_queued_file_is_reported_and_skipped(self):
+        self.manager.submit("/a/1.en.srt"); self.manager.submit("/b/2.en.srt")
+        self.assertTrue(self.manager.cancel("/a/1.en.srt")); self.assertFalse(self.manager.cancel("/a/1.en.srt"))
+        self.assertEqual(self.cancelled, ["/a/1.en.srt"]); self.assertEqual(self._pop_all(), [["/b/2.en.srt"]])
+
+    def test_same_directory_files_are_packed(self):
+        paths = [f"/season/e{number:02d}.en.srt" for number in range(MAX_PACKED_FILES + 2)]
+        for path in paths: self.manager.submit(path)
+        self.manager.submit("/other/movie.en.srt"); self.manager.submit("/season/de.en.srt", target_codes=['de']); self.manager.submit("/season/now.en.srt", PRIORITY_PLAYBACK, playhead_ms=0)
+        self.assertEqual(self._pop_all(), [["/season/now.en.srt"], paths[:MAX_PACKED_FILES], paths[MAX_PACKED_FILES:], ["/other/movie.en.srt"], ["/season/de.en.srt"]])
+
+    def test_files_of_a_cancelled_group_are_requeued(self):
+        self.translator.hold.set(); self.manager.submit("/s/e01.en.srt"); self.manager.submit("/s/e02.en.srt")
+        self.manager.max_concurrent_jobs = 1; self.manager._dispatch()
+        self.assertTrue(self.translator.started.wait(5)); self.assertTrue(self.manager.is_active("/s/e02.en.srt"))
+        self.manager.cancel("/s/e01.en.srt") # Stops the packed job; only e01 itself was cancelled
+        deadline = time.monotonic() + 5
+        while (len(self.translator.groups) < 2 or self.manager.pending_count()) and time.monotonic() < deadline: time.sleep(0.01)
+        self.assertEqual(self.translator.groups, [["/s/e01.en.srt", "/s/e02.en.srt"], ["/s/e02.en.srt"]])
+        self.assertEqual(self.cancelled, ["/s/e01.en.srt"]); self.assertEqual(self.manager.pending_count(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
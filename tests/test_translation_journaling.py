@@ -0,0 +1,66 @@
+import os
+import re
+import json
+import tempfile
+import unittest
+from unittest import mock
+
+from source import translation_manager
+from source.batch_sizer import BatchSizer
+from source.translation_backends import TranslationBackend
+from source.translation_journal import TranslationJournal
+from source.translation_memory import TranslationMemory
+from source.translation_manager import SubtitleTranslator, BatchContext
+
+
+class FakeBackend(TranslationBackend):
+    """ Answers batch prompts from a fixed table; texts missing from it fail, also one at a time. """
+    name = "fake"; supports_streaming = False
+    answers = {"OK": "OK", "Hello": "Cześć"}
+
+    @property
+    def model_id(self): return "fake-model"
+
+    def generate(self, prompt, json_mode=False):
+        if not json_mode: raise RuntimeError("single entry failed")
+        records = json.loads(re.search(r'^\[.*\]$', prompt, re.MULTILINE).group(0))
+        return json.dumps([{'id': record['id'], 'pl': self.answers[record['text']]} for record in records if record['text'] in self.answers])
+
+
+class JournalingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory(); self.addCleanup(self.tmp.cleanup); tmp = self.tmp.name
+        for patcher in (mock.patch.object(translation_manager, 'TranslationMemory', lambda: TranslationMemory(db_path=os.path.join(tmp, "tm.sqlite3"))),
+                        mock.patch.object(translation_manager, 'BatchSizer', lambda model: BatchSizer(model, os.path.join(tmp, "tuning.json"))),
+                        mock.patch.object(translation_manager.time, 'sleep'),
+                        mock.patch.object(TranslationJournal, 'discard')): # Keep the journal to inspect it
+            patcher.start(); self.addCleanup(patcher.stop)
+        self.srt_path = os.path.join(tmp, "movie.en.srt")
+        with open(self.srt_path, 'w', encoding='utf-8') as f:
+            f.write("1\n00:00:01,000 --> 00:00:02,000\nOK\n\n2\n00:00:03,000 --> 00:00:04,000\nHello\n\n3\n00:00:05,000 --> 00:00:06,000\nBroken\n")
+
+    def test_lines_translated_as_themselves_are_journaled_but_fallbacks_are_not(self):
+        translator = SubtitleTranslator(backend=FakeBackend())
+        self.assertEqual(translator._run_translation_group([self.srt_path], target_codes=('pl',)), [])
+        with open(os.path.join(self.tmp.name, "movie.pl.srt"), encoding='utf-8') as f: self.assertIn("Cześć", f.read())
+        journal = TranslationJournal(self.srt_path, translation_manager.file_content_hash(self.srt_path), "pl", "fake-model")
+        self.assertEqual(journal.load(), {"OK": {'pl': "OK"}, "Hello": {'pl': "Cześć"}})
+
+    def test_fallbacks_stay_with_their_job(self):
+        translator = SubtitleTranslator(backend=FakeBackend()); first = BatchContext(4); second = BatchContext(4)
+        self.assertEqual(translator._call_api_batch(["Broken", "Hello"], first, ('pl',)), [{'pl': "Broken"}, {'pl': "Cześć"}])
+        self.assertEqual(first.fallback_texts, {"Broken"}); self.assertEqual(second.fallback_texts, set())
+        self.assertEqual(translator._call_api_batch(["Hello"], second, ('pl',)), [{'pl': "Cześć"}])
+        self.assertEqual(second.api_calls, 1); self.assertEqual(translator.api_calls, first.api_calls + 1)
+
+    def test_rate_limit_shrinks_only_its_own_window(self):
+        translator = SubtitleTranslator(backend=FakeBackend()); first = BatchContext(4); second = BatchContext(4)
+        translator._note_rate_limited(0, first)
+        self.assertEqual(first.concurrency_limit, 2); self.assertEqual(second.concurrency_limit, 4)
+        for _ in range(4): translator._note_request_ok(first)
+        self.assertEqual(first.concurrency_limit, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
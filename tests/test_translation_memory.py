@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from source import translation_memory
+from source.translation_memory import TranslationMemory, normalize_source_text
+
+
+class NormalizeSourceTextTest(unittest.TestCase):
+
+    def test_nfc_and_whitespace(self):
+        self.assertEqual(normalize_source_text("  Cafe\u0301\t \u00a0au  lait \r\n\n  Oui.  "), "Caf\u00e9 au lait\nOui.")
+
+    def test_empty(self):
+        self.assertEqual(normalize_source_text(None), ""); self.assertEqual(normalize_source_text(" \n\t"), "")
+
+
+class TranslationMemoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory(); self.addCleanup(self.tmp.cleanup)
+        self.db_path = os.path.join(self.tmp.name, "tm.sqlite3")
+        self.memory = TranslationMemory(db_path=self.db_path); self.addCleanup(self.memory.close)
+
+    def test_decomposed_and_composed_text_share_a_key(self):
+        self.memory.store_many([(normalize_source_text("Cafe\u0301"), "Kawiarnia")], 'en', 'pl', 'm') # Decomposed é
+        self.assertEqual(self.memory.lookup_many([normalize_source_text("Caf\u00e9 ")], 'en', 'pl', 'm'), {"Caf\u00e9": "Kawiarnia"})
+
+    def test_entries_are_scoped_by_languages_and_model(self):
+        self.memory.store_many([("Yes.", "Tak.")], 'en', 'pl', 'model-a')
+        self.assertEqual(self.memory.lookup_many(["Yes."], 'en', 'pl', 'model-a'), {"Yes.": "Tak."})
+        for source_lang, target_lang, model in (('en', 'de', 'model-a'), ('fr', 'pl', 'model-a'), ('en', 'pl', 'model-b')):
+            with self.subTest(source_lang=source_lang, target_lang=target_lang, model=model):
+                self.assertEqual(self.memory.lookup_many(["Yes."], source_lang, target_lang, model), {})
+
+    def test_store_replaces_and_skips_empty_sources(self):
+        self.memory.store_many([("Yes.", "Tak."), ("", "nic")], 'en', 'pl', 'm'); self.memory.store_many([("Yes.", "Tak!")], 'en', 'pl', 'm')
+        self.assertEqual(self.memory.lookup_many(["Yes.", ""], 'en', 'pl', 'm'), {"Yes.": "Tak!"})
+
+    def test_lookup_after_reopening(self):
+        self.memory.store_many([("No.", "Nie."), ("Maybe.", "Może.")], 'en', 'pl', 'm'); self.memory.close()
+        reopened = TranslationMemory(db_path=self.db_path); self.addCleanup(reopened.close)
+        self.assertEqual(reopened.lookup_many(["No.", "Maybe.", "Never."], 'en', 'pl', 'm'), {"No.": "Nie.", "Maybe.": "Może."})
+
+    def test_lookups_larger_than_the_parameter_limit(self):
+        pairs = [(f"line {i}", f"linia {i}") for i in range(25)]; self.memory.store_many(pairs, 'en', 'pl', 'm')
+        with mock.patch.object(translation_memory, 'SQLITE_MAX_VARIABLES', 10):
+            self.assertEqual(self.memory.lookup_many([src for src, _ in pairs] + ["missing"], 'en', 'pl', 'm'), dict(pairs))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+
+from source.translation_manager import IncrementalRecordParser, SubtitleTranslator
+
+
+parse = SubtitleTranslator._parse_id_records
+
+
+class ParseIdRecordsTest(unittest.TestCase):
+
+    def test_json_array(self):
+        self.assertEqual(parse('[{"id": 1, "pl": " Cześć "}, {"id": "2", "pl": "Hej"}]', ('pl',)), {1: {'pl': "Cześć"}, 2: {'pl': "Hej"}})
+
+    def test_code_fence_and_wrapping_object(self):
+        self.assertEqual(parse('```json\n{"records": [{"id": 3, "pl": "Trzy"}]}\n```', ('pl',)), {3: {'pl': "Trzy"}})
+
+    def test_truncated_output_keeps_complete_records(self):
+        self.assertEqual(parse('[{"id": 1, "pl": "Jeden"}, {"id": 2, "pl": "Dw', ('pl',)), {1: {'pl': "Jeden"}})
+
+    def test_malformed_separators_are_salvaged(self):
+        self.assertEqual(parse('{"id": 1, "pl": "a"}\n{"id": 2, "pl": "b"},,', ('pl',)), {1: {'pl': "a"}, 2: {'pl': "b"}})
+
+    def test_invalid_records_are_skipped(self):
+        self.assertEqual(parse('[{"id": "x", "pl": "a"}, {"id": 2}, {"id": 3, "pl": 5}, "junk", {"id": 4, "pl": "ok"}]', ('pl',)), {4: {'pl': "ok"}})
+
+    def test_nothing_usable(self):
+        self.assertEqual(parse("Sorry, I cannot help with that.", ('pl',)), {})
+
+    def test_every_target_required(self):
+        text = '[{"id": 1, "pl": "Tak", "de": "Ja"}, {"id": 2, "pl": "Nie"}]'
+        self.assertEqual(parse(text, ('pl', 'de')), {1: {'pl': "Tak", 'de': "Ja"}})
+
+    def test_echoed_input_is_not_a_translation(self):
+        text = '[{"id": 1, "text": "Yes."}, {"id": 2, "text": "No.", "pl": "Nie."}]'
+        self.assertEqual(parse(text, ('pl',)), {2: {'pl': "Nie."}})
+
+
+class IncrementalRecordParserTest(unittest.TestCase):
+
+    def test_records_complete_across_chunks(self):
+        parser = IncrementalRecordParser()
+        self.assertEqual(parser.feed('```json\n[{"id": 1, "text": "a'), [])
+        self.assertEqual(parser.feed('b"}, {"id": 2,'), [{"id": 1, "text": "ab"}])
+        self.assertEqual(parser.feed(' "text": "c"}]\n```'), [{"id": 2, "text": "c"}])
+
+    def test_braces_and_quotes_inside_strings(self):
+        parser = IncrementalRecordParser()
+        self.assertEqual(parser.feed('[{"id": 1, "text": "{not \\"a\\" brace}"}]'), [{"id": 1, "text": '{not "a" brace}'}])
+
+    def test_nested_objects_are_returned_whole(self):
+        self.assertEqual(IncrementalRecordParser().feed('[{"id": 1, "meta": {"x": 1}}]'), [{"id": 1, "meta": {"x": 1}}])
+
+    def test_truncated_object_is_never_returned(self):
+        parser = IncrementalRecordParser()
+        self.assertEqual(parser.feed('[{"id": 1, "text": "a"}, {"id": 2, "text": "b'), [{"id": 1, "text": "a"}])
+        self.assertEqual(parser.feed(''), [])
+
+    def test_malformed_object_is_skipped(self):
+        self.assertEqual(IncrementalRecordParser().feed('[{"id": 1, text}, {"id": 2, "text": "ok"}]'), [{"id": 2, "text": "ok"}])
+
+
+if __name__ == '__main__':
+    unittest.main()